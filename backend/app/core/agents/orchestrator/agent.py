@@ -216,7 +216,8 @@ class Orchestrator(BaseAgent):
         # (Assuming we have a task_id session; using self.agent_id for now)
         from app.core.memory.durable_execution import DurableContext
         durable = DurableContext(task_id=f"TASK_{self.agent_id}_{self.step_counter}")
-        durable.checkpoint(step_name=step.action, data={"thinking": step.thinking})
+        # Blocks until the ledger commit; keep it off the event loop
+        await asyncio.to_thread(durable.checkpoint, step_name=step.action, data={"thinking": step.thinking})
 
         result_data = {"action": step.action, "thinking": step.thinking}
         
@@ -1,6 +1,10 @@
+import asyncio
 from typing import Optional, Dict, Any, List
-from app.db.schemas.session import SessionLocal
+from sqlalchemy import select
+from app.db.schemas.session import AsyncSessionLocal
+from app.db.circuit_breaker import postgres_breaker
 from app.db.schemas.models import ResearchKnowledge
+from app.core.agents.researcher.query_cache import query_cache, hash_query
 from app.core.memory.vector_store import SovereignMemory
 
 # Initialize Sovereign Memory (Singleton-ish behavior for this module)
@@ -16,7 +20,7 @@ async def check_knowledge(query: str) -> Optional[Dict[str, Any]]:
     try:
         # 1. Try Semantic Recall first (Sovereign Memory)
         print(f"[MEMORY] recalling: {query}")
-        results = vector_store.recall(query, top_k=1)
+        results = await vector_store.arecall(query, top_k=1)
         
         if results:
             best_hit = results[0]
@@ -33,10 +37,14 @@ async def check_knowledge(query: str) -> Optional[Dict[str, Any]]:
                 "created_at": str(best_hit.get("timestamp", ""))
             }
             
-        # 2. Fallback to SQL Exact Match (Legacy)
-        db = SessionLocal()
-        try:
-            result = db.query(ResearchKnowledge).filter(ResearchKnowledge.query == query).first()
+        # 2. Fallback to SQL Normalized Match (Legacy) - skipped while the Postgres circuit is open
+        if not postgres_breaker.allow():
+            return None
+        async with AsyncSessionLocal() as db:
+            result = (await db.execute(
+                select(ResearchKnowledge).filter(ResearchKnowledge.query_hash == hash_query(query)).limit(1)
+            )).scalars().first()
+            postgres_breaker.record_success()
             if result:
                 return {
                     "title": result.title,
@@ -45,12 +53,11 @@ async def check_knowledge(query: str) -> Optional[Dict[str, Any]]:
                     "source": result.source,
                     "created_at": result.created_at.isoformat()
                 }
-        finally:
-            db.close()
             
         return None
         
     except Exception as e:
+        postgres_breaker.record_failure(e)
         print(f"[MEMORY] Recall failed: {e}")
         return None
 
@@ -58,46 +65,51 @@ async def save_knowledge(query: str, data: Any) -> bool:
     """
     Saves the research result to the database AND vector memory.
     """
-    db = SessionLocal()
-    try:
-        # Extract details
-        summary = "No summary available."
-        source_url = "Unknown"
-        title = "Research Result"
-        
-        if isinstance(data, list) and len(data) > 0:
-            first_hit = data[0]
-            summary = first_hit.get("snippet", "") or first_hit.get("body", "")
-            source_url = first_hit.get("url", "") or first_hit.get("href", "")
-            title = first_hit.get("title", "Research Result")
+    async with AsyncSessionLocal() as db:
+        try:
+            # Extract details
+            summary = "No summary available."
+            source_url = "Unknown"
+            title = "Research Result"
             
-        # 1. Save to SQL (Structured)
-        new_entry = ResearchKnowledge(
-            query=query,
-            snippet=summary,
-            url=source_url,
-            source="researcher-agent"
-        )
-        db.add(new_entry)
-        db.commit()
-        db.refresh(new_entry)
-        
-        # 2. Save to Vector Store (Semantic)
-        # We embed the summary + query for better retrieval context
-        content_to_embed = f"Query: {query}\nResult: {summary}"
-        metadata = {
-            "query": query,
-            "url": source_url,
-            "title": title,
-            "source": "researcher-agent"
-        }
-        vector_store.commit_to_memory(content_to_embed, metadata)
-        
-        return True
-    except Exception as e:
-        print(f"[ERROR] Failed to save knowledge: {e}")
-        db.rollback()
-        return False
-    finally:
-        db.close()
-
+            if isinstance(data, list) and len(data) > 0:
+                first_hit = data[0]
+                summary = first_hit.get("snippet", "") or first_hit.get("body", "")
+                source_url = first_hit.get("url", "") or first_hit.get("href", "")
+                title = first_hit.get("title", "Research Result")
+                
+            # 1. Save to SQL (Structured) - skipped while the Postgres circuit is open
+            if postgres_breaker.allow():
+                new_entry = ResearchKnowledge(
+                    query=query,
+                    query_hash=hash_query(query),
+                    snippet=summary,
+                    url=source_url,
+                    source="researcher-agent"
+                )
+                db.add(new_entry)
+                await db.commit()
+                postgres_breaker.record_success()
+                # Near-duplicate phrasings of this query now resolve to the stored row (semantic tier)
+                try:
+                    await asyncio.to_thread(query_cache.add, query)
+                except Exception as e:
+                    print(f"[MEMORY] Semantic cache indexing failed: {e}")
+            
+            # 2. Save to Vector Store (Semantic)
+            # We embed the summary + query for better retrieval context
+            content_to_embed = f"Query: {query}\nResult: {summary}"
+            metadata = {
+                "query": query,
+                "url": source_url,
+                "title": title,
+                "source": "researcher-agent"
+            }
+            await vector_store.acommit_to_memory(content_to_embed, metadata)
+            
+            return True
+        except Exception as e:
+            postgres_breaker.record_failure(e)
+            print(f"[ERROR] Failed to save knowledge: {e}")
+            await db.rollback()
+            return False
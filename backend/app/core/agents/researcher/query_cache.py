@@ -0,0 +1,199 @@
+"""
+Query Cache - Normalized + semantic lookup tiers for ResearchKnowledge
+
+Tier 1 (exact/normalized): md5 of the normalized query, served by the
+(query_hash, created_at) index. Tier 2 (semantic): nearest cached query by
+cosine similarity over a small in-RAM FAISS index of query embeddings.
+"""
+
+import os
+import re
+import json
+import time
+import atexit
+import hashlib
+import threading
+import unicodedata
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+import faiss
+from app.core.config import settings
+
+
+def normalize_query(query: str) -> str:
+    """Casing, unicode forms, whitespace and trailing punctuation do not change the question."""
+    query = unicodedata.normalize("NFKC", query or "").casefold()
+    query = re.sub(r"\s+", " ", query).strip()
+    return query.rstrip("?!.;:, ")
+
+
+def hash_query(query: str) -> str:
+    return hashlib.md5(normalize_query(query).encode()).hexdigest()
+
+
+class SemanticQueryCache:
+    """
+    Maps query embeddings to the query_hash their results are stored under.
+    The encoder is loaded on first use and stays resident (MiniLM, ~90MB): a cache
+    that reloads its model per lookup would cost more than the search it saves.
+    Inserts and TTL refreshes only mark the cache dirty; a timer writes it out at most
+    once per FLUSH_INTERVAL seconds (and at exit), off the search path.
+    """
+    INDEX_FILE = "queries.faiss"
+    KEYS_FILE = "queries.json"
+    TIERS = ("exact", "normalized", "semantic", "miss")
+    FLUSH_INTERVAL = 30.0
+
+    def __init__(self, storage_dir: Optional[str] = None, model_name: str = "all-MiniLM-L6-v2",
+                 threshold: float = None, max_entries: int = 50000):
+        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+        self.storage_dir = storage_dir or os.path.join(base_dir, "local_query_cache")
+        os.makedirs(self.storage_dir, exist_ok=True)
+        self.model_name = model_name
+        self.threshold = threshold if threshold is not None else settings.RESEARCH_SEMANTIC_CACHE_THRESHOLD
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._encoder = None
+        self.index = None
+        self.keys: List[Dict[str, Any]] = []  # {hash, added_at}, aligned with index positions
+        self._positions: Dict[str, int] = {}  # hash -> index position
+        self.hits = {tier: 0 for tier in self.TIERS}
+        self._dirty = False
+        self._load()
+        atexit.register(self.save)
+
+    # --- Embedding -------------------------------------------------------
+
+    def _embed(self, query: str) -> np.ndarray:
+        if self._encoder is None:
+            from sentence_transformers import SentenceTransformer
+            print(f"[QUERY CACHE] Loading query encoder ({self.model_name})...")
+            self._encoder = SentenceTransformer(self.model_name)
+        vector = self._encoder.encode([normalize_query(query)], normalize_embeddings=True)
+        return np.ascontiguousarray(vector, dtype="float32")
+
+    # --- Lookup / insert -------------------------------------------------
+
+    def lookup(self, query: str, max_age_hours: float) -> Optional[str]:
+        """Returns the query_hash of the closest fresh cached query above the threshold."""
+        if self.index is None or self.index.ntotal == 0:
+            return None
+        try:
+            vector = self._embed(query)
+        except Exception as e:
+            print(f"[QUERY CACHE] Semantic lookup unavailable: {e}")
+            return None
+        cutoff = time.time() - max_age_hours * 3600
+        with self._lock:
+            # Positions are resolved under the lock: eviction renumbers them
+            scores, positions = self.index.search(vector, min(5, self.index.ntotal))
+            for score, position in zip(scores[0], positions[0]):
+                if position < 0 or score < self.threshold:
+                    break
+                entry = self.keys[position]
+                if entry["added_at"] >= cutoff:
+                    return entry["hash"]
+        return None
+
+    def add(self, query: str):
+        """Indexes a query whose results were just stored (refreshes its TTL if already known)."""
+        key = hash_query(query)
+        with self._lock:
+            position = self._positions.get(key)
+            if position is not None:
+                self.keys[position]["added_at"] = time.time()
+                self._mark_dirty()
+                return
+        vector = self._embed(query)
+        with self._lock:
+            if key in self._positions:
+                return  # Added concurrently
+            if self.index is None:
+                self.index = faiss.IndexFlatIP(vector.shape[1])
+            self.index.add(vector)
+            self._positions[key] = len(self.keys)
+            self.keys.append({"hash": key, "added_at": time.time()})
+            if len(self.keys) > self.max_entries:
+                self._evict_oldest()
+            self._mark_dirty()
+
+    def _evict_oldest(self):
+        # Caller holds self._lock. Rebuild without the oldest half (rare, bounded size)
+        keep = len(self.keys) // 2
+        vectors = self.index.reconstruct_n(len(self.keys) - keep, keep)
+        self.index.reset()
+        self.index.add(vectors)
+        self.keys = self.keys[-keep:]
+        self._positions = {entry["hash"]: position for position, entry in enumerate(self.keys)}
+
+    # --- Stats -----------------------------------------------------------
+
+    def record(self, tier: str):
+        self.hits[tier] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        total = sum(self.hits.values())
+        return {
+            "hits": dict(self.hits),
+            "hit_rate": {tier: round(count / total, 4) if total else 0.0 for tier, count in self.hits.items()},
+            "semantic_entries": len(self.keys),
+            "threshold": self.threshold
+        }
+
+    # --- Persistence -----------------------------------------------------
+
+    def _mark_dirty(self):
+        # Caller holds self._lock. The first change after a save schedules the next one
+        if not self._dirty:
+            self._dirty = True
+            timer = threading.Timer(self.FLUSH_INTERVAL, self.save)
+            timer.daemon = True
+            timer.start()
+
+    def save(self):
+        """Writes the index and keys if anything changed since the last save."""
+        with self._lock:
+            if not self._dirty or self.index is None:
+                return
+            # Snapshot under the lock; the file writes happen outside it
+            index_bytes = faiss.serialize_index(self.index)
+            keys = [dict(entry) for entry in self.keys]
+            self._dirty = False
+        index_path = os.path.join(self.storage_dir, self.INDEX_FILE)
+        keys_path = os.path.join(self.storage_dir, self.KEYS_FILE)
+        try:
+            with open(index_path + ".tmp", "wb") as f:
+                f.write(index_bytes.tobytes())
+            with open(keys_path + ".tmp", "w") as f:
+                json.dump(keys, f)
+            os.replace(index_path + ".tmp", index_path)
+            os.replace(keys_path + ".tmp", keys_path)
+        except Exception as e:
+            print(f"[QUERY CACHE] Persistence failed: {e}")
+            with self._lock:
+                self._mark_dirty()
+
+    def _load(self):
+        index_path = os.path.join(self.storage_dir, self.INDEX_FILE)
+        keys_path = os.path.join(self.storage_dir, self.KEYS_FILE)
+        if not (os.path.exists(index_path) and os.path.exists(keys_path)):
+            return
+        try:
+            self.index = faiss.read_index(index_path)
+            with open(keys_path, "r") as f:
+                self.keys = json.load(f)
+            if len(self.keys) != self.index.ntotal:
+                raise ValueError("index/keys mismatch")
+            self._positions = {entry["hash"]: position for position, entry in enumerate(self.keys)}
+        except Exception as e:
+            print(f"[QUERY CACHE] Load failed, starting empty: {e}")
+            self.index = None
+            self.keys = []
+            self._positions = {}
+
+
+# Global Instance
+query_cache = SemanticQueryCache()
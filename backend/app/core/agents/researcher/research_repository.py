@@ -4,13 +4,18 @@ Research Repository - Persistence layer for Sovereign Memory
 Handles storage and retrieval of search results with deduplication.
 """
 
+import asyncio
 import hashlib
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, select, func
+from sqlalchemy.dialects.postgresql import insert
 
+from app.core.config import settings
 from app.db.schemas.models import ResearchKnowledge
+from app.core.agents.researcher.query_cache import query_cache, hash_query
 
 
 class ResearchRepository:
@@ -18,13 +23,13 @@ class ResearchRepository:
     Repository for storing and retrieving research results.
     
     Features:
-    - URL-based deduplication
-    - Query caching (reuse results within TTL)
+    - URL-based deduplication per query (one row per query/URL pair)
+    - Query caching (reuse results within TTL): exact/normalized + semantic tiers
     - Provider-agnostic storage
     """
     
     # Cache TTL: Results older than this are considered stale
-    CACHE_TTL_HOURS = 24
+    CACHE_TTL_HOURS = settings.MEMORY_TTL_HOURS
     
     def __init__(self, db: Session):
         self.db = db
@@ -34,26 +39,120 @@ class ResearchRepository:
         """Generate a hash for URL deduplication."""
         return hashlib.md5(url.encode()).hexdigest()
     
-    def find_cached_results(self, query: str, max_age_hours: int = None) -> List[ResearchKnowledge]:
+    def find_cached_results(self, query: str, max_age_hours: int = None, semantic: bool = True) -> List[ResearchKnowledge]:
         """
         Find cached results for a query.
         
+        Tiers: exact/normalized (query_hash index) first, then semantic
+        (near-duplicate phrasing above the similarity threshold).
+        
         Args:
             query: Search query
             max_age_hours: Maximum age of results (default: CACHE_TTL_HOURS)
+            semantic: Also try the semantic tier on a miss
             
         Returns:
             List of cached ResearchKnowledge entries
         """
+        max_age_hours = max_age_hours or self.CACHE_TTL_HOURS
+        cached = list(self.db.execute(self._cached_results_statement(hash_query(query), max_age_hours)).scalars())
+        if cached:
+            return self._record_hit(query, cached)
+        
+        similar = query_cache.lookup(query, max_age_hours) if semantic else None
+        if similar:
+            cached = list(self.db.execute(self._cached_results_statement(similar, max_age_hours)).scalars())
+        return self._record_hit(query, cached, semantic=True)
+    
+    @classmethod
+    def _cached_results_statement(cls, query_hash: str, max_age_hours: int = None):
         if max_age_hours is None:
-            max_age_hours = self.CACHE_TTL_HOURS
+            max_age_hours = cls.CACHE_TTL_HOURS
             
         cutoff = datetime.utcnow() - timedelta(hours=max_age_hours)
         
-        return self.db.query(ResearchKnowledge).filter(
-            ResearchKnowledge.query == query,
+        return select(ResearchKnowledge).filter(
+            ResearchKnowledge.query_hash == query_hash,
             ResearchKnowledge.created_at >= cutoff
-        ).order_by(desc(ResearchKnowledge.created_at)).all()
+        ).order_by(desc(ResearchKnowledge.created_at))
+    
+    @staticmethod
+    def _record_hit(query: str, cached: List[ResearchKnowledge], semantic: bool = False) -> List[ResearchKnowledge]:
+        if not cached:
+            tier = "miss"
+        elif semantic:
+            tier = "semantic"
+        else:
+            tier = "exact" if any(r.query == query for r in cached) else "normalized"
+        query_cache.record(tier)
+        if cached:
+            print(f"[ResearchRepository] CACHE HIT ({tier}): {len(cached)} results for query: {query}")
+        return cached
+    
+    @classmethod
+    def _insert_statement(cls, query: str, query_type: str, results: List[Dict[str, Any]]):
+        """
+        One multi-row INSERT ... ON CONFLICT (query_hash, url_hash) DO UPDATE RETURNING id.
+        A URL is stored once per query (the same URL may belong to many queries);
+        duplicates inside the batch are dropped here, and a URL this query already
+        stored is refreshed (created_at, snippet, ...) so the cache TTL restarts.
+        The returned rows are exactly this query's stored results.
+        """
+        query_hash = hash_query(query)
+        rows = {}
+        for result in results:
+            url = result.get("url", "")
+            if not url:
+                continue
+            url_hash = cls.hash_url(url)
+            if url_hash in rows:
+                continue  # Skip duplicate
+            rows[url_hash] = {
+                "query": query,
+                "query_hash": query_hash,
+                "query_type": query_type,
+                "source": result.get("source", "unknown"),
+                "title": result.get("title", ""),
+                "url": url,
+                "url_hash": url_hash,
+                "snippet": result.get("snippet", ""),
+                "score": str(result.get("score", 0.0))
+            }
+        if not rows:
+            return None
+        stmt = insert(ResearchKnowledge).values(list(rows.values()))
+        return stmt.on_conflict_do_update(
+            index_elements=[ResearchKnowledge.query_hash, ResearchKnowledge.url_hash],
+            set_={
+                "query": stmt.excluded.query,
+                "query_type": stmt.excluded.query_type,
+                "source": stmt.excluded.source,
+                "title": stmt.excluded.title,
+                "snippet": stmt.excluded.snippet,
+                "score": stmt.excluded.score,
+                "created_at": func.now()
+            }
+        ).returning(ResearchKnowledge.id)
+    
+    @staticmethod
+    def _index_query(query: str):
+        """Makes the stored results reachable from near-duplicate phrasings (semantic tier)."""
+        try:
+            query_cache.add(query)
+        except Exception as e:
+            print(f"[ResearchRepository] Semantic cache indexing failed: {e}")
+    
+    @staticmethod
+    def _stats_statement():
+        return select(ResearchKnowledge.source, func.count()).group_by(ResearchKnowledge.source)
+    
+    @staticmethod
+    def _stats_from_rows(rows) -> Dict[str, Any]:
+        sources = {source: count for source, count in rows if source}
+        return {
+            "total_entries": sum(count for _, count in rows),
+            "by_source": sources
+        }
     
     def store_results(
         self, 
@@ -70,60 +169,66 @@ class ResearchRepository:
             results: List of result dicts with title, url, snippet, source
             
         Returns:
-            Number of new results stored (excludes duplicates)
+            Number of results stored or refreshed for this query (excludes duplicates)
         """
-        stored_count = 0
-        
-        for result in results:
-            url = result.get("url", "")
-            if not url:
-                continue
-                
-            url_hash = self.hash_url(url)
-            
-            # Check for duplicate URL
-            existing = self.db.query(ResearchKnowledge).filter(
-                ResearchKnowledge.url_hash == url_hash
-            ).first()
-            
-            if existing:
-                continue  # Skip duplicate
-            
-            # Create new entry
-            entry = ResearchKnowledge(
-                query=query,
-                query_type=query_type,
-                source=result.get("source", "unknown"),
-                title=result.get("title", ""),
-                url=url,
-                url_hash=url_hash,
-                snippet=result.get("snippet", ""),
-                score=str(result.get("score", 0.0))
-            )
-            
-            self.db.add(entry)
-            stored_count += 1
+        stmt = self._insert_statement(query, query_type, results)
+        if stmt is None:
+            return 0
         
+        stored_count = len(self.db.execute(stmt).all())
+        self.db.commit()
         if stored_count > 0:
-            self.db.commit()
-            print(f"[ResearchRepository] Stored {stored_count} new results for query: {query}")
+            print(f"[ResearchRepository] Stored {stored_count} results for query: {query}")
+            self._index_query(query)
         
         return stored_count
     
     def get_stats(self) -> Dict[str, Any]:
-        """Get storage statistics."""
-        total = self.db.query(ResearchKnowledge).count()
+        """Get storage statistics (single GROUP BY source)."""
+        return self._stats_from_rows(self.db.execute(self._stats_statement()).all())
+
+
+class AsyncResearchRepository(ResearchRepository):
+    """
+    Async twin of ResearchRepository for coroutines (AsyncSessionLocal).
+    Shares statement builders with the sync class so both stay in lockstep.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def find_cached_results(self, query: str, max_age_hours: int = None, semantic: bool = True) -> List[ResearchKnowledge]:
+        """Find cached results for a query (see ResearchRepository.find_cached_results)."""
+        max_age_hours = max_age_hours or self.CACHE_TTL_HOURS
+        cached = list((await self.db.execute(self._cached_results_statement(hash_query(query), max_age_hours))).scalars())
+        if cached:
+            return self._record_hit(query, cached)
         
-        # Count by source
-        sources = {}
-        for source in ["serper", "tavily", "exa", "searchapi", "google", "duckduckgo"]:
-            count = self.db.query(ResearchKnowledge).filter(
-                ResearchKnowledge.source == source
-            ).count()
-            if count > 0:
-                sources[source] = count
+        # Query embedding is CPU work; keep it off the event loop
+        similar = await asyncio.to_thread(query_cache.lookup, query, max_age_hours) if semantic else None
+        if similar:
+            cached = list((await self.db.execute(self._cached_results_statement(similar, max_age_hours))).scalars())
+        return self._record_hit(query, cached, semantic=True)
+    
+    async def store_results(
+        self, 
+        query: str, 
+        query_type: str,
+        results: List[Dict[str, Any]]
+    ) -> int:
+        """Store search results with deduplication (see ResearchRepository.store_results)."""
+        stmt = self._insert_statement(query, query_type, results)
+        if stmt is None:
+            return 0
         
-        return {
-            "total_entries": total,
-            "by_source": sources
-        }
+        stored_count = len((await self.db.execute(stmt)).all())
+        await self.db.commit()
+        if stored_count > 0:
+            print(f"[ResearchRepository] Stored {stored_count} results for query: {query}")
+            await asyncio.to_thread(self._index_query, query)
+        
+        return stored_count
+    
+    async def get_stats(self) -> Dict[str, Any]:
+        """Get storage statistics (single GROUP BY source)."""
+        return self._stats_from_rows((await self.db.execute(self._stats_statement())).all())
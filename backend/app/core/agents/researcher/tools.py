@@ -1,8 +1,8 @@
 from typing import List, Dict, Any
-from sqlalchemy.orm import Session
 from app.core.agents.researcher.search_aggregator import SearchAggregator
-from app.db.schemas.session import SessionLocal
-from app.db.schemas.models import ResearchKnowledge
+from app.db.schemas.session import AsyncSessionLocal
+from app.db.circuit_breaker import postgres_breaker
+from app.core.agents.researcher.research_repository import AsyncResearchRepository
 
 async def perform_search(query: str, force_fresh: bool = False) -> List[Dict[str, Any]]:
     """
@@ -11,11 +11,17 @@ async def perform_search(query: str, force_fresh: bool = False) -> List[Dict[str
     2. If found & !force, return cached (Efficiency).
     3. If not, Search -> Persist -> Return.
     """
-    db: Session = SessionLocal()
-    try:
-        # 1. State: Check Memory
-        if not force_fresh:
-            cached = db.query(ResearchKnowledge).filter(ResearchKnowledge.query == query).all()
+    async with AsyncSessionLocal() as db:
+        # 1. State: Check Memory (skipped instantly while the Postgres circuit is open)
+        if not force_fresh and postgres_breaker.allow():
+            try:
+                # Exact/normalized hash, then semantic near-duplicates (per-tier hits are recorded)
+                cached = await AsyncResearchRepository(db).find_cached_results(query)
+                postgres_breaker.record_success()
+            except Exception as e:
+                if not postgres_breaker.record_failure(e):
+                    raise
+                cached = []
             if cached:
                 print(f"[TOOL] Found {len(cached)} cached results for: {query}")
                 return [{
@@ -25,31 +31,22 @@ async def perform_search(query: str, force_fresh: bool = False) -> List[Dict[str
                     "source": c.source
                 } for c in cached]
 
-        # 2. Action: Execute Search
+        # 2. Action: Execute Search (the pooled connection is not held during search I/O)
+        await db.close()
         aggregator = SearchAggregator()
         results = await aggregator.search(query)
         
         # 3. Result: Persist Memory
-        if results:
-            for r in results:
-                # Avoid duplicates in the same query batch
-                exists = db.query(ResearchKnowledge).filter(
-                    ResearchKnowledge.query == query,
-                    ResearchKnowledge.url == r["url"]
-                ).first()
-                
-                if not exists:
-                    knowledge = ResearchKnowledge(
-                        query=query,
-                        source=r["source"],
-                        title=r["title"],
-                        url=r["url"],
-                        snippet=r["snippet"]
-                    )
-                    db.add(knowledge)
-            db.commit()
-            print(f"[TOOL] Persisted {len(results)} new results for: {query}")
+        if results and postgres_breaker.allow():
+            try:
+                # One INSERT ... ON CONFLICT (query_hash, url_hash) DO UPDATE for the whole batch
+                stored = await AsyncResearchRepository(db).store_results(query, "search", results)
+                postgres_breaker.record_success()
+                print(f"[TOOL] Persisted {stored} results for: {query}")
+            except Exception as e:
+                await db.rollback()
+                if not postgres_breaker.record_failure(e):
+                    raise
+                print(f"[TOOL] Persist skipped, Postgres unavailable: {e}")
 
         return results
-    finally:
-        db.close()
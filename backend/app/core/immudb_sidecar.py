@@ -1,19 +1,105 @@
 import os
 import json
+import time
+import queue
+import atexit
 import hashlib
+import threading
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.ledger.merkle import MerkleTree, leaf_hash, verify_inclusion, verify_consistency
+from app.core.ledger.offset_index import HashIndex
+from app.core.ledger.query_index import QueryIndex
+from app.core.ledger.audit_policy import AuditPolicy, METRICS_OPERATION
+from app.core.ledger.segments import SegmentedLog
+from app.core.ledger.file_lock import FileLock
+from app.core.ledger.verifier import LedgerVerifier
+
+
+class _PendingEntry:
+    """
+    A chained entry waiting for the writer; `done` is set once the writer is through
+    with it (durable callers), and `error` says why it did not reach the disk.
+    `claimed` is set by whoever commits it: the writer, or a durable caller that
+    gave up waiting for the writer.
+    """
+    __slots__ = ("entry", "done", "error", "claimed")
+
+    def __init__(self, entry: Dict[str, Any], durable: bool):
+        self.entry = entry
+        self.done = threading.Event() if durable else None
+        self.error: Optional[Exception] = None
+        self.claimed = False
+
 
 class ImmudbSidecar:
     """
     Simulates / Interfaces with an Immudb instance for immutable auditing.
     Provides a cryptographic chain of operations to ensure data integrity.
+
+    Entries are chained in the caller's thread (so the hash is known immediately) and
+    handed to a background writer that group-commits them: one write per batch of
+    `batch_size` entries or `flush_interval` seconds, fsynced per `fsync_policy`.
+    Every written entry also becomes a leaf of an RFC 6962 Merkle tree (governance/ledger/merkle),
+    which serves O(log n) inclusion and consistency proofs under a signed tree head.
+    The log itself is segmented (governance/ledger/segments): fixed-size files whose
+    headers carry the previous segment's final hash and count, each with an offset
+    index, so tail reads and lookups by sequence number or hash touch one segment.
+    Queries by operation, actor, time range or detail key (task_id, ...) go through a
+    SQLite secondary index (governance/ledger/audit_index.sqlite) kept in step with
+    every group commit and rebuildable from the log; lookups by hash go through a
+    hash index persisted next to it (governance/ledger/hash_index.idx).
+    High-frequency runtime events go through an AuditPolicy (AUDIT_OPERATION_TIERS):
+    sampled or metrics-only operations are counted and folded into periodic
+    AUDIT_METRICS entries instead of being chained one by one.
+
+    Single writer: within a process the chain lock orders entries and the writer
+    thread is the only one touching files; across processes (uvicorn workers,
+    ingestion, the dropzone watcher) each group commit runs under a file lock, picks
+    up what other processes appended, and re-chains its batch onto the real tip if
+    needed. The hash returned by log_operation is then provisional; pass durable=True
+    to wait for the committed hash. A durable caller the writer has not served within
+    AUDIT_DURABLE_TIMEOUT_SECONDS (writer dead or stuck) commits its entry inline.
     """
-    def __init__(self):
+    FSYNC_POLICIES = ("none", "batch", "always")
+
+    def __init__(self, batch_size: Optional[int] = None, flush_interval: Optional[float] = None,
+                 fsync_policy: Optional[str] = None):
         base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-        self.audit_log_path = os.path.join(base_dir, "governance", "sovereign_audit.log")
-        os.makedirs(os.path.dirname(self.audit_log_path), exist_ok=True)
-        self.last_hash = self._get_last_hash()
+        self.ledger_dir = os.path.join(base_dir, "governance", "ledger")
+        self.legacy_log_path = os.path.join(base_dir, "governance", "sovereign_audit.log")
+        self.batch_size = batch_size or settings.AUDIT_BATCH_SIZE
+        self.flush_interval = flush_interval if flush_interval is not None else settings.AUDIT_FLUSH_INTERVAL_SECONDS
+        self.fsync_policy = fsync_policy or settings.AUDIT_FSYNC_POLICY
+        self.durable_timeout = settings.AUDIT_DURABLE_TIMEOUT_SECONDS
+        if self.fsync_policy not in self.FSYNC_POLICIES:
+            raise ValueError(f"Unknown audit fsync policy '{self.fsync_policy}' (expected one of {self.FSYNC_POLICIES})")
+
+        os.makedirs(self.ledger_dir, exist_ok=True)
+        self._file_lock = FileLock(os.path.join(self.ledger_dir, "ledger.lock"))
+        self.watermark_path = os.path.join(self.ledger_dir, "verified.json")
+        with self._file_lock:
+            self.log = SegmentedLog(os.path.join(self.ledger_dir, "segments"),
+                                    settings.AUDIT_SEGMENT_MAX_BYTES, settings.AUDIT_SEGMENT_COMPRESSION)
+            self._migrate_legacy_log()
+            self.last_hash = self._get_last_hash()
+            self.tree = MerkleTree(os.path.join(self.ledger_dir, "merkle"))
+            self._sync_tree()
+            self.index = QueryIndex(os.path.join(self.ledger_dir, "audit_index.sqlite"), settings.AUDIT_INDEX_DETAIL_KEYS)
+            self._sync_index()
+            self.hashes = HashIndex.open(os.path.join(self.ledger_dir, "hash_index.idx"), self.tree.size, self.tree.iter_leaves)
+        self.rechained = 0
+        self.policy = AuditPolicy(settings.AUDIT_OPERATION_TIERS, settings.AUDIT_SAMPLE_RATES,
+                                  settings.AUDIT_DEFAULT_SAMPLE_RATE, settings.AUDIT_METRICS_INTERVAL_SECONDS,
+                                  settings.AUDIT_METRIC_LABEL_KEYS)
+        self._chain_lock = threading.Lock()
+        self._claim_lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[_PendingEntry]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="immudb-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
 
     def _smart_serialize(self, data: Any) -> Any:
         """Recursively converts non-serializable objects (Enums, etc) into JSON-safe formats."""
@@ -28,119 +114,404 @@ class ImmudbSidecar:
         return data
 
     def _get_last_hash(self) -> str:
-        """Retrieves the hash of the last entry to maintain the chain."""
-        if not os.path.exists(self.audit_log_path):
-            return "0" * 64
-        
+        """Retrieves the hash of the last entry to maintain the chain (active segment only)."""
         try:
-            with open(self.audit_log_path, "rb") as f:
-                # Go to the end and find the last line
-                f.seek(0, os.SEEK_END)
-                pos = f.tell()
-                while pos > 0:
-                    pos -= 1
-                    f.seek(pos)
-                    if f.read(1) == b"\n":
-                        line = f.readline().decode().strip()
-                        if line:
-                            data = json.loads(line)
-                            return data.get("current_hash", "0" * 64)
-                # If only one line exists
-                f.seek(0)
-                line = f.readline().decode().strip()
-                if line:
-                    data = json.loads(line)
-                    return data.get("current_hash", "0" * 64)
-        except Exception:
-            pass
-        return "0" * 64
+            return self.log.last_hash()
+        except Exception as e:
+            print(f"[IMMUDB ERROR] Could not read the chain tip: {e}")
+            return "0" * 64
 
-    def log_operation(self, operation: str, details: Dict[str, Any], actor: str = "SYSTEM"):
+    def _migrate_legacy_log(self):
+        """One-time split of the single-file sovereign_audit.log into segments."""
+        if self.log.count or not os.path.exists(self.legacy_log_path):
+            return
+        print(f"[IMMUDB] Migrating {self.legacy_log_path} into ledger segments...")
+        batch = []
+        with open(self.legacy_log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                batch.append((json.loads(line)["current_hash"], line + "\n"))
+                if len(batch) >= 10000:
+                    self.log.append(batch, fsync_policy="batch")
+                    batch = []
+        if batch:
+            self.log.append(batch, fsync_policy="batch")
+        self.log.close_file()
+        os.replace(self.legacy_log_path, self.legacy_log_path + ".migrated")
+        if os.path.exists(self.legacy_log_path + ".idx"):
+            os.remove(self.legacy_log_path + ".idx")
+        print(f"[IMMUDB] Migration COMPLETE: {self.log.count} entries in {len(self.log.segments)} segment(s)")
+
+    @staticmethod
+    def _chain(entry: Dict[str, Any], previous_hash: str) -> str:
+        """Links an entry to its predecessor and sets its hash over the canonical body."""
+        entry.pop("current_hash", None)
+        entry["previous_hash"] = previous_hash
+        entry_str = json.dumps(entry, sort_keys=True)
+        entry["current_hash"] = hashlib.sha256(entry_str.encode()).hexdigest()
+        return entry["current_hash"]
+
+    def log_operation(self, operation: str, details: Dict[str, Any], actor: str = "SYSTEM",
+                      durable: bool = False) -> Optional[str]:
         """
         Appends an operation to the immutable audit log with a SHA-256 chain hash.
         This implements a linear Merkle-style chain (Accumulative Hash).
+        Returns the entry's hash without waiting for the disk write, unless `durable`:
+        then it blocks until the entry is committed and returns its final hash, or None
+        when the write failed (the entry is not in the ledger).
+        Returns None when the audit policy only counts this operation (durable entries are always chained).
         """
+        details = self._smart_serialize(details)
+        if self.policy.due():
+            self._log_metrics()
+        sample_rate = None
+        if not durable:
+            chained, sample_rate = self.policy.admit(operation, details)
+            if not chained:
+                return None
         timestamp = datetime.utcnow().isoformat()
-        
+
         # 1. Base Entry Data
         entry = {
             "timestamp": timestamp,
             "actor": actor,
             "operation": operation,
-            "details": self._smart_serialize(details),
-            "previous_hash": self.last_hash
+            "details": details
         }
-        
-        # 2. Cryptographic Chain Link (Current Hash / Alh)
-        entry_str = json.dumps(entry, sort_keys=True)
-        current_hash = hashlib.sha256(entry_str.encode()).hexdigest()
-        entry["current_hash"] = current_hash
-        
-        try:
-            with open(self.audit_log_path, "a") as f:
-                f.write(json.dumps(entry) + "\n")
-            
-            # Update memory state for next link
+        if sample_rate is not None:
+            entry["sample_rate"] = sample_rate # One chained entry stands for ~1/sample_rate events
+        pending = _PendingEntry(entry, durable)
+        with self._chain_lock:
+            # 2. Cryptographic Chain Link (Current Hash / Alh)
+            current_hash = self._chain(entry, self.last_hash)
+            # Enqueued under the chain lock so the queue order is the chain order
             self.last_hash = current_hash
+            self._queue.put(pending)
+
+        if durable:
+            return self._await_durable(pending)
+        return current_hash
+
+    def _await_durable(self, pending: _PendingEntry) -> Optional[str]:
+        """Waits for the writer to commit `pending`; commits it inline if the writer does not get to it in time."""
+        while not pending.done.wait(self.durable_timeout if self._writer.is_alive() else 0):
+            with self._claim_lock:
+                claimed_by_writer, pending.claimed = pending.claimed, True
+            if claimed_by_writer:
+                if self._writer.is_alive():
+                    continue # Being committed (e.g. waiting for another process's file lock)
+                pending.error = RuntimeError("the audit writer stopped during the commit")
+                break
+            print(f"[IMMUDB] Audit writer stopped or stuck, committing durable {pending.entry['operation']} inline")
+            try:
+                self._commit([pending])
+            except Exception as e:
+                pending.error = e
+            break
+        if pending.error is not None:
+            print(f"[IMMUDB ERROR] Durable {pending.entry['operation']} not written: {pending.error}")
+            return None
+        return pending.entry["current_hash"]
+
+    def _log_metrics(self):
+        """Chains the policy's counters for the window that just ended (if anything was counted)."""
+        report = self.policy.drain()
+        if report is not None:
+            self.log_operation(METRICS_OPERATION, report)
+
+    # --- Group Commit ----------------------------------------------------
+
+    def _write_loop(self):
+        """
+        Writer thread: drains the queue in batches (size or time bound, whichever first).
+        A durable entry ends the wait: what is already queued is committed right away.
+        """
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1] is not None:
+                if batch[-1].done is not None:
+                    deadline = 0.0 # A durable caller is blocked on this batch
+                timeout = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            with self._claim_lock:
+                # Durable entries whose caller already committed them inline are skipped
+                items = [item for item in batch if item is not None and not item.claimed]
+                for item in items:
+                    item.claimed = True
+            try:
+                if items:
+                    self._commit(items)
+            except Exception as e:
+                print(f"[IMMUDB ERROR] Audit failure ({len(items)} entries not written): {e}")
+                for item in items:
+                    item.error = e
+                self.log.close_file()
+            finally:
+                for item in items:
+                    if item.done is not None:
+                        item.done.set()
+                for _ in batch:
+                    self._queue.task_done()
+            if batch[-1] is None:
+                self.log.close_file()
+                return
+
+    def _commit(self, items: List[_PendingEntry]):
+        """One group commit under the cross-process lock."""
+        with self._file_lock:
+            self._refresh()
+            tip = self.log.last_hash()
+            if items[0].entry["previous_hash"] != tip:
+                # Another process appended since these were chained: re-link onto the real tip
+                provisional_tip = items[-1].entry["current_hash"]
+                for item in items:
+                    tip = self._chain(item.entry, tip)
+                self.rechained += len(items)
+                with self._chain_lock:
+                    if self.last_hash == provisional_tip:
+                        self.last_hash = tip
+
+            first_seq = self.log.count
+            entries = [(item.entry["current_hash"], json.dumps(item.entry) + "\n") for item in items]
+            self.log.append(entries, self.fsync_policy)
+            entry_hashes = [bytes.fromhex(entry_hash) for entry_hash, _ in entries]
+            self.tree.append(entry_hashes)
+            self.hashes.add(leaf_hash(h) for h in entry_hashes)
+            self._index_batch(first_seq, [item.entry for item in items])
+
+    def _index_batch(self, first_seq: int, entries: List[Dict[str, Any]]):
+        """Adds a committed batch to the query index (the log is already durable; failures only lag the index)."""
+        try:
+            if self.index.count < first_seq:
+                self._sync_index(first_seq) # A previous batch was not indexed (crash or error)
+            self.index.add(first_seq, entries)
+        except Exception as e:
+            print(f"[IMMUDB ERROR] Query index update failed: {e}")
+
+    def _refresh(self):
+        """Picks up entries other processes committed since our last commit (file lock held)."""
+        if not self.log.refresh():
+            return
+        self.tree.refresh()
+        if self.hashes.count < self.tree.size:
+            self.hashes.add(self.tree.iter_leaves(self.hashes.count))
+
+    def flush(self):
+        """Blocks until every entry logged so far is on disk (per the fsync policy)."""
+        if self._writer.is_alive():
+            self._queue.join()
+
+    def close(self):
+        """Chains pending counters, drains the queue and stops the writer (registered with atexit)."""
+        if self._writer.is_alive():
+            self._log_metrics()
+            self._queue.put(None)
+            self._writer.join()
+        self.tree.close()
+        self.index.close()
+        self.log.close()
+
+    def _sync_tree(self):
+        """Brings the Merkle tree level with the log (first-run backfill, or leaves lost in a crash)."""
+        if self.tree.size == self.log.count:
+            return
+        if self.tree.size > self.log.count:
+            print(f"[IMMUDB ERROR] Merkle tree has {self.tree.size} leaves for {self.log.count} log entries")
+            return
+        print(f"[IMMUDB] Building Merkle tree from the audit log (from leaf {self.tree.size})...")
+        pending = []
+        try:
+            for line in self.log.iter_lines(self.tree.size):
+                pending.append(bytes.fromhex(json.loads(line)["current_hash"]))
+                if len(pending) >= 10000:
+                    self.tree.append(pending)
+                    pending = []
+            self.tree.append(pending)
         except Exception as e:
-            print(f"[IMMUDB ERROR] Audit failure: {e}")
+            print(f"[IMMUDB ERROR] Merkle tree sync failed: {e}")
+
+    def _sync_index(self, until: Optional[int] = None):
+        """Indexes log entries the query index is missing, up to `until` (default: all)."""
+        start = self.index.count
+        until = self.log.count if until is None else until
+        if start >= until:
+            return
+        print(f"[IMMUDB] Indexing audit entries {start}..{until - 1} for queries...")
+        pending, batch_start = [], start
+        try:
+            for seq, line in enumerate(self.log.iter_lines(start), start):
+                if seq >= until:
+                    break
+                pending.append(json.loads(line))
+                if len(pending) >= 10000:
+                    self.index.add(batch_start, pending)
+                    pending, batch_start = [], seq + 1
+            if pending:
+                self.index.add(batch_start, pending)
+        except Exception as e:
+            print(f"[IMMUDB ERROR] Query index sync failed: {e}")
+
+    def rebuild_index(self):
+        """Drops the query index and rebuilds it from the log (e.g. after changing AUDIT_INDEX_DETAIL_KEYS)."""
+        self.flush()
+        with self._file_lock:
+            self.log.refresh()
+            self.index.reset()
+            self._sync_index()
+        print(f"[IMMUDB] Query index rebuilt ({self.index.count} entries)")
+
+    # --- Queries ---------------------------------------------------------
+
+    @property
+    def entry_count(self) -> int:
+        return self.log.count
 
     def get_logs(self, limit: int = 100) -> List[Dict[str, Any]]:
-        """Retrieves a list of audit logs, most recent first."""
-        if not os.path.exists(self.audit_log_path):
+        """Retrieves a list of audit logs, most recent first (reads only the tail)."""
+        self.flush()
+        if limit <= 0:
             return []
-            
-        logs = []
         try:
-            with open(self.audit_log_path, "r") as f:
-                lines = f.readlines()
-                for line in reversed(lines):
-                    if line.strip():
-                        logs.append(json.loads(line))
-                        if len(logs) >= limit:
-                            break
+            return [json.loads(line) for line in self.log.tail(limit)]
         except Exception as e:
             print(f"[IMMUDB ERROR] Retrieval failure: {e}")
-        return logs
+            return []
 
-    def inclusion_proof(self, target_hash: str) -> bool:
+    def get_entry(self, seq: int, flush: bool = True) -> Optional[Dict[str, Any]]:
+        """Entry by sequence number (0-based position in the chain)."""
+        if flush:
+            self.flush()
+        return self.log.read_entry(seq)
+
+    def iter_entries(self, start_seq: int = 0):
+        """Every entry from `start_seq` on, in chain order (streams segment by segment)."""
+        self.flush()
+        for line in self.log.iter_lines(start_seq):
+            yield json.loads(line)
+
+    def query(self, operation: Optional[str] = None, actor: Optional[str] = None, since=None, until=None,
+              limit: Optional[int] = 100, newest_first: bool = True, **details) -> List[Dict[str, Any]]:
         """
-        Mathematically confirms an action exists in the ledger by scanning the chain.
-        In a production Immudb, this would return a Merkle Audit Path.
+        Entries matching every given filter via the query index, e.g.
+        query("DURABLE_CHECKPOINT", task_id="t-1") or query("SEARCH_PROVIDER_SUCCESS", since=an_hour_ago).
+        `since` / `until` are UTC datetimes or ISO strings; detail filters use AUDIT_INDEX_DETAIL_KEYS.
         """
-        if not os.path.exists(self.audit_log_path):
-            return False
-            
+        self.flush()
         try:
-            with open(self.audit_log_path, "r") as f:
-                for line in f:
-                    entry = json.loads(line)
-                    if entry.get("current_hash") == target_hash:
-                        return True
-        except Exception:
-            pass
-        return False
+            seqs = self.index.query(operation, actor, since, until, details, limit, newest_first)
+            found = self.log.read_entries(seqs)
+            return [found[seq] for seq in seqs if seq in found]
+        except Exception as e:
+            print(f"[IMMUDB ERROR] Query failure: {e}")
+            return []
 
-    def consistency_proof(self, slice_start: int, slice_end: int) -> bool:
+    def count_by(self, key: str, operation: Optional[str] = None, since=None, until=None) -> Dict[str, int]:
+        """Entry counts per value of an indexed detail key, e.g. count_by("complexity", "TRIAGE_COMPLETE")."""
+        self.flush()
+        return self.index.group_counts(key, operation, since, until)
+
+    def find_entry(self, entry_hash: str, flush: bool = True) -> Optional[int]:
+        """
+        Sequence number of the entry with this hash. flush=False skips waiting for queued
+        entries (for hashes known to be committed, e.g. returned by a durable log_operation).
+        """
+        if flush:
+            self.flush()
+        try:
+            target = leaf_hash(bytes.fromhex(entry_hash))
+        except ValueError:
+            return None
+        return self.hashes.lookup(target, lambda seq: self.tree.leaf(seq) == target)
+
+    def verify(self, workers: Optional[int] = None, full: bool = False) -> Dict[str, Any]:
         """
-        Ensures the log history is linear and untampered between two indices.
-        Verifies that each block's previous_hash matches the preceding block's hash.
+        Chain verification (links and entry hashes) in a process pool. Resumes from the
+        verified watermark, so routine checks only cover new entries; `full` re-checks everything.
         """
-        if not os.path.exists(self.audit_log_path):
+        self.flush()
+        report = LedgerVerifier(self.log.directory, workers=workers, watermark_path=self.watermark_path).run(full=full)
+        print(f"[IMMUDB] Ledger verification: {'OK' if report['ok'] else 'BROKEN at ' + str(report['first_broken_index'])} "
+              f"({report['entries']} {'new ' if report['incremental'] else ''}entries, {report['entries_per_second']:.0f} entries/s)")
+        return report
+
+    # --- Merkle Proofs ---------------------------------------------------
+
+    def tree_head(self) -> Dict[str, Any]:
+        """Signed tree head over every entry logged so far."""
+        self.flush()
+        return self.tree.tree_head()
+
+    def prove_inclusion(self, entry_hash: str) -> Optional[Dict[str, Any]]:
+        """Merkle audit path of an entry against the current signed tree head."""
+        try:
+            index = self.find_entry(entry_hash)
+            if index is None:
+                return None
+            head = self.tree.tree_head()
+            return {
+                "entry_hash": entry_hash,
+                "leaf_index": index,
+                "tree_size": head["tree_size"],
+                "audit_path": [node.hex() for node in self.tree.audit_path(index, head["tree_size"])],
+                "tree_head": head
+            }
+        except Exception as e:
+            print(f"[IMMUDB ERROR] Inclusion proof failed: {e}")
+            return None
+
+    def verify_inclusion(self, proof: Dict[str, Any]) -> bool:
+        """Checks an inclusion proof: path recomputes the root, and the tree head signature holds."""
+        try:
+            head = proof["tree_head"]
+            return self.tree.verify_tree_head(head) and verify_inclusion(
+                proof["leaf_index"], head["tree_size"], leaf_hash(bytes.fromhex(proof["entry_hash"])),
+                [bytes.fromhex(node) for node in proof["audit_path"]], bytes.fromhex(head["root_hash"])
+            )
+        except (KeyError, ValueError, TypeError):
             return False
-            
+
+    def prove_consistency(self, first_size: int, second_size: Optional[int] = None) -> Dict[str, Any]:
+        """Proof that the ledger at `first_size` entries is a prefix of the ledger at `second_size`."""
+        self.flush()
+        second_size = self.tree.size if second_size is None else second_size
+        return {
+            "first_size": first_size,
+            "second_size": second_size,
+            "first_root": self.tree.root(first_size).hex(),
+            "second_root": self.tree.root(second_size).hex(),
+            "proof": [node.hex() for node in self.tree.consistency_path(first_size, second_size)]
+        }
+
+    def inclusion_proof(self, target_hash: str) -> bool:
+        """
+        Mathematically confirms an action exists in the ledger via its Merkle audit path.
+        """
+        proof = self.prove_inclusion(target_hash)
+        return proof is not None and self.verify_inclusion(proof)
+
+    def consistency_proof(self, slice_start: int, slice_end: int) -> bool:
+        """
+        Ensures the log history is append-only between two indices: the tree holding
+        entries [0, slice_start] is a prefix of the tree holding entries [0, slice_end].
+        """
+        self.flush()
         try:
-            with open(self.audit_log_path, "r") as f:
-                lines = f.readlines()
-                if slice_end >= len(lines):
-                    slice_end = len(lines) - 1
-                
-                for i in range(max(1, slice_start), slice_end + 1):
-                    prev = json.loads(lines[i-1])
-                    curr = json.loads(lines[i])
-                    if curr.get("previous_hash") != prev.get("current_hash"):
-                        return False
-            return True
+            slice_end = min(slice_end, self.tree.size - 1)
+            first_size, second_size = max(slice_start, 0) + 1, slice_end + 1
+            if first_size > second_size:
+                return False
+            proof = self.prove_consistency(first_size, second_size)
+            return verify_consistency(
+                first_size, second_size, bytes.fromhex(proof["first_root"]), bytes.fromhex(proof["second_root"]),
+                [bytes.fromhex(node) for node in proof["proof"]]
+            )
         except Exception:
             return False
 
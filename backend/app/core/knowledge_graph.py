@@ -2,6 +2,7 @@ from typing import List, Dict, Any, Optional
 import json
 import os
 import asyncio
+import time
 import re
 from datetime import datetime
 from app.core.telemetry import Blackboard
@@ -12,7 +13,12 @@ class KnowledgeGraph:
     """
     A lightweight entity-relation mapping system for ShaconV2.
     Stores and retrieves structured context about the workspace.
+    Findings ingested from the Blackboard are saved in batches (every SAVE_EVERY findings
+    or SAVE_INTERVAL seconds, and when following stops) instead of once per finding.
     """
+    SAVE_EVERY = 25
+    SAVE_INTERVAL = 30.0
+
     def __init__(self, storage_path: Optional[str] = None):
         if storage_path is None:
             # Default to backend root regardless of CWD
@@ -22,34 +28,71 @@ class KnowledgeGraph:
         self.storage_path = storage_path
         self.entities = {} # entity_name -> metadata
         self.relations = [] # list of (entity_a, relation, entity_b)
+        self.blackboard_cursor = None # seq of the last Blackboard finding ingested
         self.blackboard = Blackboard()
+        self._unsaved_findings = 0
+        self._last_save = time.monotonic()
         self._load()
+        if self.blackboard_cursor is None:
+            # A new graph starts at the current post instead of extracting the whole ring
+            self.blackboard_cursor = self.blackboard.latest_seq()
+
+    async def follow_blackboard(self):
+        """
+        Ingests every new Blackboard finding as it is posted. The cursor is saved with the
+        graph, so a restart resumes after the last saved finding (findings ingested after
+        that batch are ingested again). The inbox holds as many findings as the ring, so its
+        backlog always fits; a finding it drops has already left the ring too, and is
+        reported as lost rather than re-read.
+        """
+        subscription = self.blackboard.subscribe(types=["finding"], since=self.blackboard_cursor,
+                                                 capacity=self.blackboard.findings.maxlen)
+        try:
+            async for finding in subscription:
+                if subscription.dropped_seqs:
+                    lost = list(subscription.dropped_seqs)
+                    subscription.dropped_seqs.clear()
+                    print(f"[KG] Extraction fell a full Blackboard ring behind: {len(lost)} findings "
+                          f"(seq {lost[0]}..{lost[-1]}) were dropped before ingestion.")
+                await self.ingest_finding(finding)
+        finally:
+            subscription.close()
+            self.flush()
 
     async def update_from_blackboard(self):
         """
-        Reads recent findings from the Blackboard and extracts structured knowledge.
+        Reads findings posted since the last sync from the Blackboard and extracts structured knowledge.
         """
-        findings = self.blackboard.get_recent_findings(limit=5)
+        findings = [f for f in self.blackboard.get_recent_findings(limit=self.blackboard.findings.maxlen)
+                    if f.get("seq", 0) > self.blackboard_cursor]
         if not findings:
             return
 
-        print(f"[KG] Syncing from {len(findings)} recent findings...")
+        print(f"[KG] Syncing from {len(findings)} new findings...")
         for finding in findings:
-            content = finding.get("content", "")
-            if not content:
-                continue
-            
+            await self.ingest_finding(finding)
+        self.flush()
+
+    async def ingest_finding(self, finding: Dict[str, Any]):
+        """Extracts entities and relations from one finding and advances the cursor (saved in batches)."""
+        content = finding.get("content", "")
+        if content:
             # Use LLM to extract entities and relations
             extracted = await self.extract_entities_from_text(content)
             print(f"[KG] Extracted {len(extracted.get('entities', []))} entities and {len(extracted.get('relations', []))} relations.")
-            
+
             for entity in extracted.get("entities", []):
                 print(f"[KG] Adding entity: {entity['name']}")
-                self.add_entity(entity["name"], entity.get("properties", {}))
-            
+                self.add_entity(entity["name"], entity.get("properties", {}), save=False)
+
             for rel in extracted.get("relations", []):
                 print(f"[KG] Adding relation: {rel['source']} {rel['relation']} {rel['target']}")
-                self.add_relation(rel["source"], rel["relation"], rel["target"])
+                self.add_relation(rel["source"], rel["relation"], rel["target"], save=False)
+
+        self.blackboard_cursor = max(self.blackboard_cursor, finding.get("seq", 0))
+        self._unsaved_findings += 1
+        if self._unsaved_findings >= self.SAVE_EVERY or time.monotonic() - self._last_save >= self.SAVE_INTERVAL:
+            self._save()
 
     async def extract_entities_from_text(self, text: str) -> Dict[str, Any]:
         """
@@ -127,21 +170,23 @@ class KnowledgeGraph:
 
         return {"entities": entities, "relations": relations}
 
-    def add_entity(self, name: str, properties: Dict[str, Any]):
+    def add_entity(self, name: str, properties: Dict[str, Any], save: bool = True):
         self.entities[name] = {
             **properties,
             "updated_at": datetime.utcnow().isoformat()
         }
-        self._save()
+        if save:
+            self._save()
 
-    def add_relation(self, source: str, relation: str, target: str):
+    def add_relation(self, source: str, relation: str, target: str, save: bool = True):
         self.relations.append({
             "source": source,
             "relation": relation,
             "target": target,
             "timestamp": datetime.utcnow().isoformat()
         })
-        self._save()
+        if save:
+            self._save()
 
     def query(self, entity_name: str) -> Dict[str, Any]:
         """Retrieve an entity and its connections."""
@@ -152,10 +197,20 @@ class KnowledgeGraph:
             "connections": connections
         }
 
+    def flush(self):
+        """Saves findings ingested since the last batch save, if any."""
+        if self._unsaved_findings:
+            self._save()
+
     def _save(self):
         try:
-            with open(self.storage_path, "w") as f:
-                json.dump({"entities": self.entities, "relations": self.relations}, f, indent=2)
+            tmp_path = self.storage_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"entities": self.entities, "relations": self.relations,
+                           "blackboard_cursor": self.blackboard_cursor}, f)
+            os.replace(tmp_path, self.storage_path)
+            self._unsaved_findings = 0
+            self._last_save = time.monotonic()
         except Exception as e:
             print(f"[KG] Save failed: {e}")
 
@@ -166,5 +221,6 @@ class KnowledgeGraph:
                     data = json.load(f)
                     self.entities = data.get("entities", {})
                     self.relations = data.get("relations", [])
+                    self.blackboard_cursor = data.get("blackboard_cursor")
             except Exception as e:
                 print(f"[KG] Load failed: {e}")
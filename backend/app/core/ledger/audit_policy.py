@@ -0,0 +1,84 @@
+"""
+Audit Policy - per-operation tiers for what reaches the chained ledger
+
+- chain:   every event is chained (the default; governance events never need listing)
+- sampled: a fraction of events is chained, tagged with its sample_rate; all are counted
+- metrics: nothing is chained per event; counts are folded into periodic AUDIT_METRICS entries
+
+Counters are labelled by a few low-cardinality detail keys (pathway, complexity,
+provider, ...), so the AUDIT_METRICS entries keep the totals the dropped entries carried.
+"""
+
+import time
+import random
+import threading
+from datetime import datetime
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+METRICS_OPERATION = "AUDIT_METRICS"
+
+
+class AuditPolicy:
+    """
+    Decides per log_operation call whether the entry is chained. Thread-safe; the
+    sidecar asks `due()` on each call and chains `drain()` as an AUDIT_METRICS entry.
+    """
+    TIERS = ("chain", "sampled", "metrics")
+
+    def __init__(self, tiers: Dict[str, str], sample_rates: Dict[str, float], default_sample_rate: float = 0.01,
+                 interval: float = 60.0, label_keys: Iterable[str] = ()):
+        for operation, tier in tiers.items():
+            if tier not in self.TIERS:
+                raise ValueError(f"Unknown audit tier '{tier}' for {operation} (expected one of {self.TIERS})")
+        self.tiers = dict(tiers)
+        self.sample_rates = dict(sample_rates)
+        self.default_sample_rate = default_sample_rate
+        self.interval = interval
+        self.label_keys = tuple(label_keys)
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Tuple], list] = {} # (operation, labels) -> [seen, chained]
+        self._window_start = datetime.utcnow()
+        self._next_flush = time.monotonic() + interval
+
+    def tier(self, operation: str) -> str:
+        return self.tiers.get(operation, "chain")
+
+    def _labels(self, details: Dict[str, Any]) -> Tuple:
+        return tuple((key, details[key]) for key in self.label_keys
+                     if isinstance(details.get(key), (str, int, float, bool)))
+
+    def admit(self, operation: str, details: Dict[str, Any]) -> Tuple[bool, Optional[float]]:
+        """(chain this entry?, sample rate to record on it if it was sampled)."""
+        tier = self.tier(operation)
+        if tier == "chain":
+            return True, None
+        rate = self.sample_rates.get(operation, self.default_sample_rate) if tier == "sampled" else 0.0
+        chained = rate > 0 and random.random() < rate
+        key = (operation, self._labels(details) if isinstance(details, dict) else ())
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None:
+                counter = self._counters[key] = [0, 0]
+            counter[0] += 1
+            counter[1] += chained
+        return chained, (rate if chained else None)
+
+    def due(self) -> bool:
+        return time.monotonic() >= self._next_flush
+
+    def drain(self) -> Optional[Dict[str, Any]]:
+        """Counters of the window that just ended (None when nothing was counted); starts a new window."""
+        with self._lock:
+            counters, self._counters = self._counters, {}
+            window_start, self._window_start = self._window_start, datetime.utcnow()
+            self._next_flush = time.monotonic() + self.interval
+        if not counters:
+            return None
+        return {
+            "window_start": window_start.isoformat(),
+            "window_end": self._window_start.isoformat(),
+            "counters": [
+                {"operation": operation, "tier": self.tier(operation), "labels": dict(labels), "count": seen, "chained": chained}
+                for (operation, labels), (seen, chained) in sorted(counters.items(), key=lambda item: (item[0][0], str(item[0][1])))
+            ]
+        }
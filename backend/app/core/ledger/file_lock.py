@@ -0,0 +1,65 @@
+"""
+File Lock - cross-process exclusive lock (msvcrt on Windows, fcntl elsewhere)
+"""
+
+import os
+import time
+import threading
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+class FileLock:
+    """
+    Exclusive advisory lock on a lock file, shared by every process writing the ledger
+    (uvicorn workers, ingestion, the dropzone watcher). Re-entrant within a thread is
+    not needed: only the audit writer thread takes it, once per group commit.
+    """
+    def __init__(self, path: str, poll_interval: float = 0.005):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._thread_lock = threading.Lock()
+        self._fd = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        try:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            if os.name == "nt":
+                # LK_LOCK gives up after ~10s; poll with the non-blocking variant instead
+                while True:
+                    try:
+                        os.lseek(fd, 0, os.SEEK_SET)
+                        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        time.sleep(self.poll_interval)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            self._fd = fd
+        except Exception:
+            self._thread_lock.release()
+            raise
+
+    def release(self):
+        fd, self._fd = self._fd, None
+        try:
+            if os.name == "nt":
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+        finally:
+            self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
@@ -0,0 +1,309 @@
+"""
+Merkle Ledger - RFC 6962 append-only Merkle tree over audit entry hashes
+
+Leaves are the entries' chain hashes (current_hash) in log order. Tree nodes are
+persisted one file per level, so inclusion and consistency proofs are computed
+from O(log n) stored node hashes without reading the audit log.
+"""
+
+import os
+import hmac
+import json
+import hashlib
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+HASH_SIZE = 32
+EMPTY_ROOT = hashlib.sha256(b"").digest()
+
+
+def leaf_hash(data: bytes) -> bytes:
+    return hashlib.sha256(b"\x00" + data).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def _split(n: int) -> int:
+    """Largest power of two strictly smaller than n (n > 1)."""
+    return 1 << ((n - 1).bit_length() - 1)
+
+
+def verify_inclusion(index: int, tree_size: int, leaf: bytes, path: List[bytes], root: bytes) -> bool:
+    """RFC 9162 2.1.3.2: recomputes the root from a leaf hash and its audit path."""
+    if index >= tree_size:
+        return False
+    fn, sn = index, tree_size - 1
+    r = leaf
+    for p in path:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            r = node_hash(p, r)
+            while not fn & 1 and fn != 0:
+                fn >>= 1
+                sn >>= 1
+        else:
+            r = node_hash(r, p)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and r == root
+
+
+def verify_consistency(first_size: int, second_size: int, first_root: bytes, second_root: bytes,
+                       proof: List[bytes]) -> bool:
+    """RFC 9162 2.1.4.2: checks that the first tree is a prefix of the second."""
+    if first_size > second_size:
+        return False
+    if first_size == second_size:
+        return not proof and first_root == second_root
+    if first_size == 0:
+        return not proof
+    if not proof:
+        return False
+    if first_size & (first_size - 1) == 0:
+        proof = [first_root] + proof
+    fn, sn = first_size - 1, second_size - 1
+    while fn & 1:
+        fn >>= 1
+        sn >>= 1
+    fr = sr = proof[0]
+    for c in proof[1:]:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            fr = node_hash(c, fr)
+            sr = node_hash(c, sr)
+            while not fn & 1 and fn != 0:
+                fn >>= 1
+                sn >>= 1
+        else:
+            sr = node_hash(sr, c)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and fr == first_root and sr == second_root
+
+
+class MerkleTree:
+    """
+    Append-only binary Merkle tree (RFC 6962 hashing) with persisted nodes.
+    Level k is a flat file of the hashes of the complete, aligned subtrees of 2^k
+    leaves (node i at byte 32*i), so appending a leaf writes at most log2(n) nodes and
+    any subtree hash is assembled from O(log n) reads.
+    Tree heads are signed with HMAC-SHA256 under a local key (LEDGER_SIGNING_KEY,
+    else a key generated next to the tree), and the latest one is kept in tree_head.json.
+    Single writer at a time (the audit writer thread, under the ledger file lock);
+    readers work on a size snapshot.
+    """
+    LEVEL_FILE = "level_{:02d}.bin"
+    HEAD_FILE = "tree_head.json"
+    KEY_FILE = "tree_head.key"
+
+    def __init__(self, directory: str, signing_key: Optional[bytes] = None):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._signing_key = signing_key or self._load_key()
+        self._read_lock = threading.Lock()
+        self._readers: Dict[int, Any] = {}
+        self._writers: Dict[int, Any] = {}
+        self._last: Dict[int, bytes] = {} # Last node of each level (left sibling of the next one)
+        self.size = 0
+        self._load()
+        if self.size:
+            print(f"[MERKLE] Ledger tree loaded ({self.size} leaves)")
+
+    # --- Persistence -----------------------------------------------------
+
+    def _path(self, level: int) -> str:
+        return os.path.join(self.directory, self.LEVEL_FILE.format(level))
+
+    def _load_key(self) -> bytes:
+        key = os.getenv("LEDGER_SIGNING_KEY")
+        if key:
+            return key.encode()
+        path = os.path.join(self.directory, self.KEY_FILE)
+        if not os.path.exists(path):
+            with open(path, "w") as f:
+                f.write(os.urandom(32).hex())
+        with open(path, "r") as f:
+            return f.read().strip().encode()
+
+    def _load(self):
+        """Restores the size and right edge; repairs upper levels torn by a crash mid-append."""
+        leaves = os.path.getsize(self._path(0)) // HASH_SIZE if os.path.exists(self._path(0)) else 0
+        with open(self._path(0), "ab") as f:
+            f.truncate(leaves * HASH_SIZE)
+        self.size = leaves
+        level = 0
+        while (leaves >> level) > 0:
+            expected = leaves >> level
+            path = self._path(level)
+            stored = os.path.getsize(path) // HASH_SIZE if os.path.exists(path) else 0
+            if stored > expected:
+                with open(path, "ab") as f:
+                    f.truncate(expected * HASH_SIZE)
+            elif stored < expected:
+                print(f"[MERKLE] Repairing level {level} ({expected - stored} nodes)")
+                with open(path, "ab") as f:
+                    f.truncate(stored * HASH_SIZE)
+                    for i in range(stored, expected):
+                        f.write(node_hash(self._node(level - 1, 2 * i), self._node(level - 1, 2 * i + 1)))
+            self._last[level] = self._node(level, expected - 1)
+            level += 1
+
+    def refresh(self):
+        """Reloads size and right edge after another process appended leaves (file lock held)."""
+        if os.path.getsize(self._path(0)) // HASH_SIZE == self.size:
+            return
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+        self._last.clear()
+        self._load()
+
+    def _node(self, level: int, index: int) -> bytes:
+        with self._read_lock:
+            reader = self._readers.get(level)
+            if reader is None:
+                reader = self._readers[level] = open(self._path(level), "rb", buffering=0)
+            reader.seek(index * HASH_SIZE)
+            node = reader.read(HASH_SIZE)
+        if len(node) != HASH_SIZE:
+            raise IndexError(f"Merkle node ({level}, {index}) not found")
+        return node
+
+    def _write_node(self, level: int, node: bytes):
+        writer = self._writers.get(level)
+        if writer is None:
+            writer = self._writers[level] = open(self._path(level), "ab")
+        writer.write(node)
+
+    # --- Append ----------------------------------------------------------
+
+    def append(self, entry_hashes: List[bytes]):
+        """Adds leaves (raw 32-byte entry hashes) and completes every parent they close."""
+        if not entry_hashes:
+            return
+        size = self.size
+        for data in entry_hashes:
+            node, level, index = leaf_hash(data), 0, size
+            while True:
+                self._write_node(level, node)
+                left = self._last.get(level)
+                self._last[level] = node
+                if index % 2 == 0:
+                    break
+                node, level, index = node_hash(left, node), level + 1, index // 2
+            size += 1
+        for writer in self._writers.values():
+            writer.flush()
+        # Published only once every node it covers is readable
+        self.size = size
+        self._save_head()
+
+    # --- Hashing ---------------------------------------------------------
+
+    def _subtree(self, start: int, end: int) -> bytes:
+        """MTH(D[start:end]); `start` is always aligned to the split of the enclosing range."""
+        n = end - start
+        if n & (n - 1) == 0 and start % n == 0:
+            return self._node(n.bit_length() - 1, start // n)
+        k = _split(n)
+        return node_hash(self._subtree(start, start + k), self._subtree(start + k, end))
+
+    def root(self, size: Optional[int] = None) -> bytes:
+        size = self.size if size is None else size
+        return self._subtree(0, size) if size else EMPTY_ROOT
+
+    def leaf(self, index: int) -> bytes:
+        return self._node(0, index)
+
+    def iter_leaves(self, start: int = 0, chunk: int = 65536):
+        """Leaf hashes in order (sequential read of the leaf level)."""
+        size = self.size
+        with open(self._path(0), "rb") as f:
+            f.seek(start * HASH_SIZE)
+            index = start
+            while index < size:
+                data = f.read(HASH_SIZE * min(chunk, size - index))
+                if not data:
+                    break
+                for offset in range(0, len(data), HASH_SIZE):
+                    yield data[offset:offset + HASH_SIZE]
+                index += len(data) // HASH_SIZE
+
+    # --- Proofs ----------------------------------------------------------
+
+    def audit_path(self, index: int, size: Optional[int] = None) -> List[bytes]:
+        """RFC 6962 PATH(index, D[0:size]), leaf to root."""
+        size = self.size if size is None else size
+        if not 0 <= index < size:
+            raise IndexError(f"Leaf {index} is outside a tree of size {size}")
+        path = []
+        start, end = 0, size
+        while end - start > 1:
+            k = _split(end - start)
+            if index < start + k:
+                path.append(self._subtree(start + k, end))
+                end = start + k
+            else:
+                path.append(self._subtree(start, start + k))
+                start += k
+        return path[::-1]
+
+    def consistency_path(self, first_size: int, second_size: Optional[int] = None) -> List[bytes]:
+        """RFC 6962 PROOF(first_size, D[0:second_size])."""
+        second_size = self.size if second_size is None else second_size
+        if not 0 <= first_size <= second_size <= self.size:
+            raise IndexError(f"Invalid consistency range {first_size}..{second_size} (tree size {self.size})")
+        if first_size in (0, second_size):
+            return []
+        proof = []
+        m, start, end, complete = first_size, 0, second_size, True
+        while m != end:
+            k = _split(end - start)
+            if m - start <= k:
+                proof.append(self._subtree(start + k, end))
+                end = start + k
+            else:
+                proof.append(self._subtree(start, start + k))
+                start += k
+                complete = False
+        if not complete:
+            proof.append(self._subtree(start, end))
+        return proof[::-1]
+
+    # --- Signed Tree Head ------------------------------------------------
+
+    def _sign(self, head: Dict[str, Any]) -> str:
+        body = json.dumps({k: head[k] for k in ("tree_size", "root_hash", "timestamp")}, sort_keys=True)
+        return hmac.new(self._signing_key, body.encode(), hashlib.sha256).hexdigest()
+
+    def tree_head(self, size: Optional[int] = None) -> Dict[str, Any]:
+        size = self.size if size is None else size
+        head = {"tree_size": size, "root_hash": self.root(size).hex(), "timestamp": datetime.utcnow().isoformat()}
+        head["signature"] = self._sign(head)
+        return head
+
+    def verify_tree_head(self, head: Dict[str, Any]) -> bool:
+        try:
+            return hmac.compare_digest(head["signature"], self._sign(head))
+        except (KeyError, TypeError):
+            return False
+
+    def _save_head(self):
+        path = os.path.join(self.directory, self.HEAD_FILE)
+        try:
+            with open(path + ".tmp", "w") as f:
+                json.dump(self.tree_head(), f)
+            os.replace(path + ".tmp", path)
+        except Exception as e:
+            print(f"[MERKLE] Tree head persistence failed: {e}")
+
+    def close(self):
+        for handle in list(self._writers.values()) + list(self._readers.values()):
+            handle.close()
+        self._writers.clear()
+        self._readers.clear()
@@ -0,0 +1,290 @@
+"""
+Offset Index - O(1) positional and hash lookups into the audit log
+
+OffsetIndex persists entry number -> byte offset next to a JSONL log (one per
+ledger segment), so tail queries and lookups by sequence number seek straight
+to the bytes they need.
+HashIndex maps entry hashes to sequence numbers in RAM, persisted as a sorted run
+plus an append-only tail so startup loads it instead of re-sorting every leaf.
+"""
+
+import os
+import bisect
+import struct
+import threading
+from array import array
+from itertools import islice
+from typing import Callable, Iterable, List, Optional
+
+
+def tail_lines(path: str, limit: int, block_size: int = 65536) -> List[bytes]:
+    """Last `limit` non-empty lines of a file, newest first, reading backwards in blocks."""
+    lines: List[bytes] = []
+    if limit <= 0 or not os.path.exists(path):
+        return lines
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b""
+        while position > 0 and len(lines) < limit:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            parts = (f.read(step) + remainder).split(b"\n")
+            # The first part may be cut mid-line unless we reached the start of the file
+            remainder = parts.pop(0) if position > 0 else b""
+            for line in reversed(parts):
+                if line.strip():
+                    lines.append(line)
+                    if len(lines) >= limit:
+                        break
+    return lines
+
+
+class OffsetIndex:
+    """
+    Byte offset of every entry of a JSONL log, as little-endian uint64 records in
+    `<log>.idx` (entry n at byte 8*n). Appended by the single log writer after each
+    batch; `sync` catches up with entries written without it (first run, crash).
+    """
+    RECORD = struct.Struct("<Q")
+
+    def __init__(self, log_path: str):
+        self.log_path = log_path
+        self.path = log_path + ".idx"
+        self._read_lock = threading.Lock()
+        self._reader = None
+        self._writer = None
+        self.count = os.path.getsize(self.path) // self.RECORD.size if os.path.exists(self.path) else 0
+
+    def offset(self, seq: int) -> int:
+        if not 0 <= seq < self.count:
+            raise IndexError(f"Entry {seq} is outside the index ({self.count} entries)")
+        with self._read_lock:
+            if self._reader is None:
+                self._reader = open(self.path, "rb", buffering=0)
+            self._reader.seek(seq * self.RECORD.size)
+            return self.RECORD.unpack(self._reader.read(self.RECORD.size))[0]
+
+    def append(self, offsets: List[int]):
+        if not offsets:
+            return
+        if self._writer is None:
+            self._writer = open(self.path, "ab")
+        self._writer.write(b"".join(self.RECORD.pack(offset) for offset in offsets))
+        self._writer.flush()
+        self.count += len(offsets)
+
+    def sync(self, start: int = 0, opener=None) -> int:
+        """
+        Indexes log entries past the last indexed one; returns how many were added.
+        `start` is where entries begin in an unindexed log (after a header line);
+        `opener` returns a binary reader for logs that are not plain files (compressed).
+        """
+        plain = opener is None
+        if plain and not os.path.exists(self.log_path):
+            return 0
+        if plain:
+            # Drop offsets past the end of the log (log replaced or truncated)
+            log_size = os.path.getsize(self.log_path)
+            while self.count and self.offset(self.count - 1) >= log_size:
+                self._truncate(self.count - 1)
+
+        with (open(self.log_path, "rb") if plain else opener()) as f:
+            if self.count:
+                f.seek(self.offset(self.count - 1))
+                position = f.tell() + len(f.readline()) # Skip the last indexed entry
+            else:
+                f.seek(start)
+                position = start
+            offsets = []
+            for line in iter(f.readline, b""):
+                if line.endswith(b"\n") and line.strip():
+                    offsets.append(position)
+                position += len(line)
+        self.append(offsets)
+        if offsets:
+            print(f"[LEDGER] Offset index caught up ({len(offsets)} entries, {self.count} total)")
+        return len(offsets)
+
+    def refresh(self) -> bool:
+        """Re-reads the entry count (another process may have appended); True if it changed."""
+        count = os.path.getsize(self.path) // self.RECORD.size if os.path.exists(self.path) else 0
+        changed, self.count = count != self.count, count
+        return changed
+
+    def _truncate(self, count: int):
+        self.close()
+        with open(self.path, "ab") as f:
+            f.truncate(count * self.RECORD.size)
+        self.count = count
+
+    def close(self):
+        for handle in (self._reader, self._writer):
+            if handle is not None:
+                handle.close()
+        self._reader = self._writer = None
+
+
+class HashIndex:
+    """
+    32-byte key -> sequence number, in RAM at ~16 bytes per entry: 8-byte key prefixes
+    in sorted typed arrays (binary search) plus a dict of entries added since the last
+    merge, which runs once the dict outgrows an eighth of the sorted part. Lookups
+    return candidate sequence numbers; the caller confirms the full key (prefix
+    collisions are possible, just vanishingly rare).
+
+    With a `path`, the sorted part is saved there at every merge (entry count, then
+    both arrays) and each added prefix is appended to `<path>.log`, whose header is
+    the seq of its first record, so `open` loads both instead of rebuilding. Writers
+    in several processes must add under one lock (the ledger file lock): appends skip
+    records another process already wrote.
+    """
+    MIN_MERGE = 65536
+    RECORD = struct.Struct("<Q")
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.log_path = path + ".log" if path else None
+        self._lock = threading.Lock()
+        self._prefixes = array("Q")
+        self._seqs = array("q")
+        self._recent = {}
+        self._recent_count = 0
+        self.count = 0
+
+    @staticmethod
+    def _prefix(key: bytes) -> int:
+        return int.from_bytes(key[:8], "little")
+
+    @classmethod
+    def build(cls, keys: Iterable[bytes], path: Optional[str] = None) -> "HashIndex":
+        """Bulk load (startup): one sort instead of repeated merges."""
+        index = cls(path)
+        prefixes = array("Q", (cls._prefix(key) for key in keys))
+        order = sorted(range(len(prefixes)), key=prefixes.__getitem__)
+        index._prefixes = array("Q", (prefixes[i] for i in order))
+        index._seqs = array("q", order)
+        index.count = len(prefixes)
+        index._persist(index._save)
+        return index
+
+    @classmethod
+    def open(cls, path: str, size: int, leaves: Callable[[int], Iterable[bytes]]) -> "HashIndex":
+        """
+        Loads the persisted index and brings it to `size` entries with the keys
+        `leaves(start)` yields from entry `start` on (rebuilt whole if unreadable).
+        """
+        index = cls(path)
+        try:
+            index._load()
+        except (OSError, ValueError) as e:
+            print(f"[LEDGER] Hash index unreadable, rebuilding: {e}")
+            index = cls(path)
+        if index.count > size:
+            print(f"[LEDGER] Hash index has {index.count} entries for {size} leaves, rebuilding")
+            index = cls(path)
+        if index.count == 0 and size:
+            return cls.build(islice(leaves(0), size), path)
+        if index.count < size:
+            index.add(islice(leaves(index.count), size - index.count))
+        return index
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            count = self.RECORD.unpack(f.read(self.RECORD.size))[0]
+            self._prefixes.fromfile(f, count)
+            self._seqs.fromfile(f, count)
+        self.count = count
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, "rb") as f:
+            header = f.read(self.RECORD.size)
+            if len(header) < self.RECORD.size or self.RECORD.unpack(header)[0] != count:
+                return # Left over from before the last save; the caller catches up from the leaves
+            data = f.read()
+        tail = array("Q")
+        tail.frombytes(data[:len(data) - len(data) % self.RECORD.size])
+        for prefix in tail:
+            self._recent.setdefault(prefix, []).append(self.count)
+            self._recent_count += 1
+            self.count += 1
+
+    def _save(self):
+        """Writes the sorted part (merged state) and restarts the tail log after it."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.RECORD.pack(len(self._prefixes)))
+            self._prefixes.tofile(f)
+            self._seqs.tofile(f)
+        os.replace(tmp_path, self.path)
+        with open(self.log_path, "wb") as f:
+            f.write(self.RECORD.pack(len(self._prefixes)))
+
+    def _append_log(self, first_seq: int, prefixes: List[int]):
+        """Appends the prefixes of entries first_seq.. past what the tail log already holds."""
+        if not os.path.exists(self.log_path):
+            return # The next merge saves everything
+        with open(self.log_path, "r+b") as f:
+            header = f.read(self.RECORD.size)
+            if len(header) < self.RECORD.size:
+                return
+            start = self.RECORD.unpack(header)[0]
+            persisted = start + (f.seek(0, os.SEEK_END) - self.RECORD.size) // self.RECORD.size
+            if persisted < first_seq:
+                return # A gap (earlier write failed): the next merge or startup fills it in
+            f.seek(self.RECORD.size * (1 + persisted - start))
+            f.truncate() # Torn last record
+            f.write(array("Q", prefixes[persisted - first_seq:]).tobytes())
+
+    def add(self, keys: Iterable[bytes]):
+        """Keys of consecutive entries, starting at the current count."""
+        with self._lock:
+            first_seq = self.count
+            prefixes = [self._prefix(key) for key in keys]
+            for prefix in prefixes:
+                self._recent.setdefault(prefix, []).append(self.count)
+                self._recent_count += 1
+                self.count += 1
+            if self._recent_count >= max(self.MIN_MERGE, len(self._prefixes) // 8):
+                self._merge()
+                self._persist(self._save)
+            elif prefixes:
+                self._persist(lambda: self._append_log(first_seq, prefixes))
+
+    def _persist(self, write: Callable[[], None]):
+        # The index stays correct in RAM; a lagging file is caught up at the next startup
+        if self.path is None:
+            return
+        try:
+            write()
+        except OSError as e:
+            print(f"[LEDGER] Hash index persistence failed: {e}")
+
+    def _merge(self):
+        pairs = sorted(
+            list(zip(self._prefixes, self._seqs))
+            + [(prefix, seq) for prefix, seqs in self._recent.items() for seq in seqs]
+        )
+        self._prefixes = array("Q", (prefix for prefix, _ in pairs))
+        self._seqs = array("q", (seq for _, seq in pairs))
+        self._recent = {}
+        self._recent_count = 0
+
+    def candidates(self, key: bytes) -> List[int]:
+        prefix = self._prefix(key)
+        with self._lock:
+            found = list(self._recent.get(prefix, ()))
+            lo = bisect.bisect_left(self._prefixes, prefix)
+            hi = bisect.bisect_right(self._prefixes, prefix, lo)
+            found.extend(self._seqs[lo:hi])
+        return found
+
+    def lookup(self, key: bytes, confirm) -> Optional[int]:
+        """First candidate for which `confirm(seq)` holds."""
+        for seq in sorted(self.candidates(key)):
+            if confirm(seq):
+                return seq
+        return None
@@ -0,0 +1,138 @@
+"""
+Query Index - SQLite secondary index over the audit ledger
+
+The chain stays the source of truth; this is a derived, rebuildable lookup table
+(governance/ledger/audit_index.sqlite) mapping operation, actor, timestamp and a
+configured set of detail keys (task_id, complexity, provider, ...) to sequence
+numbers. Entries themselves are read back from the segments.
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, Iterable, Optional, Tuple, Union
+
+TimeBound = Optional[Union[str, datetime]]
+
+
+class QueryIndex:
+    """
+    One row per entry plus one row per indexed detail key. WAL mode, so readers in
+    other processes never block the audit writer. Updated by the writer thread after
+    each group commit; `count` is the next sequence number it expects.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            seq INTEGER PRIMARY KEY,
+            timestamp TEXT NOT NULL,
+            actor TEXT NOT NULL,
+            operation TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_entries_operation ON entries (operation, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_entries_actor ON entries (actor, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_entries_timestamp ON entries (timestamp);
+        CREATE TABLE IF NOT EXISTS entry_details (
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            PRIMARY KEY (key, value, seq)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path: str, detail_keys: Iterable[str]):
+        self.path = path
+        self.detail_keys = tuple(detail_keys)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL") # Rebuildable from the log; no fsync per batch
+        self.conn.executescript(self.SCHEMA)
+
+    @staticmethod
+    def _value(value: Any) -> str:
+        """Detail values are stored as text: strings as-is, everything else as JSON."""
+        return value if isinstance(value, str) else json.dumps(value)
+
+    @staticmethod
+    def _bound(value: TimeBound) -> Optional[str]:
+        return value.isoformat() if isinstance(value, datetime) else value
+
+    @property
+    def count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COALESCE(MAX(seq) + 1, 0) FROM entries").fetchone()[0]
+
+    def add(self, first_seq: int, entries: List[Dict[str, Any]]):
+        """Indexes entries first_seq, first_seq + 1, ... (idempotent)."""
+        rows, details = [], []
+        for seq, entry in enumerate(entries, first_seq):
+            rows.append((seq, entry.get("timestamp", ""), entry.get("actor", ""), entry.get("operation", "")))
+            entry_details = entry.get("details")
+            if isinstance(entry_details, dict):
+                for key in self.detail_keys:
+                    value = entry_details.get(key)
+                    if value is not None and not isinstance(value, (dict, list)):
+                        details.append((key, self._value(value), seq))
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany("INSERT OR IGNORE INTO entries VALUES (?, ?, ?, ?)", rows)
+                self.conn.executemany("INSERT OR IGNORE INTO entry_details VALUES (?, ?, ?)", details)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def _conditions(self, operation, actor, since, until, details) -> Tuple[List[str], List[Any]]:
+        clauses, params = [], []
+        if operation is not None:
+            clauses.append("operation = ?")
+            params.append(operation)
+        if actor is not None:
+            clauses.append("actor = ?")
+            params.append(actor)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(self._bound(since))
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(self._bound(until))
+        for key, value in (details or {}).items():
+            clauses.append("seq IN (SELECT seq FROM entry_details WHERE key = ? AND value = ?)")
+            params.extend([key, self._value(value)])
+        return clauses, params
+
+    def query(self, operation: Optional[str] = None, actor: Optional[str] = None, since: TimeBound = None,
+              until: TimeBound = None, details: Optional[Dict[str, Any]] = None, limit: Optional[int] = 100,
+              newest_first: bool = True) -> List[int]:
+        """Sequence numbers of matching entries. Timestamps are UTC ISO strings, so ranges compare as text."""
+        clauses, params = self._conditions(operation, actor, since, until, details)
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        sql = f"SELECT seq FROM entries{where} ORDER BY seq {'DESC' if newest_first else 'ASC'}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return [row[0] for row in self.conn.execute(sql, params)]
+
+    def group_counts(self, key: str, operation: Optional[str] = None, since: TimeBound = None,
+                     until: TimeBound = None) -> Dict[str, int]:
+        """Entry counts per value of an indexed detail key, e.g. TRIAGE_COMPLETE by complexity."""
+        clauses, params = self._conditions(operation, None, since, until, None)
+        sql = (f"SELECT d.value, COUNT(*) FROM entry_details d JOIN entries e ON e.seq = d.seq"
+               f" WHERE {' AND '.join(['d.key = ?'] + clauses)} GROUP BY d.value")
+        with self._lock:
+            return {value: count for value, count in self.conn.execute(sql, [key] + params)}
+
+    def reset(self):
+        """Drops every row (before a rebuild from the log)."""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.execute("DELETE FROM entries")
+            self.conn.execute("DELETE FROM entry_details")
+            self.conn.execute("COMMIT")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,424 @@
+"""
+Segmented Log - fixed-size, rotated audit log segments
+
+The ledger is a sequence of segment files. Each one starts with a header line
+carrying the previous segment's final hash and entry count, so any segment can be
+verified (or archived) on its own. Once the active segment passes its size limit it
+is sealed, optionally compressed, and a new one is started.
+"""
+
+import os
+import re
+import json
+import gzip
+import bisect
+import shutil
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+from app.core.ledger.offset_index import OffsetIndex, tail_lines
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GENESIS_HASH = "0" * 64
+
+
+def open_segment(path: str):
+    """Binary reader over a segment file's uncompressed contents (forward seeks only when compressed)."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".zst"):
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    return open(path, "rb")
+
+
+def _process_alive(pid: int) -> bool:
+    """Best effort: False once `pid` has exited (stale temp files are then safe to remove)."""
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        # os.kill would terminate it; there a file still open by its writer cannot be removed anyway
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True # Exists but belongs to another user
+    return True
+
+
+def segment_files(directory: str) -> Dict[int, str]:
+    """Segment number -> file path (the compressed file wins while both exist). Read-only."""
+    files: Dict[int, str] = {}
+    if not os.path.isdir(directory):
+        return files
+    for name in sorted(os.listdir(directory)):
+        match = SegmentedLog.PATTERN.match(name)
+        if match is None:
+            continue
+        number = int(match.group(1))
+        if number not in files or match.group(2):
+            files[number] = os.path.join(directory, name)
+    return files
+
+
+class Segment:
+    """One segment file: a header line, then one chained entry per line."""
+    def __init__(self, directory: str, number: int, header: Dict[str, Any], path: str, header_size: int):
+        self.number = number
+        self.header = header
+        self.path = path # Plain file while active, possibly compressed once sealed
+        self.plain_path = os.path.join(directory, SegmentedLog.NAME.format(number))
+        self.header_size = header_size
+        self.first_seq = header["first_seq"]
+        self.index = OffsetIndex(self.plain_path)
+
+    @property
+    def count(self) -> int:
+        return self.index.count
+
+    @property
+    def compressed(self) -> bool:
+        return self.path != self.plain_path
+
+    def open_reader(self):
+        if not os.path.exists(self.path):
+            # Compressed by another process since we looked
+            for suffix in SegmentedLog.SUFFIXES.values():
+                if suffix and os.path.exists(self.plain_path + suffix):
+                    self.path = self.plain_path + suffix
+        return open_segment(self.path)
+
+    def read_lines(self, start: int, limit: Optional[int] = None) -> List[bytes]:
+        """Entries [start, start + limit) of this segment."""
+        end = self.count if limit is None else min(self.count, start + limit)
+        if start >= end:
+            return []
+        with self.open_reader() as f:
+            f.seek(self.index.offset(start))
+            lines = []
+            while len(lines) < end - start:
+                line = f.readline()
+                if not line:
+                    break
+                if line.strip():
+                    lines.append(line)
+        return lines
+
+
+class SegmentedLog:
+    """
+    Append-only JSONL ledger split into segments of ~`max_bytes` (segment-000001.log, ...).
+    - Header: {"segment", "first_seq", "previous_hash", "previous_entries", "created_at"}.
+    - Each segment has its own offset index; seq -> segment is a binary search.
+    - Sealed segments are compressed in the background when `compression` is gzip or
+      zstd (zstd needs the optional zstandard package, else gzip is used).
+    - Startup reads only the active segment's tail; sealed segments are opened on demand.
+    Single writer: append() is only called from the audit writer thread.
+    """
+    NAME = "segment-{:06d}.log"
+    PATTERN = re.compile(r"^segment-(\d{6})\.log(\.gz|\.zst)?$")
+    TMP_PATTERN = re.compile(r"^segment-\d{6}\.log\.(?:gz|zst)\.(\d+)\.tmp$") # {target}.{pid}.tmp
+    SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+    def __init__(self, directory: str, max_bytes: int, compression: str = "none"):
+        if compression not in self.SUFFIXES:
+            raise ValueError(f"Unknown segment compression '{compression}' (expected one of {list(self.SUFFIXES)})")
+        if compression == "zstd" and zstandard is None:
+            print("[LEDGER] zstandard not installed, sealing segments with gzip")
+            compression = "gzip"
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.compression = compression
+        os.makedirs(directory, exist_ok=True)
+
+        self.segments: List[Segment] = []
+        self._lock = threading.Lock()
+        self._file = None
+        self._tip: Optional[str] = None # Cached hash of the newest entry
+        self._load()
+
+    # --- Layout ----------------------------------------------------------
+
+    def _read_header(self, path: str) -> Tuple[Dict[str, Any], int]:
+        with open_segment(path) as f:
+            line = f.readline()
+        return json.loads(line), len(line)
+
+    def _load(self):
+        for name in os.listdir(self.directory):
+            match = self.PATTERN.match(name)
+            tmp_match = self.TMP_PATTERN.match(name)
+            if tmp_match is not None and not _process_alive(int(tmp_match.group(1))):
+                # Interrupted compression (a live process's in-progress file is left alone)
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+            elif match is not None and match.group(2):
+                plain_path = os.path.join(self.directory, self.NAME.format(int(match.group(1))))
+                if os.path.exists(plain_path):
+                    os.remove(plain_path) # Compression finished but the plain file was not removed yet
+
+        files = segment_files(self.directory)
+        for number in sorted(files):
+            try:
+                header, header_size = self._read_header(files[number])
+            except Exception as e:
+                print(f"[LEDGER ERROR] Unreadable segment header {files[number]}: {e}")
+                continue
+            self.segments.append(Segment(self.directory, number, header, files[number], header_size))
+
+        if not self.segments:
+            self._create_segment(1, first_seq=0, previous_hash=GENESIS_HASH, previous_entries=0)
+            return
+
+        for segment in self.segments[:-1]:
+            if segment.count == 0:
+                segment.index.sync(segment.header_size, segment.open_reader)
+        active = self.active
+        if active.compressed:
+            # Sealed before its successor was created
+            self._create_segment(active.number + 1, active.first_seq + active.count,
+                                 self._last_hash_of(active), active.count)
+        else:
+            active.index.sync(active.header_size)
+        for segment in self.segments[:-1]:
+            if not segment.compressed and self.compression != "none":
+                self._seal_async(segment)
+        print(f"[LEDGER] {len(self.segments)} segment(s), {self.count} entries (active: segment {self.active.number})")
+
+    def _create_segment(self, number: int, first_seq: int, previous_hash: str, previous_entries: int):
+        header = {
+            "segment": number,
+            "first_seq": first_seq,
+            "previous_hash": previous_hash,
+            "previous_entries": previous_entries,
+            "created_at": datetime.utcnow().isoformat()
+        }
+        line = (json.dumps(header) + "\n").encode("utf-8")
+        path = os.path.join(self.directory, self.NAME.format(number))
+        with open(path, "wb") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        with self._lock:
+            self.segments.append(Segment(self.directory, number, header, path, len(line)))
+
+    @property
+    def active(self) -> Segment:
+        return self.segments[-1]
+
+    @property
+    def count(self) -> int:
+        active = self.active
+        return active.first_seq + active.count
+
+    def _last_hash_of(self, segment: Segment) -> str:
+        if segment.count == 0:
+            return segment.header["previous_hash"]
+        return json.loads(segment.read_lines(segment.count - 1, 1)[0])["current_hash"]
+
+    def last_hash(self) -> str:
+        """Hash of the newest entry (reads only the end of the active segment, then cached)."""
+        if self._tip is None:
+            active = self.active
+            if active.count == 0:
+                self._tip = active.header["previous_hash"]
+            else:
+                self._tip = json.loads(tail_lines(active.path, 1)[0])["current_hash"]
+        return self._tip
+
+    def _existing_path(self, number: int) -> Optional[str]:
+        plain_path = os.path.join(self.directory, self.NAME.format(number))
+        for suffix in self.SUFFIXES.values():
+            if os.path.exists(plain_path + suffix):
+                return plain_path + suffix
+        return None
+
+    def refresh(self) -> bool:
+        """
+        Picks up entries and segments appended by other processes since our last write
+        (caller holds the cross-process lock). Returns True if anything changed.
+        """
+        changed = False
+        next_path = self._existing_path(self.active.number + 1)
+        while next_path is not None:
+            self.close_file()
+            self.active.index.refresh()
+            try:
+                header, header_size = self._read_header(next_path)
+            except FileNotFoundError:
+                # Compressed (and the plain file removed) between the lookup and the open
+                next_path = self._existing_path(self.active.number + 1)
+                continue
+            with self._lock:
+                self.segments.append(Segment(self.directory, header["segment"], header, next_path, header_size))
+            next_path = self._existing_path(self.active.number + 1)
+            changed = True
+        if self.active.index.refresh():
+            changed = True
+        if changed:
+            self._tip = None
+        return changed
+
+    # --- Append ----------------------------------------------------------
+
+    def append(self, entries: List[Tuple[str, str]], fsync_policy: str = "batch"):
+        """Writes (entry_hash, line) pairs to the active segment; rolls over when it is full."""
+        active = self.active
+        if self._file is None:
+            self._file = open(active.plain_path, "ab")
+        encoded = [line.encode("utf-8") for _, line in entries]
+        # Real end of file: other processes may have appended through their own handles
+        offsets, position = [], os.fstat(self._file.fileno()).st_size
+        for data in encoded:
+            offsets.append(position)
+            position += len(data)
+        if fsync_policy == "always":
+            for data in encoded:
+                self._file.write(data)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+        else:
+            self._file.write(b"".join(encoded))
+            self._file.flush()
+            if fsync_policy == "batch":
+                os.fsync(self._file.fileno())
+        active.index.append(offsets)
+        self._tip = entries[-1][0]
+
+        if position >= self.max_bytes:
+            self._roll(entries[-1][0])
+
+    def _roll(self, last_hash: str):
+        sealed = self.active
+        self.close_file()
+        self._create_segment(sealed.number + 1, sealed.first_seq + sealed.count, last_hash, sealed.count)
+        print(f"[LEDGER] Sealed segment {sealed.number} ({sealed.count} entries)")
+        if self.compression != "none":
+            self._seal_async(sealed)
+
+    def _seal_async(self, segment: Segment):
+        threading.Thread(target=self._compress, args=(segment,), name=f"ledger-seal-{segment.number}",
+                         daemon=True).start()
+
+    def _compress(self, segment: Segment):
+        target = segment.plain_path + self.SUFFIXES[self.compression]
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        try:
+            with open(segment.plain_path, "rb") as src, open(tmp_path, "wb") as raw:
+                if self.compression == "zstd":
+                    with zstandard.ZstdCompressor(level=10).stream_writer(raw, closefd=False) as dst:
+                        shutil.copyfileobj(src, dst, 1 << 20)
+                else:
+                    with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) as dst:
+                        shutil.copyfileobj(src, dst, 1 << 20)
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.replace(tmp_path, target)
+        except Exception as e:
+            # Readers keep using the plain file; retried on next start
+            print(f"[LEDGER ERROR] Compression of segment {segment.number} failed: {e}")
+            return
+        with self._lock:
+            segment.path = target
+        try:
+            os.remove(segment.plain_path)
+        except OSError:
+            pass # Still open by a reader (Windows); removed on next start
+        print(f"[LEDGER] Compressed segment {segment.number} ({os.path.getsize(target) // 1024} KB)")
+
+    def close_file(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except Exception:
+                pass
+            self._file = None
+
+    def close(self):
+        self.close_file()
+        for segment in self.segments:
+            segment.index.close()
+
+    # --- Reads -----------------------------------------------------------
+
+    def locate(self, seq: int) -> Optional[Segment]:
+        """Segment holding entry `seq` (None if out of range or archived away)."""
+        with self._lock:
+            segments = list(self.segments)
+        position = bisect.bisect_right([s.first_seq for s in segments], seq) - 1
+        if position < 0:
+            return None
+        segment = segments[position]
+        return segment if seq < segment.first_seq + segment.count else None
+
+    def read_entry(self, seq: int) -> Optional[Dict[str, Any]]:
+        segment = self.locate(seq)
+        if segment is None:
+            return None
+        return json.loads(segment.read_lines(seq - segment.first_seq, 1)[0])
+
+    def read_entries(self, seqs: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Several entries by sequence number: one forward pass per segment (compressed ones included)."""
+        by_segment: Dict[int, Tuple[Segment, List[int]]] = {}
+        for seq in sorted(set(seqs)):
+            segment = self.locate(seq)
+            if segment is not None:
+                by_segment.setdefault(segment.number, (segment, []))[1].append(seq)
+        found = {}
+        for segment, wanted in by_segment.values():
+            with segment.open_reader() as f:
+                for seq in wanted:
+                    f.seek(segment.index.offset(seq - segment.first_seq))
+                    found[seq] = json.loads(f.readline())
+        return found
+
+    def iter_lines(self, start_seq: int = 0) -> Iterator[bytes]:
+        """Raw entry lines from `start_seq` to the end, one segment at a time."""
+        with self._lock:
+            segments = list(self.segments)
+        for segment in segments:
+            end = segment.first_seq + segment.count
+            if end <= start_seq or segment.count == 0:
+                continue
+            first = max(start_seq - segment.first_seq, 0)
+            with segment.open_reader() as f:
+                f.seek(segment.index.offset(first))
+                remaining = segment.count - first
+                while remaining > 0:
+                    line = f.readline()
+                    if not line:
+                        break
+                    if line.strip():
+                        remaining -= 1
+                        yield line
+
+    def tail(self, limit: int) -> List[bytes]:
+        """Newest `limit` entry lines, newest first, touching only the segments needed."""
+        with self._lock:
+            segments = list(self.segments)
+        lines: List[bytes] = []
+        for segment in reversed(segments):
+            if len(lines) >= limit:
+                break
+            n = min(limit - len(lines), segment.count)
+            if n:
+                lines.extend(reversed(segment.read_lines(segment.count - n, n)))
+        return lines
+
+    def segment_info(self) -> List[Dict[str, Any]]:
+        return [{
+            "segment": s.number,
+            "first_seq": s.first_seq,
+            "entries": s.count,
+            "previous_hash": s.header["previous_hash"],
+            "path": os.path.basename(s.path),
+            "compressed": s.compressed
+        } for s in self.segments]
@@ -0,0 +1,249 @@
+"""
+Ledger Verifier - parallel full-chain verification of the segmented audit log
+
+Every entry is checked twice: its previous_hash must be the hash of the entry
+before it, and its current_hash must be the SHA-256 of its canonical body
+(json.dumps(sort_keys=True) without current_hash). Segments (or byte ranges of
+large plain segments) are verified in a process pool; the boundaries between
+chunks and the segment headers are stitched together afterwards.
+
+A successful run persists a verified watermark (entry index, hash, segment, byte
+offset); the next run resumes there and only checks entries appended since, unless
+a full pass is requested.
+"""
+
+import os
+import json
+import time
+import hashlib
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
+from app.core.ledger.segments import GENESIS_HASH, open_segment, segment_files
+
+
+def _resolve(path: str) -> str:
+    """A plain segment may have been sealed and compressed since the plan was made."""
+    if not os.path.exists(path):
+        for suffix in (".gz", ".zst"):
+            if os.path.exists(path + suffix):
+                return path + suffix
+    return path
+
+
+def _verify_chunk(path: str, start: int, end: Optional[int], has_header: bool) -> Dict[str, Any]:
+    """
+    Worker: verifies the entries whose line starts in [start, end) of one segment.
+    Links are checked inside the chunk only; the first previous_hash and the last
+    hash are returned for stitching.
+    """
+    result = {"header": None, "count": 0, "first_previous": None, "last_hash": None, "bytes": 0, "end": start, "error": None}
+    with open_segment(_resolve(path)) as f:
+        if start:
+            f.seek(start - 1)
+            f.readline() # A line straddling `start` belongs to the previous chunk
+        position = f.tell() if start else 0
+        origin = position
+        if has_header:
+            line = f.readline()
+            result["header"] = json.loads(line)
+            position += len(line)
+
+        previous = None
+        while end is None or position < end:
+            line = f.readline()
+            if not line or not line.endswith(b"\n"):
+                break # EOF, or a line still being written
+            position += len(line)
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                recorded = entry.pop("current_hash")
+            except (ValueError, KeyError) as e:
+                result["error"] = (result["count"], f"unparseable entry: {e}")
+                break
+            if previous is None:
+                result["first_previous"] = entry.get("previous_hash")
+            elif entry.get("previous_hash") != previous:
+                result["error"] = (result["count"], "broken link: previous_hash does not match the preceding entry")
+                break
+            if hashlib.sha256(json.dumps(entry, sort_keys=True).encode()).hexdigest() != recorded:
+                result["error"] = (result["count"], "tampered entry: current_hash does not match its body")
+                break
+            previous = recorded
+            result["count"] += 1
+        result["last_hash"] = previous
+        result["bytes"] = position - origin
+        result["end"] = position
+    return result
+
+
+class LedgerVerifier:
+    """
+    Verifies the whole ledger (or everything after a trusted starting point) with a
+    process pool. Compressed segments are one task each; plain segments are split
+    into `chunk_bytes` ranges aligned to line boundaries.
+    Archived (missing) segments are reported and verification re-anchors on the
+    next segment's header, which carries the hash and count it continues from.
+
+    With `watermark_path`, a clean run records how far the chain is verified and the
+    next run starts from there (`run(full=True)` ignores it). The watermark is local
+    state, not a proof: periodic full passes still re-check the whole history.
+    """
+    def __init__(self, segments_dir: str, workers: Optional[int] = None, chunk_bytes: int = 8 * 1024 * 1024,
+                 watermark_path: Optional[str] = None):
+        self.segments_dir = segments_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_bytes = max(chunk_bytes, 4096) # Line-aligned ranges; tiny ranges only add overhead
+        self.watermark_path = watermark_path
+
+    # --- Watermark -------------------------------------------------------
+
+    def load_watermark(self) -> Optional[Dict[str, Any]]:
+        if not self.watermark_path or not os.path.exists(self.watermark_path):
+            return None
+        try:
+            with open(self.watermark_path, "r") as f:
+                watermark = json.load(f)
+            if all(key in watermark for key in ("entry_index", "hash", "segment", "offset", "segment_entries")):
+                return watermark
+        except (OSError, ValueError) as e:
+            print(f"[VERIFIER] Ignoring unreadable watermark: {e}")
+        return None
+
+    def save_watermark(self, watermark: Dict[str, Any]):
+        tmp_path = f"{self.watermark_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(watermark, f)
+        os.replace(tmp_path, self.watermark_path)
+
+    # --- Verification ----------------------------------------------------
+
+    def _plan(self, files: Dict[int, str], watermark: Optional[Dict[str, Any]]) -> List[Tuple[int, str, int, Optional[int], bool]]:
+        """(segment, path, start, end, has_header) tasks in chain order, from the watermark if given."""
+        tasks = []
+        for number, path in sorted(files.items()):
+            start = 0
+            if watermark is not None:
+                if number < watermark["segment"]:
+                    continue
+                if number == watermark["segment"]:
+                    if self._sealed_at(files, watermark):
+                        continue
+                    start = watermark["offset"]
+            if path.endswith(".log"):
+                try:
+                    size = os.path.getsize(path)
+                except FileNotFoundError:
+                    path, size = _resolve(path), 0 # Sealed and compressed since listing: one task
+                while start + self.chunk_bytes < size:
+                    tasks.append((number, path, start, start + self.chunk_bytes, start == 0))
+                    start += self.chunk_bytes
+            tasks.append((number, path, start, None, start == 0))
+        return tasks
+
+    @staticmethod
+    def _sealed_at(files: Dict[int, str], watermark: Dict[str, Any]) -> bool:
+        """
+        True when the watermark's segment was sealed without further entries, so the
+        rest of it need not be decompressed; the next header is checked in _stitch.
+        """
+        following = files.get(watermark["segment"] + 1)
+        if following is None:
+            return False
+        with open_segment(_resolve(following)) as f:
+            header = json.loads(f.readline())
+        return header["previous_entries"] == watermark["segment_entries"]
+
+    def run(self, full: bool = False) -> Dict[str, Any]:
+        started = time.time()
+        files = segment_files(self.segments_dir)
+        watermark = None if full else self.load_watermark()
+        if watermark is not None and watermark["segment"] not in files:
+            print(f"[VERIFIER] Watermark segment {watermark['segment']} is gone, running a full pass")
+            watermark = None
+        tasks = self._plan(files, watermark)
+        report = {
+            "ok": True, "incremental": watermark is not None, "start_index": watermark["entry_index"] if watermark else 0,
+            "entries": 0, "chain_length": 0, "segments": len({t[0] for t in tasks}), "bytes": 0,
+            "first_broken_index": None, "error": None, "archived_gaps": [],
+            "last_hash": watermark["hash"] if watermark else GENESIS_HASH
+        }
+        report["chain_length"] = report["start_index"]
+        if not tasks:
+            return self._finish(report, started)
+
+        if self.workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(_verify_chunk, *zip(*[t[1:] for t in tasks])))
+        else:
+            results = [_verify_chunk(*t[1:]) for t in tasks]
+
+        reached = self._stitch(tasks, results, report, watermark)
+        if report["ok"] and self.watermark_path:
+            try:
+                self.save_watermark(reached)
+            except OSError as e:
+                print(f"[VERIFIER] Could not persist watermark: {e}")
+        return self._finish(report, started)
+
+    def _stitch(self, tasks, results, report: Dict[str, Any], watermark: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Chains the chunk results together; returns the new watermark, or None when broken."""
+        if watermark is not None:
+            expected_previous, index = watermark["hash"], watermark["entry_index"]
+            previous_segment, segment_entries = watermark["segment"], watermark["segment_entries"]
+            segment, offset = watermark["segment"], watermark["offset"]
+        else:
+            expected_previous, index = GENESIS_HASH, 0
+            previous_segment, segment_entries = None, 0
+            segment, offset = None, 0
+        for (number, path, start, _, _), result in zip(tasks, results):
+            report["bytes"] += result["bytes"]
+            header = result["header"]
+            if header is not None:
+                if (previous_segment is None and number != 1) or (previous_segment is not None and number != previous_segment + 1):
+                    # Segments before this one were archived: trust this header as the anchor
+                    report["archived_gaps"].append({"before_segment": number, "resumes_at": header["first_seq"]})
+                    expected_previous, index = header["previous_hash"], header["first_seq"]
+                elif (header["previous_hash"] != expected_previous or header["first_seq"] != index
+                      or (previous_segment is not None and header["previous_entries"] != segment_entries)):
+                    return self._broken(report, index, f"segment {number} header does not continue segment {previous_segment}")
+                previous_segment, segment_entries = number, 0
+
+            if result["count"] or result["error"]:
+                first_previous = result["first_previous"]
+                if first_previous is not None and first_previous != expected_previous:
+                    return self._broken(report, index, f"broken link at the start of segment {number} (byte {start})")
+            if result["error"] is not None:
+                local, reason = result["error"]
+                report["entries"] += local
+                return self._broken(report, index + local, f"segment {number}: {reason}")
+
+            index += result["count"]
+            report["entries"] += result["count"]
+            segment_entries += result["count"]
+            if result["last_hash"] is not None:
+                expected_previous = result["last_hash"]
+            segment, offset = number, result["end"]
+        report["chain_length"] = index
+        report["last_hash"] = expected_previous
+        return {
+            "entry_index": index, "hash": expected_previous, "segment": segment, "offset": offset,
+            "segment_entries": segment_entries, "verified_at": datetime.now().isoformat()
+        }
+
+    @staticmethod
+    def _broken(report: Dict[str, Any], index: int, reason: str):
+        report["ok"] = False
+        report["first_broken_index"] = index
+        report["error"] = reason
+
+    @staticmethod
+    def _finish(report: Dict[str, Any], started: float) -> Dict[str, Any]:
+        elapsed = max(time.time() - started, 1e-9)
+        report["elapsed_seconds"] = round(elapsed, 3)
+        report["entries_per_second"] = round(report["entries"] / elapsed, 1)
+        report["mb_per_second"] = round(report["bytes"] / elapsed / (1024 * 1024), 2)
+        return report
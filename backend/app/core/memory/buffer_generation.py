@@ -0,0 +1,82 @@
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+
+import faiss
+from app.core.memory.cascade import BinaryCascade
+
+
+class BufferGeneration:
+    """
+    Immutable snapshot of the local FAISS buffer.
+    Readers grab the current generation once and search it without locks; writers
+    never mutate a published generation, they publish a new one instead.
+
+    Layout: a large quantized main index (rebuilt only on merge) plus a small exact
+    fp32 delta of recent writes that is scanned brute-force at query time.
+    Positions [0, index.ntotal) live in the main index, the rest in the delta.
+    `metadata` is the shared append-only row list; `size` bounds what this generation sees.
+    """
+    __slots__ = ("number", "index", "cascade", "delta", "metadata", "size")
+
+    def __init__(self, number: int, index, cascade: Optional[BinaryCascade],
+                 delta: np.ndarray, metadata: List[Dict[str, Any]]):
+        self.number = number
+        self.index = index
+        self.cascade = cascade
+        self.delta = delta
+        self.metadata = metadata
+        self.size = index.ntotal + len(delta)
+
+    @staticmethod
+    def empty_delta(dimension: int) -> np.ndarray:
+        return np.zeros((0, dimension), dtype="float32")
+
+    def with_delta(self, vectors: np.ndarray) -> "BufferGeneration":
+        """New generation with `vectors` appended to the delta (copy-on-write, delta is small)."""
+        delta = np.vstack([self.delta, np.ascontiguousarray(vectors, dtype="float32")])
+        return BufferGeneration(self.number + 1, self.index, self.cascade, delta, self.metadata)
+
+    def merged(self, train_fn) -> "BufferGeneration":
+        """Folds the delta into a fresh copy of the main index (readers keep the old one)."""
+        index = faiss.clone_index(self.index)
+        cascade = None
+        if len(self.delta):
+            train_fn(index, self.delta)
+            index.add(self.delta)
+        if self.cascade is not None:
+            cascade = BinaryCascade(self.cascade.dimension, self.cascade.candidates)
+            cascade.codes = faiss.clone_binary_index(self.cascade.codes)
+            if len(self.delta):
+                cascade.add(self.delta)
+        return BufferGeneration(self.number + 1, index, cascade, BufferGeneration.empty_delta(index.d), self.metadata)
+
+    def reconstruct(self, position: int) -> np.ndarray:
+        if position < self.index.ntotal:
+            return self.index.reconstruct(int(position))
+        return self.delta[position - self.index.ntotal]
+
+    def search(self, query: np.ndarray, k: int, use_cascade: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """Searches main index + delta and merges by squared L2 (same format as index.search)."""
+        k = min(k, self.size)
+        parts_d, parts_i = [], []
+        main_total = self.index.ntotal
+        if main_total > 0:
+            main_k = min(k, main_total)
+            if use_cascade and self.cascade is not None:
+                d, i = self.cascade.search(self.index, query, main_k)
+            else:
+                d, i = self.index.search(query, main_k)
+            parts_d.append(d)
+            parts_i.append(i)
+        if len(self.delta):
+            d = ((query[:, None, :] - self.delta[None, :, :]) ** 2).sum(axis=2).astype("float32")
+            parts_d.append(d)
+            parts_i.append(np.broadcast_to(np.arange(main_total, self.size, dtype="int64"), d.shape))
+        if not parts_d:
+            return np.zeros((len(query), 0), dtype="float32"), np.zeros((len(query), 0), dtype="int64")
+
+        distances = np.concatenate(parts_d, axis=1)
+        indices = np.concatenate(parts_i, axis=1)
+        distances = np.where(indices < 0, np.inf, distances)
+        order = np.argsort(distances, axis=1)[:, :k]
+        return np.take_along_axis(distances, order, axis=1), np.take_along_axis(indices, order, axis=1)
@@ -0,0 +1,74 @@
+import os
+import numpy as np
+from typing import Tuple
+
+import faiss
+
+
+class BinaryCascade:
+    """
+    Two-stage search for large local buffers.
+    Stage 1: Hamming scan over packed sign-bit codes (1 bit/dim, 32x smaller than fp32).
+    Stage 2: exact L2 rescoring of the surviving candidates against the SQ8 vectors.
+    Results come back in the same (distances, indices) shape as index.search().
+    """
+    CODES_FILE = "codes.faiss"
+
+    def __init__(self, dimension: int, candidates: int = 256):
+        if dimension % 8 != 0:
+            raise ValueError(f"Binary codes need a dimension divisible by 8, got {dimension}.")
+        self.dimension = dimension
+        self.candidates = candidates
+        self.codes = faiss.IndexBinaryFlat(dimension)
+
+    @property
+    def ntotal(self) -> int:
+        return self.codes.ntotal
+
+    @staticmethod
+    def encode(vectors: np.ndarray) -> np.ndarray:
+        """Sign-bit quantization: one bit per dimension, packed into uint8."""
+        return np.packbits(np.ascontiguousarray(vectors) > 0, axis=1)
+
+    def add(self, vectors: np.ndarray):
+        self.codes.add(self.encode(vectors))
+
+    def rebuild(self, index):
+        """Re-derives all codes from the vectors held in the main index."""
+        self.codes.reset()
+        if index.ntotal > 0:
+            self.add(index.reconstruct_n(0, index.ntotal))
+
+    def search(self, index, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Hamming prefilter, then exact squared-L2 rescoring of the candidates."""
+        n_candidates = min(max(self.candidates, k * 4), self.codes.ntotal)
+        _, candidate_ids = self.codes.search(self.encode(query), n_candidates)
+
+        distances = np.full((len(query), k), np.inf, dtype="float32")
+        indices = np.full((len(query), k), -1, dtype="int64")
+        for row, ids in enumerate(candidate_ids):
+            ids = ids[ids >= 0]
+            if len(ids) == 0:
+                continue
+            vectors = index.reconstruct_batch(ids)
+            scores = ((vectors - query[row]) ** 2).sum(axis=1)
+            order = np.argsort(scores)[:k]
+            distances[row, :len(order)] = scores[order]
+            indices[row, :len(order)] = ids[order]
+        return distances, indices
+
+    def save(self, directory: str):
+        path = os.path.join(directory, self.CODES_FILE)
+        faiss.write_index_binary(self.codes, path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, directory: str, index, candidates: int = 256) -> "BinaryCascade":
+        """Loads persisted codes, rebuilding them from the main index if missing or stale."""
+        cascade = cls(index.d, candidates)
+        path = os.path.join(directory, cls.CODES_FILE)
+        if os.path.exists(path):
+            cascade.codes = faiss.read_index_binary(path)
+        if cascade.ntotal != index.ntotal:
+            cascade.rebuild(index)
+        return cascade
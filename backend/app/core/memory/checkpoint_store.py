@@ -0,0 +1,104 @@
+import os
+import json
+import zlib
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Any, List, Optional
+
+
+class CheckpointStore:
+    """
+    Keyed store for DurableContext checkpoints (SQLite, WAL mode).
+    - Primary key (task_id, step): the latest state of a task is one index seek,
+      independent of how many other tasks or audit entries exist.
+    - Payloads are compact JSON, zlib-compressed above COMPRESS_ABOVE bytes; a one-byte
+      codec prefix says which.
+    - Each row keeps the SHA-256 of its payload and the hash of the DURABLE_CHECKPOINT
+      ledger entry that recorded that digest, so a recovered state can be checked
+      against the audit chain.
+    """
+    COMPRESS_ABOVE = 512
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS checkpoints (
+            task_id TEXT NOT NULL,
+            step INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            payload BLOB NOT NULL,
+            digest TEXT NOT NULL,
+            ledger_hash TEXT,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (task_id, step)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, storage_path: Optional[str] = None):
+        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+        self.storage_path = storage_path or os.path.join(base_dir, "local_durable_state.sqlite")
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.storage_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=FULL") # One WAL fsync per checkpoint; checkpoints are per agent step
+        self.conn.executescript(self.SCHEMA)
+
+    @classmethod
+    def encode(cls, data: Any) -> bytes:
+        raw = json.dumps(data, separators=(",", ":"), sort_keys=True, default=str).encode("utf-8")
+        if len(raw) > cls.COMPRESS_ABOVE:
+            return b"z" + zlib.compress(raw, 6)
+        return b"j" + raw
+
+    @staticmethod
+    def decode(payload: bytes) -> Any:
+        codec, body = payload[:1], payload[1:]
+        if codec == b"z":
+            body = zlib.decompress(body)
+        return json.loads(body)
+
+    @staticmethod
+    def digest(payload: bytes) -> str:
+        return hashlib.sha256(payload).hexdigest()
+
+    def put(self, task_id: str, step: int, name: str, payload: bytes, ledger_hash: Optional[str]):
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (task_id, step, name, payload, self.digest(payload), ledger_hash, time.time())
+            )
+
+    def _row(self, row) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        task_id, step, name, payload, digest, ledger_hash, created_at = row
+        return {
+            "task_id": task_id, "step": step, "name": name, "data": self.decode(payload),
+            "digest": digest, "intact": self.digest(payload) == digest,
+            "ledger_hash": ledger_hash, "created_at": created_at
+        }
+
+    def latest(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Highest step of a task (one primary-key seek)."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT * FROM checkpoints WHERE task_id = ? ORDER BY step DESC LIMIT 1", (task_id,)
+            ).fetchone()
+        return self._row(row)
+
+    def history(self, task_id: str) -> List[Dict[str, Any]]:
+        """Every checkpoint of a task, in step order."""
+        with self._lock:
+            rows = self.conn.execute("SELECT * FROM checkpoints WHERE task_id = ? ORDER BY step", (task_id,)).fetchall()
+        return [self._row(row) for row in rows]
+
+    def delete(self, task_id: str) -> int:
+        """Drops a finished task's checkpoints (its ledger entries remain)."""
+        with self._lock:
+            return self.conn.execute("DELETE FROM checkpoints WHERE task_id = ?", (task_id,)).rowcount
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+# Global Instance
+checkpoint_store = CheckpointStore()
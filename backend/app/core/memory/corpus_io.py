@@ -0,0 +1,233 @@
+import json
+import uuid
+import hashlib
+from typing import Iterable, Iterator, AsyncIterator, Dict, Any, List
+
+import numpy as np
+from sqlalchemy import select, func
+
+from app.db.schemas.session import engine, async_engine, SessionLocal
+from app.db.schemas.models import SovereignMemoryNode
+from app.db.circuit_breaker import postgres_breaker
+from app.core.memory.document_catalog import DocumentCatalog
+from app.core.immudb_sidecar import immudb
+
+FORMAT = "shacon-memory-ndjson"
+VERSION = 1
+
+
+class CorpusExporter:
+    """
+    Streams the whole memory corpus as NDJSON: one header line, then one record per chunk
+    (content, metadata, embedding). Postgres rows come through a server-side cursor
+    (yield_per), local buffer rows that never reached Postgres are appended afterwards,
+    so memory use stays constant whatever the corpus size.
+    """
+    def __init__(self, memory, include_local: bool = True, batch_size: int = 1000):
+        self.memory = memory
+        self.include_local = include_local
+        self.batch_size = batch_size
+
+    def header(self) -> Dict[str, Any]:
+        return {"format": FORMAT, "version": VERSION, "model": self.memory.model_name, "dimension": self.memory.dimension}
+
+    @staticmethod
+    def _statement():
+        return select(SovereignMemoryNode.id, SovereignMemoryNode.content, SovereignMemoryNode.metadata_json,
+                      SovereignMemoryNode.embedding, SovereignMemoryNode.created_at).order_by(SovereignMemoryNode.id)
+
+    @staticmethod
+    def _postgres_record(row) -> Dict[str, Any]:
+        return {
+            "origin": "postgres",
+            "id": row.id,
+            "content": row.content,
+            "metadata": row.metadata_json or {},
+            "created_at": row.created_at.isoformat() if row.created_at else None,
+            "embedding": [float(x) for x in row.embedding] if row.embedding is not None else None
+        }
+
+    def _local_records(self, only_unsynced: bool) -> Iterator[Dict[str, Any]]:
+        generation = self.memory._generation
+        store = generation.metadata
+        positions = store.unsynced_positions(generation.size) if only_unsynced else range(generation.size)
+        for position in positions:
+            meta = store[int(position)]
+            yield {
+                "origin": "local_buffer",
+                "id": meta["id"],
+                "content": meta["content"],
+                "metadata": meta["metadata"],
+                "created_at": meta["metadata"].get("timestamp"),
+                "embedding": generation.reconstruct(position).tolist()
+            }
+
+    def _use_postgres(self) -> bool:
+        return self.memory.postgres_compatible and postgres_breaker.allow()
+
+    def iter_lines(self) -> Iterator[str]:
+        """Blocking generator (CLI)."""
+        yield json.dumps(self.header()) + "\n"
+        exported_postgres = False
+        if self._use_postgres():
+            with engine.connect() as conn:
+                result = conn.execution_options(stream_results=True, yield_per=self.batch_size).execute(self._statement())
+                for row in result:
+                    yield json.dumps(self._postgres_record(row)) + "\n"
+            exported_postgres = True
+        if self.include_local:
+            # Synced rows are already in the Postgres section
+            for record in self._local_records(only_unsynced=exported_postgres):
+                yield json.dumps(record) + "\n"
+
+    async def aiter_lines(self) -> AsyncIterator[str]:
+        """Async generator for StreamingResponse (asyncpg server-side cursor)."""
+        yield json.dumps(self.header()) + "\n"
+        exported_postgres = False
+        if self._use_postgres():
+            try:
+                async with async_engine.connect() as conn:
+                    result = await conn.stream(self._statement().execution_options(yield_per=self.batch_size))
+                    async for row in result:
+                        yield json.dumps(self._postgres_record(row)) + "\n"
+                exported_postgres = True
+            except Exception as e:
+                postgres_breaker.record_failure(e)
+                print(f"[CORPUS] Postgres export interrupted: {e}")
+                raise
+        if self.include_local:
+            for record in self._local_records(only_unsynced=exported_postgres):
+                yield json.dumps(record) + "\n"
+
+
+class CorpusImporter:
+    """
+    Bulk-loads an NDJSON export. Records are buffered in batches of `batch_size`, so the
+    input is never materialized. Embeddings are reused when the export was produced by the
+    same model and dimension; otherwise content is re-encoded with the current encoder.
+    Rows go to Postgres when it is reachable (plus the documents catalog), else into the
+    local buffer as unsynced, to be drained later.
+    Re-importing is idempotent: records whose content is already in Postgres (md5(content)
+    index) or whose id is already in the local buffer are skipped and counted as duplicates.
+    Records without a local id get one derived from their content for the same reason.
+    """
+    def __init__(self, memory, batch_size: int = 500):
+        self.memory = memory
+        self.batch_size = batch_size
+        self.reuse_embeddings = False
+
+    def run(self, lines: Iterable[str]) -> Dict[str, Any]:
+        lines = iter(lines)
+        header = self._read_header(lines)
+        self.reuse_embeddings = (header.get("model") == self.memory.model_name
+                                 and header.get("dimension") == self.memory.dimension)
+        report = {"imported": 0, "postgres": 0, "local_buffer": 0, "skipped": 0, "duplicates": 0,
+                  "reencoded": not self.reuse_embeddings}
+
+        batch: List[Dict[str, Any]] = []
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                report["skipped"] += 1
+                continue
+            if not record.get("content"):
+                report["skipped"] += 1
+                continue
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                self._flush(batch, report)
+                batch = []
+        if batch:
+            self._flush(batch, report)
+        if report["local_buffer"]:
+            # Persisted once at the end: every persist rewrites the buffer's delta file whole
+            self.memory._persist_buffer()
+
+        immudb.log_operation("MEMORY_IMPORT", report)
+        print(f"[CORPUS] Import COMPLETE: {report}")
+        return report
+
+    @staticmethod
+    def _read_header(lines: Iterator[str]) -> Dict[str, Any]:
+        for line in lines:
+            if line.strip():
+                header = json.loads(line)
+                if header.get("format") != FORMAT:
+                    raise ValueError(f"Not a {FORMAT} stream (header: {line[:120]})")
+                if header.get("version") != VERSION:
+                    raise ValueError(f"Unsupported export version {header.get('version')}")
+                return header
+        raise ValueError("Empty import stream")
+
+    def _embeddings(self, batch: List[Dict[str, Any]]) -> np.ndarray:
+        if self.reuse_embeddings and all(r.get("embedding") for r in batch):
+            return np.array([r["embedding"] for r in batch], dtype="float32")
+        with self.memory._get_models() as (encoder, _):
+            return self.memory._encode(encoder, [r["content"] for r in batch])
+
+    @staticmethod
+    def _content_hash(content: str) -> str:
+        """Same digest as Postgres md5(content) on a UTF-8 database."""
+        return hashlib.md5(content.encode("utf-8")).hexdigest()
+
+    def _local_id(self, record: Dict[str, Any], digest: str) -> str:
+        if record.get("origin") == "local_buffer" and record.get("id"):
+            return record["id"]
+        return str(uuid.UUID(hex=digest))
+
+    def _flush(self, batch: List[Dict[str, Any]], report: Dict[str, Any]):
+        unique = {}
+        for r in batch:
+            unique.setdefault(self._content_hash(r["content"]), r)
+        report["duplicates"] += len(batch) - len(unique)
+
+        if self.memory.postgres_compatible and postgres_breaker.allow():
+            db = SessionLocal()
+            try:
+                digest = func.md5(SovereignMemoryNode.content)
+                stored = set(db.execute(select(digest).where(digest.in_(list(unique)))).scalars())
+                fresh = [r for h, r in unique.items() if h not in stored]
+                if fresh:
+                    embeddings = self._embeddings(fresh)
+                    metadatas = [r.get("metadata") or {} for r in fresh]
+                    db.add_all([
+                        SovereignMemoryNode(content=r["content"], metadata_json=m, embedding=embeddings[i].tolist())
+                        for i, (r, m) in enumerate(zip(fresh, metadatas))
+                    ])
+                    catalog = DocumentCatalog.upsert_statement(metadatas)
+                    if catalog is not None:
+                        db.execute(catalog)
+                    db.commit()
+                postgres_breaker.record_success()
+                report["duplicates"] += len(unique) - len(fresh)
+                report["postgres"] += len(fresh)
+                report["imported"] += len(fresh)
+                return
+            except Exception as e:
+                db.rollback()
+                postgres_breaker.record_failure(e)
+                print(f"[CORPUS] Postgres import batch failed, buffering locally: {e}")
+            finally:
+                db.close()
+
+        ids = [self._local_id(r, h) for h, r in unique.items()]
+        generation = self.memory._generation
+        present = generation.metadata.contains_ids(ids, generation.size)
+        fresh = [(i, r) for i, r, is_present in zip(ids, unique.values(), present) if not is_present]
+        report["duplicates"] += len(unique) - len(fresh)
+        if not fresh:
+            return
+        embeddings = self._embeddings([r for _, r in fresh])
+        rows = [{
+            "id": i,
+            "content": r["content"],
+            "metadata": r.get("metadata") or {},
+            "synced": False
+        } for i, r in fresh]
+        self.memory._append_to_buffer(embeddings, rows)
+        report["local_buffer"] += len(fresh)
+        report["imported"] += len(fresh)
@@ -0,0 +1,139 @@
+import os
+import json
+import time
+import numpy as np
+from typing import Dict, Any, Optional
+
+import faiss
+
+
+class VectorReducer:
+    """
+    Projects native encoder embeddings into a smaller stored dimension.
+    Supported methods:
+    - pca: trained FAISS PCAMatrix (works for any encoder, needs a training sample).
+    - matryoshka: prefix truncation + re-normalization (Matryoshka-trained encoders only).
+    The transform is persisted next to the FAISS buffer so every vector written to
+    FAISS or pgvector goes through the exact same projection.
+    """
+    METHODS = ("pca", "matryoshka")
+    CONFIG_FILE = "reducer.json"
+    MATRIX_FILE = "reducer.pca"
+
+    def __init__(self, input_dim: int, output_dim: int, method: str = "pca"):
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown reduction method '{method}'. Expected one of {self.METHODS}.")
+        if output_dim >= input_dim:
+            raise ValueError(f"Reduced dimension ({output_dim}) must be smaller than the native dimension ({input_dim}).")
+        self.input_dim = input_dim
+        self.output_dim = output_dim
+        self.method = method
+        self._pca = faiss.PCAMatrix(input_dim, output_dim) if method == "pca" else None
+
+    @property
+    def is_trained(self) -> bool:
+        return self.method == "matryoshka" or self._pca.is_trained
+
+    def train(self, vectors: np.ndarray):
+        """Fits the PCA projection. Matryoshka truncation needs no training."""
+        if self.method != "pca":
+            return
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+        if len(vectors) < self.output_dim:
+            raise ValueError(f"PCA needs at least {self.output_dim} samples, got {len(vectors)}.")
+        self._pca.train(vectors)
+        print(f"[REDUCER] PCA trained on {len(vectors)} samples ({self.input_dim} -> {self.output_dim}).")
+
+    def apply(self, vectors: np.ndarray) -> np.ndarray:
+        """Maps native vectors [N, input_dim] to stored vectors [N, output_dim]."""
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+        if self.method == "matryoshka":
+            reduced = np.ascontiguousarray(vectors[:, :self.output_dim])
+            norms = np.linalg.norm(reduced, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            return (reduced / norms).astype("float32")
+        if not self._pca.is_trained:
+            raise RuntimeError("PCA reducer used before training.")
+        return self._pca.apply(vectors).astype("float32")
+
+    def save(self, directory: str):
+        """Persists the transform alongside the FAISS index."""
+        with open(os.path.join(directory, self.CONFIG_FILE), "w") as f:
+            json.dump({"method": self.method, "input_dim": self.input_dim, "output_dim": self.output_dim}, f, indent=2)
+        if self._pca is not None and self._pca.is_trained:
+            faiss.write_VectorTransform(self._pca, os.path.join(directory, self.MATRIX_FILE))
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["VectorReducer"]:
+        """Restores a persisted transform, or None if the buffer stores native vectors."""
+        config_path = os.path.join(directory, cls.CONFIG_FILE)
+        if not os.path.exists(config_path):
+            return None
+        with open(config_path, "r") as f:
+            config = json.load(f)
+        reducer = cls(config["input_dim"], config["output_dim"], config["method"])
+        matrix_path = os.path.join(directory, cls.MATRIX_FILE)
+        if reducer.method == "pca" and os.path.exists(matrix_path):
+            reducer._pca = faiss.downcast_VectorTransform(faiss.read_VectorTransform(matrix_path))
+        return reducer
+
+    @classmethod
+    def clear(cls, directory: str):
+        """Removes a persisted transform (buffer goes back to native vectors)."""
+        for name in (cls.CONFIG_FILE, cls.MATRIX_FILE):
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def evaluate_reduction(vectors: np.ndarray, reducer: VectorReducer, top_k: int = 10,
+                       num_queries: int = 200) -> Dict[str, Any]:
+    """
+    Measures what a reducer costs in recall and buys in latency on a given corpus.
+    Ground truth is exact top-k over the native vectors; both sides are searched
+    through the same SQ8 index type the local buffer uses.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    rng = np.random.default_rng(42)
+    query_ids = rng.choice(len(vectors), size=min(num_queries, len(vectors)), replace=False)
+    queries = vectors[query_ids]
+    k = min(top_k, len(vectors))
+
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+
+    def _timed_search(data: np.ndarray, probe: np.ndarray):
+        index = faiss.IndexScalarQuantizer(data.shape[1], faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_L2)
+        index.train(data)
+        index.add(data)
+        start = time.perf_counter()
+        _, found = index.search(probe, k)
+        elapsed = time.perf_counter() - start
+        return found, elapsed * 1000 / len(probe)
+
+    native_found, native_ms = _timed_search(vectors, queries)
+    reduced = reducer.apply(vectors)
+    reduced_found, reduced_ms = _timed_search(reduced, reduced[query_ids])
+
+    def _recall(found: np.ndarray) -> float:
+        hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+        return hits / float(truth.size)
+
+    native_recall = _recall(native_found)
+    reduced_recall = _recall(reduced_found)
+    return {
+        "corpus_size": len(vectors),
+        "queries": len(query_ids),
+        "top_k": k,
+        "method": reducer.method,
+        "dimensions": f"{reducer.input_dim} -> {reducer.output_dim}",
+        "recall_native_sq8": round(native_recall, 4),
+        "recall_reduced_sq8": round(reduced_recall, 4),
+        "recall_loss": round(native_recall - reduced_recall, 4),
+        "latency_native_ms": round(native_ms, 4),
+        "latency_reduced_ms": round(reduced_ms, 4),
+        "speedup": round(native_ms / reduced_ms, 2) if reduced_ms > 0 else None,
+        "bytes_per_vector_native": vectors.shape[1],
+        "bytes_per_vector_reduced": reducer.output_dim,
+    }
@@ -0,0 +1,126 @@
+from collections import Counter
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional
+
+from sqlalchemy import select, text, func
+from sqlalchemy.dialects.postgresql import insert
+
+from app.db.schemas.models import MemoryDocument
+
+
+class DocumentCatalog:
+    """
+    Maintained catalog of ingested documents (memory_documents), keyed by source file.
+    Rows are upserted in the same transaction that inserts the memory chunks, so the
+    chunk counts always match Postgres. /api/documents pages over it by id cursor
+    instead of scanning every memory row.
+    """
+    DEFAULT_PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
+
+    @staticmethod
+    def file_type(source_file: str) -> str:
+        return source_file.split(".")[-1] if "." in source_file else "unknown"
+
+    @classmethod
+    def upsert_statement(cls, metadatas: List[Dict[str, Any]]):
+        """One multi-row upsert for a batch of chunk metadata (None if no chunk belongs to a file)."""
+        counts = Counter(m["source_file"] for m in metadatas if m and m.get("source_file"))
+        if not counts:
+            return None
+        now = datetime.utcnow()
+        stmt = insert(MemoryDocument).values([
+            {
+                "source_file": source,
+                "file_type": cls.file_type(source),
+                "chunk_count": count,
+                "first_seen_at": now,
+                "last_ingested_at": now
+            } for source, count in counts.items()
+        ])
+        return stmt.on_conflict_do_update(
+            index_elements=[MemoryDocument.source_file],
+            set_={
+                "chunk_count": MemoryDocument.chunk_count + stmt.excluded.chunk_count,
+                "last_ingested_at": stmt.excluded.last_ingested_at
+            }
+        )
+
+    @classmethod
+    def page_statement(cls, cursor: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE):
+        """Newest documents first; `cursor` is the last id of the previous page (keyset pagination)."""
+        stmt = select(MemoryDocument).order_by(MemoryDocument.id.desc()).limit(cls.clamp_limit(limit) + 1)
+        if cursor is not None:
+            stmt = stmt.where(MemoryDocument.id < cursor)
+        return stmt
+
+    @classmethod
+    def clamp_limit(cls, limit: int) -> int:
+        return max(1, min(limit, cls.MAX_PAGE_SIZE))
+
+    @classmethod
+    def to_page(cls, documents: List[MemoryDocument], limit: int) -> Dict[str, Any]:
+        limit = cls.clamp_limit(limit)
+        page = documents[:limit]
+        return {
+            "items": [cls.serialize(d) for d in page],
+            "next_cursor": page[-1].id if len(documents) > limit else None
+        }
+
+    @staticmethod
+    def serialize(document: MemoryDocument) -> Dict[str, Any]:
+        return {
+            "id": document.id,
+            "title": document.source_file,
+            "file_type": document.file_type,
+            "chunk_count": document.chunk_count,
+            "created_at": document.first_seen_at.isoformat() if document.first_seen_at else None,
+            "last_ingested_at": document.last_ingested_at.isoformat() if document.last_ingested_at else None
+        }
+
+    @staticmethod
+    def rebuild(db):
+        """Recomputes the catalog from sovereign_memory_nodes (backfill / repair)."""
+        db.execute(text("""
+            INSERT INTO memory_documents (source_file, file_type, chunk_count, first_seen_at, last_ingested_at)
+            SELECT metadata_json->>'source_file',
+                   CASE WHEN position('.' in metadata_json->>'source_file') > 0
+                        THEN regexp_replace(metadata_json->>'source_file', '^.*\\.', '')
+                        ELSE 'unknown' END,
+                   count(*), min(created_at), max(created_at)
+            FROM sovereign_memory_nodes
+            WHERE metadata_json->>'source_file' IS NOT NULL
+            GROUP BY metadata_json->>'source_file'
+            ON CONFLICT (source_file) DO UPDATE SET
+                chunk_count = EXCLUDED.chunk_count,
+                first_seen_at = EXCLUDED.first_seen_at,
+                last_ingested_at = EXCLUDED.last_ingested_at
+        """))
+        db.commit()
+        return db.execute(select(func.count()).select_from(MemoryDocument)).scalar()
+
+    @classmethod
+    def local_page(cls, stats: List[Dict[str, Any]], limit: int, cursor: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Fallback while Postgres is unreachable: per-file stats of the (bounded) hot tier.
+        Same keyset shape as page_statement: ids are the buffer's per-file codes (first-seen
+        order, like catalog ids), newest first, and `cursor` is the last id of the previous page.
+        """
+        def iso(epoch: Optional[float]) -> Optional[str]:
+            return datetime.fromtimestamp(epoch, tz=timezone.utc).isoformat() if epoch is not None else None
+
+        limit = cls.clamp_limit(limit)
+        stats = sorted(stats, key=lambda d: d["code"], reverse=True)
+        if cursor is not None:
+            stats = [doc for doc in stats if doc["code"] < cursor]
+        page = stats[:limit]
+        items = [{
+            "id": doc["code"],
+            "title": doc["source_file"],
+            "file_type": cls.file_type(doc["source_file"]),
+            "chunk_count": doc["chunk_count"],
+            "created_at": iso(doc["first_seen"]),
+            "last_ingested_at": iso(doc["last_ingested"])
+        } for doc in page]
+        next_cursor = page[-1]["code"] if len(stats) > limit else None
+        return {"items": items, "next_cursor": next_cursor, "source": "local_buffer"}
@@ -1,53 +1,84 @@
 import json
 from typing import Dict, Any, Optional
 from app.core.immudb_sidecar import immudb
+from app.core.memory.checkpoint_store import checkpoint_store
 
 class DurableContext:
     """
     Enables durable execution by persisting task state to high-integrity storage.
     If an agent crashes mid-task, it can recover from the last signed step.
+
+    State lives in the keyed CheckpointStore (latest step per task is one lookup);
+    the audit ledger records each checkpoint's payload digest, and the store keeps
+    the hash of that ledger entry.
     """
     def __init__(self, task_id: str):
         self.task_id = task_id
         self.state: Dict[str, Any] = {"step": 0, "context": {}}
 
-    def checkpoint(self, step_name: str, data: Any):
-        """Creates a signed checkpoint of the current execution state."""
-        self.state["step"] += 1
-        self.state["context"][step_name] = data
-        
-        # Log to immutable audit log for durability
+    def checkpoint(self, step_name: str, data: Any) -> Optional[str]:
+        """
+        Creates a signed checkpoint of the current execution state; returns its ledger hash.
+        When the ledger write fails nothing is stored (recover() would refuse a checkpoint
+        without its ledger entry), the state stays at the previous step and None is returned.
+        """
+        step = self.state["step"] + 1
+        payload = checkpoint_store.encode(data)
+        # Log to immutable audit log for durability (digest only; the state itself is in the store)
         entry = {
             "task_id": self.task_id,
-            "step": self.state["step"],
+            "step": step,
             "name": step_name,
-            "data": data
+            "digest": checkpoint_store.digest(payload),
+            "bytes": len(payload)
         }
-        immudb.log_operation("DURABLE_CHECKPOINT", entry)
+        ledger_hash = immudb.log_operation("DURABLE_CHECKPOINT", entry, durable=True)
+        if ledger_hash is None:
+            print(f"[DURABLE] ERROR: Checkpoint '{step_name}' for Task {self.task_id} was not written to the audit ledger.")
+            return None
+        checkpoint_store.put(self.task_id, step, step_name, payload, ledger_hash)
+        self.state["step"] = step
+        self.state["context"][step_name] = data
         print(f"[DURABLE] Checkpoint '{step_name}' secured for Task {self.task_id}.")
+        return ledger_hash
+
+    @staticmethod
+    def _verify_against_ledger(checkpoint: Dict[str, Any]) -> bool:
+        """The ledger entry the checkpoint points to must carry the same task, step and payload digest."""
+        # Durable entries are already committed: no need to wait behind unrelated queued audit traffic
+        seq = immudb.find_entry(checkpoint["ledger_hash"], flush=False) if checkpoint["ledger_hash"] else None
+        if seq is None:
+            return False
+        details = (immudb.get_entry(seq, flush=False) or {}).get("details", {})
+        return (details.get("task_id") == checkpoint["task_id"] and details.get("step") == checkpoint["step"]
+                and details.get("digest") == checkpoint["digest"])
 
     @classmethod
-    def recover(cls, task_id: str) -> Optional[Dict[str, Any]]:
-        """Recovers the last known state for a specific task via immudb audit logs."""
+    def recover(cls, task_id: str, verify: bool = True) -> Optional[Dict[str, Any]]:
+        """Recovers the last known state for a specific task from the checkpoint store."""
         print(f"[DURABLE] Searching for recovery state for Task {task_id}...")
-        
-        # Query the immudb audit log for latest step
-        logs = immudb.get_logs(limit=100) # Simple scan reverse chronological
-        latest_step = -1
-        last_state = None
-        
-        # Filter for this task and find the highest step number
-        for entry in reversed(logs):
-            details = entry.get("details", {})
-            if details.get("task_id") == task_id:
-                step = details.get("step", 0)
-                if step > latest_step:
-                    latest_step = step
-                    last_state = details
-                    
-        if last_state:
-            print(f"[DURABLE] SUCCESS: Found state at Step {latest_step}. Reconstituting...")
+
+        checkpoint = checkpoint_store.latest(task_id)
+        if checkpoint is not None:
+            if not checkpoint["intact"] or (verify and not cls._verify_against_ledger(checkpoint)):
+                print(f"[DURABLE] ERROR: Checkpoint at Step {checkpoint['step']} does not match the audit ledger. Refusing to recover.")
+                return None
+            print(f"[DURABLE] SUCCESS: Found state at Step {checkpoint['step']}. Reconstituting...")
+            return {
+                "task_id": task_id,
+                "step": checkpoint["step"],
+                "name": checkpoint["name"],
+                "data": checkpoint["data"],
+                "ledger_hash": checkpoint["ledger_hash"]
+            }
+
+        # Checkpoints written before the store existed carry their data in the ledger itself
+        legacy = immudb.query("DURABLE_CHECKPOINT", task_id=task_id, limit=None)
+        legacy = [entry["details"] for entry in legacy if "data" in entry.get("details", {})]
+        if legacy:
+            last_state = max(legacy, key=lambda details: details.get("step", 0))
+            print(f"[DURABLE] SUCCESS: Found ledger state at Step {last_state.get('step')}. Reconstituting...")
             return last_state
-            
+
         print(f"[DURABLE] No recovery state found for Task {task_id}.")
         return None
@@ -0,0 +1,424 @@
+import os
+import json
+import uuid
+import threading
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Iterator, Iterable
+
+import numpy as np
+
+
+def memory_type(metadata: Optional[Dict[str, Any]]) -> str:
+    """Retention/tiering bucket of a memory: its metadata 'type', else 'source', else 'default'."""
+    metadata = metadata or {}
+    return metadata.get("type") or metadata.get("source") or "default"
+
+
+def _epoch(timestamp: Optional[str]) -> float:
+    """Buffer timestamps are naive UTC isoformat strings (promoted rows carry an offset)."""
+    try:
+        written = datetime.fromisoformat(timestamp)
+    except Exception:
+        return np.nan
+    if written.tzinfo is None:
+        written = written.replace(tzinfo=timezone.utc)
+    return written.timestamp()
+
+
+class BufferMetadataStore:
+    """
+    Columnar metadata for the local FAISS buffer (row i <-> vector position i).
+
+    Hot columns are NumPy arrays so filters and aggregations run vectorized:
+      ids (S40), timestamps (float64 epoch), type / source_file (int32 codes into a
+      shared string vocabulary, -1 = none), synced (bool).
+    Content and the full metadata dict live in two append-only byte blobs addressed by
+    int64 offsets, decoded only for the rows a caller actually touches.
+
+    Append-only like the row list it replaces: published generations bound what they
+    see with `size`, arrays grow by reallocation (old references stay valid for the
+    rows they held), compaction builds a new store with take().
+
+    Persistence is a metadata.npz snapshot plus metadata.log (JSONL) holding the rows
+    appended and the ids marked synced since then, so a save costs O(new rows). The
+    snapshot is rewritten once the log outgrows max(SNAPSHOT_MIN_ENTRIES, half the
+    snapshot); both carry an epoch token, so a log left over from an older snapshot is ignored.
+    Each row record carries the row count it starts at. If the log changed under this store
+    (another writer on the same directory), the next save writes a full snapshot instead of
+    appending, and replay stops at the first record that does not start at the current count.
+    """
+    STORE_FILE = "metadata.npz"
+    LOG_FILE = "metadata.log"
+    LEGACY_FILE = "metadata.json"
+    ID_DTYPE = "S40"
+    SNAPSHOT_MIN_ENTRIES = 4096
+
+    def __init__(self, capacity: int = 1024):
+        self._lock = threading.Lock()
+        self._n = 0
+        self.vocab: List[str] = []
+        self._codes: Dict[str, int] = {}
+        self._alloc(max(capacity, 16), 1 << 16, 1 << 14)
+        # Persistence state: rows covered by snapshot + log (None until this store wrote a snapshot)
+        self._saved_dir: Optional[str] = None
+        self._saved_n: Optional[int] = None
+        self._snapshot_n = 0
+        self._log_entries = 0
+        self._epoch: Optional[str] = None
+        self._log_size = 0 # Bytes of the log as this store last left it
+        self._synced_since_save: List[str] = []
+
+    def _alloc(self, rows: int, content_bytes: int, meta_bytes: int):
+        self.ids = np.zeros(rows, dtype=self.ID_DTYPE)
+        self.timestamps = np.full(rows, np.nan, dtype="float64")
+        self.types = np.full(rows, -1, dtype="int32")
+        self.source_files = np.full(rows, -1, dtype="int32")
+        self.synced = np.zeros(rows, dtype=bool)
+        self.content_offsets = np.zeros(rows + 1, dtype="int64")
+        self.meta_offsets = np.zeros(rows + 1, dtype="int64")
+        self.content_blob = np.zeros(content_bytes, dtype="uint8")
+        self.meta_blob = np.zeros(meta_bytes, dtype="uint8")
+
+    # --- Size / growth ---------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._n
+
+    @staticmethod
+    def _grown(array: np.ndarray, needed: int, fill=0) -> np.ndarray:
+        if needed <= len(array):
+            return array
+        grown = np.full(max(needed, 2 * len(array)), fill, dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+
+    def _code(self, value: Optional[str]) -> int:
+        if not value:
+            return -1
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.vocab)
+            self.vocab.append(value)
+            self._codes[value] = code
+        return code
+
+    # --- Writes ----------------------------------------------------------
+
+    def extend(self, rows: Iterable[Dict[str, Any]]):
+        """Appends {id, content, metadata, synced} rows; columns are filled before the count moves."""
+        rows = list(rows)
+        if not rows:
+            return
+        with self._lock:
+            n, k = self._n, len(rows)
+            contents = [r["content"].encode("utf-8") for r in rows]
+            metas = [json.dumps(r.get("metadata") or {}).encode("utf-8") for r in rows]
+            content_end = self.content_offsets[n] + sum(len(c) for c in contents)
+            meta_end = self.meta_offsets[n] + sum(len(m) for m in metas)
+
+            # Grow into new arrays, then publish them (readers of old arrays stay valid)
+            ids = self._grown(self.ids, n + k)
+            timestamps = self._grown(self.timestamps, n + k, np.nan)
+            types = self._grown(self.types, n + k, -1)
+            source_files = self._grown(self.source_files, n + k, -1)
+            synced = self._grown(self.synced, n + k, False)
+            content_offsets = self._grown(self.content_offsets, n + k + 1)
+            meta_offsets = self._grown(self.meta_offsets, n + k + 1)
+            content_blob = self._grown(self.content_blob, int(content_end))
+            meta_blob = self._grown(self.meta_blob, int(meta_end))
+
+            c_pos, m_pos = int(content_offsets[n]), int(meta_offsets[n])
+            for i, (row, content, meta) in enumerate(zip(rows, contents, metas)):
+                position = n + i
+                metadata = row.get("metadata") or {}
+                ids[position] = row["id"].encode("utf-8")
+                timestamps[position] = _epoch(metadata.get("timestamp"))
+                types[position] = self._code(memory_type(metadata))
+                source_files[position] = self._code(metadata.get("source_file"))
+                synced[position] = bool(row.get("synced", False))
+                content_blob[c_pos:c_pos + len(content)] = np.frombuffer(content, dtype="uint8")
+                meta_blob[m_pos:m_pos + len(meta)] = np.frombuffer(meta, dtype="uint8")
+                c_pos += len(content)
+                m_pos += len(meta)
+                content_offsets[position + 1] = c_pos
+                meta_offsets[position + 1] = m_pos
+
+            (self.ids, self.timestamps, self.types, self.source_files, self.synced,
+             self.content_offsets, self.meta_offsets, self.content_blob, self.meta_blob) = (
+                ids, timestamps, types, source_files, synced,
+                content_offsets, meta_offsets, content_blob, meta_blob)
+            self._n = n + k
+
+    def mark_synced(self, ids: Iterable[str]) -> int:
+        """Flags rows as persisted in Postgres (by id, so it survives compaction)."""
+        wanted = np.array([i.encode("utf-8") for i in ids], dtype=self.ID_DTYPE)
+        if not len(wanted):
+            return 0
+        with self._lock:
+            n = self._n
+            mask = np.isin(self.ids[:n], wanted)
+            self.synced[:n][mask] = True
+            if self._saved_n is not None:
+                # Only rows already in the snapshot/log need a log entry; later rows carry the flag
+                saved = np.flatnonzero(mask[:self._saved_n])
+                self._synced_since_save.extend(self.ids[p].decode("utf-8") for p in saved)
+        return int(mask.sum())
+
+    def truncate(self, size: int):
+        """Drops rows from `size` on (load-time repair; the next save writes a snapshot)."""
+        with self._lock:
+            self._n = min(self._n, size)
+
+    def take(self, positions: List[int]) -> "BufferMetadataStore":
+        """New store with only `positions` (in order). Used by compaction."""
+        positions = np.asarray(positions, dtype="int64")
+        store = BufferMetadataStore(capacity=len(positions))
+        store.vocab = list(self.vocab)
+        store._codes = dict(self._codes)
+        k = len(positions)
+        store.ids[:k] = self.ids[positions]
+        store.timestamps[:k] = self.timestamps[positions]
+        store.types[:k] = self.types[positions]
+        store.source_files[:k] = self.source_files[positions]
+        store.synced[:k] = self.synced[positions]
+        store.content_blob, store.content_offsets = self._take_blob(self.content_blob, self.content_offsets, positions)
+        store.meta_blob, store.meta_offsets = self._take_blob(self.meta_blob, self.meta_offsets, positions)
+        store._n = k
+        return store
+
+    @staticmethod
+    def _take_blob(blob: np.ndarray, offsets: np.ndarray, positions: np.ndarray):
+        starts, ends = offsets[positions], offsets[positions + 1]
+        lengths = ends - starts
+        new_offsets = np.zeros(len(positions) + 1, dtype="int64")
+        np.cumsum(lengths, out=new_offsets[1:])
+        if not len(positions) or not new_offsets[-1]:
+            return np.zeros(16, dtype="uint8"), new_offsets
+        # Gather all byte ranges in one vectorized index
+        index = np.repeat(starts - new_offsets[:-1], lengths) + np.arange(new_offsets[-1])
+        return blob[index], new_offsets
+
+    # --- Row access (decoded lazily) -------------------------------------
+
+    def content(self, position: int) -> str:
+        return bytes(self.content_blob[self.content_offsets[position]:self.content_offsets[position + 1]]).decode("utf-8")
+
+    def metadata(self, position: int) -> Dict[str, Any]:
+        return json.loads(bytes(self.meta_blob[self.meta_offsets[position]:self.meta_offsets[position + 1]]))
+
+    def id(self, position: int) -> str:
+        return self.ids[position].decode("utf-8")
+
+    def __getitem__(self, position: int) -> Dict[str, Any]:
+        """Decoded row dict (a copy: use mark_synced() to change flags)."""
+        if position < 0:
+            position += self._n
+        if not 0 <= position < self._n:
+            raise IndexError(position)
+        return {
+            "id": self.id(position),
+            "content": self.content(position),
+            "metadata": self.metadata(position),
+            "synced": bool(self.synced[position])
+        }
+
+    def rows(self, positions: Optional[Iterable[int]] = None, size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        if positions is None:
+            positions = range(self._n if size is None else size)
+        for position in positions:
+            yield self[int(position)]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.rows()
+
+    def contents(self, size: Optional[int] = None) -> List[str]:
+        return [self.content(p) for p in range(self._n if size is None else size)]
+
+    # --- Vectorized queries ----------------------------------------------
+
+    def unsynced_positions(self, size: int) -> np.ndarray:
+        return np.flatnonzero(~self.synced[:size])
+
+    def contains_ids(self, ids: List[str], size: int) -> np.ndarray:
+        """Boolean mask: which of `ids` are present in the first `size` rows."""
+        wanted = np.array([i.encode("utf-8") for i in ids], dtype=self.ID_DTYPE)
+        return np.isin(wanted, self.ids[:size])
+
+    def positions_of(self, ids: List[str], size: int) -> Dict[str, int]:
+        """Maps the given ids to their positions (only those present)."""
+        if not ids:
+            return {}
+        column = self.ids[:size]
+        wanted = np.array([i.encode("utf-8") for i in ids], dtype=self.ID_DTYPE)
+        hits = np.flatnonzero(np.isin(column, wanted))
+        return {column[p].decode("utf-8"): int(p) for p in hits}
+
+    def expired_positions(self, cutoffs: Dict[str, float], size: int) -> np.ndarray:
+        """Positions whose type has a cutoff (epoch) and whose timestamp is older than it."""
+        expired = np.zeros(size, dtype=bool)
+        types, timestamps = self.types[:size], self.timestamps[:size]
+        for mtype, cutoff in cutoffs.items():
+            code = self._codes.get(mtype)
+            if code is not None:
+                expired |= (types == code) & (timestamps < cutoff)
+        return np.flatnonzero(expired)
+
+    def document_stats(self, size: int) -> List[Dict[str, Any]]:
+        """Chunk count and first/last timestamp per source_file (one pass of bincount/ufunc.at)."""
+        codes = self.source_files[:size]
+        mask = codes >= 0
+        if not mask.any():
+            return []
+        codes, timestamps = codes[mask], self.timestamps[:size][mask]
+        width = len(self.vocab)
+        counts = np.bincount(codes, minlength=width)
+        first = np.full(width, np.inf)
+        last = np.full(width, -np.inf)
+        valid = ~np.isnan(timestamps)
+        np.minimum.at(first, codes[valid], timestamps[valid])
+        np.maximum.at(last, codes[valid], timestamps[valid])
+        return [{
+            "code": int(code), # Stable per source file, assigned in first-seen order
+            "source_file": self.vocab[code],
+            "chunk_count": int(counts[code]),
+            "first_seen": float(first[code]) if np.isfinite(first[code]) else None,
+            "last_ingested": float(last[code]) if np.isfinite(last[code]) else None
+        } for code in np.flatnonzero(counts)]
+
+    # --- Persistence -----------------------------------------------------
+
+    def save(self, directory: str, size: Optional[int] = None):
+        """
+        Persists the first `size` rows: appends what changed since the last save to the
+        log, or writes a fresh snapshot (first save of this store, or the log got too long).
+        """
+        n = self._n if size is None else size
+        with self._lock:
+            incremental = self._saved_dir == directory and self._saved_n is not None and n >= self._saved_n
+            synced_ids, self._synced_since_save = self._synced_since_save, []
+        if incremental and self._log_changed(directory):
+            print(f"[MEMORY] {self.LOG_FILE} was written by another writer; saving a full snapshot instead.")
+            incremental = False
+        entries = (n - self._saved_n + len(synced_ids)) if incremental else 0
+        if incremental and self._log_entries + entries <= max(self.SNAPSHOT_MIN_ENTRIES, self._snapshot_n // 2):
+            self._append_log(directory, n, synced_ids)
+        else:
+            self._snapshot(directory, n)
+
+    def _log_changed(self, directory: str) -> bool:
+        try:
+            return os.path.getsize(os.path.join(directory, self.LOG_FILE)) != self._log_size
+        except OSError:
+            return True
+
+    def _append_log(self, directory: str, n: int, synced_ids: List[str]):
+        records = []
+        if n > self._saved_n:
+            records.append({"start": self._saved_n, "rows": list(self.rows(range(self._saved_n, n)))})
+        if synced_ids:
+            records.append({"synced": synced_ids})
+        if records:
+            data = "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+            with open(os.path.join(directory, self.LOG_FILE), "ab") as f:
+                f.write(data)
+            self._log_size += len(data)
+        self._log_entries += n - self._saved_n + len(synced_ids)
+        self._saved_n = n
+
+    def _snapshot(self, directory: str, n: int):
+        """Writes the first `n` rows atomically (tmp file + replace), then starts an empty log."""
+        path = os.path.join(directory, self.STORE_FILE)
+        tmp_path = path + ".tmp.npz"
+        epoch = uuid.uuid4().hex
+        content_end, meta_end = int(self.content_offsets[n]), int(self.meta_offsets[n])
+        np.savez(
+            tmp_path,
+            ids=self.ids[:n], timestamps=self.timestamps[:n], types=self.types[:n],
+            source_files=self.source_files[:n], synced=self.synced[:n],
+            content_offsets=self.content_offsets[:n + 1], meta_offsets=self.meta_offsets[:n + 1],
+            content_blob=self.content_blob[:content_end], meta_blob=self.meta_blob[:meta_end],
+            vocab=np.frombuffer(json.dumps(self.vocab).encode("utf-8"), dtype="uint8"),
+            epoch=np.frombuffer(epoch.encode("utf-8"), dtype="uint8")
+        )
+        os.replace(tmp_path, path)
+        # A crash before this replace leaves the old log, whose epoch no longer matches
+        log_path = os.path.join(directory, self.LOG_FILE)
+        header = (json.dumps({"epoch": epoch}) + "\n").encode("utf-8")
+        with open(log_path + ".tmp", "wb") as f:
+            f.write(header)
+        os.replace(log_path + ".tmp", log_path)
+        self._log_size = len(header)
+        self._saved_dir, self._saved_n, self._snapshot_n, self._log_entries, self._epoch = directory, n, n, 0, epoch
+
+    def _replay_log(self, directory: str, epoch: Optional[str]) -> Optional[int]:
+        """
+        Applies the log written after the loaded snapshot; returns its entry count, or None
+        when there is no usable log or it was cut short (the next save then snapshots).
+        """
+        log_path = os.path.join(directory, self.LOG_FILE)
+        if epoch is None or not os.path.exists(log_path):
+            return None
+        entries = 0
+        with open(log_path, "rb") as f:
+            for number, line in enumerate(f):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    return None # Torn last line after a crash
+                if number == 0:
+                    if record.get("epoch") != epoch:
+                        print(f"[MEMORY] Ignoring {self.LOG_FILE} from an older snapshot.")
+                        return None
+                elif "rows" in record:
+                    if record["start"] != self._n:
+                        print(f"[MEMORY] Warning: {self.LOG_FILE} record starts at row {record['start']}, "
+                              f"expected {self._n} (conflicting writers); later entries skipped.")
+                        return None
+                    self.extend(record["rows"])
+                    entries += len(record["rows"])
+                elif "synced" in record:
+                    self.mark_synced(record["synced"])
+                    entries += len(record["synced"])
+            self._log_size = f.tell()
+        return entries
+
+    @classmethod
+    def load(cls, directory: str) -> "BufferMetadataStore":
+        """Loads metadata.npz, migrating a legacy metadata.json row list on first start."""
+        path = os.path.join(directory, cls.STORE_FILE)
+        legacy_path = os.path.join(directory, cls.LEGACY_FILE)
+        if os.path.exists(path):
+            data = np.load(path)
+            n = len(data["ids"])
+            store = cls(capacity=n)
+            store.vocab = json.loads(bytes(data["vocab"]).decode("utf-8"))
+            store._codes = {value: code for code, value in enumerate(store.vocab)}
+            store.ids[:n] = data["ids"]
+            store.timestamps[:n] = data["timestamps"]
+            store.types[:n] = data["types"]
+            store.source_files[:n] = data["source_files"]
+            store.synced[:n] = data["synced"]
+            store.content_offsets[:n + 1] = data["content_offsets"]
+            store.meta_offsets[:n + 1] = data["meta_offsets"]
+            store.content_blob = cls._grown(store.content_blob, len(data["content_blob"]))
+            store.content_blob[:len(data["content_blob"])] = data["content_blob"]
+            store.meta_blob = cls._grown(store.meta_blob, len(data["meta_blob"]))
+            store.meta_blob[:len(data["meta_blob"])] = data["meta_blob"]
+            store._n = n
+            epoch = bytes(data["epoch"]).decode("utf-8") if "epoch" in data.files else None
+            entries = store._replay_log(directory, epoch)
+            if entries is not None:
+                # Later saves keep appending to this log
+                store._saved_dir, store._saved_n, store._snapshot_n = directory, store._n, n
+                store._log_entries, store._epoch = entries, epoch
+            return store
+
+        store = cls()
+        if os.path.exists(legacy_path):
+            with open(legacy_path, "r") as f:
+                rows = json.load(f)
+            store.extend(rows)
+            store.save(directory)
+            os.replace(legacy_path, legacy_path + ".migrated")
+            print(f"[MEMORY] Migrated {len(rows)} metadata rows to columnar store ({cls.STORE_FILE}).")
+        return store
@@ -0,0 +1,285 @@
+import os
+import json
+import time
+import shutil
+import threading
+import numpy as np
+from typing import List, Dict, Any, Optional
+from sentence_transformers import SentenceTransformer
+from sqlalchemy import text
+
+import faiss
+import gc
+from app.db.schemas.session import SessionLocal
+from app.db.schemas.models import get_embedding_dimension, set_embedding_dimension
+from app.core.immudb_sidecar import immudb
+from app.core.memory.buffer_generation import BufferGeneration
+from app.core.memory.cascade import BinaryCascade
+from app.core.memory.dimensionality import VectorReducer
+
+
+class EmbeddingMigration:
+    """
+    Online re-embedding of the whole memory with a new encoder.
+    1. Re-encodes the local buffer (in buffer order) into a shadow FAISS index.
+    2. Re-encodes Postgres rows (by id) into a shadow pgvector column.
+    3. Cuts over atomically: local generation swap under the write lock, and a
+       single DDL transaction that replaces the old column with the shadow one.
+    Progress is checkpointed to migration_state.json so the job resumes after a
+    restart, and batches are throttled so live traffic keeps priority.
+    """
+    STATE_FILE = "migration_state.json"
+    SHADOW_DIR = "shadow"
+    SHADOW_COLUMN = "embedding_next"
+    TABLE = "sovereign_memory_nodes"
+    # Shadow index is written to disk every N local batches (state follows it)
+    CHECKPOINT_EVERY = 10
+
+    def __init__(self, memory, target_model: str, batch_size: int = 64, throttle_seconds: float = 0.5):
+        self.memory = memory
+        self.target_model = target_model
+        self.batch_size = batch_size
+        self.throttle_seconds = throttle_seconds
+        self.state_path = os.path.join(memory.buffer_path, self.STATE_FILE)
+        self.shadow_path = os.path.join(memory.buffer_path, self.SHADOW_DIR)
+        self.shadow_index_file = os.path.join(self.shadow_path, "index.faiss")
+        os.makedirs(self.shadow_path, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._encoder = None
+        self._stop = threading.Event()
+        self.state = self._load_state()
+        if self.state.get("target_model") != target_model or self.state.get("status") != "running":
+            self._reset_state()
+        self.shadow_index = None
+        if os.path.exists(self.shadow_index_file) and self.state["buffer_cursor"] > 0:
+            self.shadow_index = faiss.read_index(self.shadow_index_file)
+            # Only what was checkpointed together with the cursor is trustworthy
+            self.state["buffer_cursor"] = self.shadow_index.ntotal
+
+    @classmethod
+    def pending(cls, memory) -> Optional[str]:
+        """Returns the target model of an unfinished migration, if any."""
+        path = os.path.join(memory.buffer_path, cls.STATE_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            state = json.load(f)
+        return state.get("target_model") if state.get("status") == "running" else None
+
+    # --- State -----------------------------------------------------------
+
+    def _load_state(self) -> Dict[str, Any]:
+        if os.path.exists(self.state_path):
+            with open(self.state_path, "r") as f:
+                return json.load(f)
+        return {}
+
+    def _reset_state(self):
+        self.state = {
+            "target_model": self.target_model,
+            "target_dimension": None,
+            "buffer_cursor": 0,
+            "pg_cursor": 0,
+            "pg_ready": False,
+            "status": "running",
+            "started_at": time.time()
+        }
+        shutil.rmtree(self.shadow_path, ignore_errors=True)
+        os.makedirs(self.shadow_path, exist_ok=True)
+        self._save_state()
+
+    def _save_state(self):
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def status(self) -> Dict[str, Any]:
+        return {**self.state, "buffer_total": self.memory.buffer_size}
+
+    def stop(self):
+        """Pauses the job after the current batch (resumable later)."""
+        self._stop.set()
+
+    # --- Encoding --------------------------------------------------------
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        if self._encoder is None:
+            print(f"[MIGRATION] Loading target encoder ({self.target_model})...")
+            self._encoder = SentenceTransformer(self.target_model)
+            self.state["target_dimension"] = self._encoder.get_sentence_embedding_dimension()
+            self._save_state()
+        return self._encoder.encode(texts, device=self.memory.device).astype('float32')
+
+    def search_shadow(self, query: str, k: int) -> List[Dict[str, Any]]:
+        """Dual-read: candidates from the partially built shadow index (new model space)."""
+        if self._encoder is None or self.shadow_index is None:
+            return []
+        with self._lock:
+            if self.shadow_index.ntotal == 0:
+                return []
+            query_vec = self._encode([query])
+            distances, indices = self.shadow_index.search(query_vec, min(k, self.shadow_index.ntotal))
+        generation = self.memory._generation
+        candidates = []
+        for dist, idx in zip(distances[0], indices[0]):
+            if 0 <= idx < min(generation.size, len(generation.metadata)):
+                meta = generation.metadata[int(idx)]
+                candidates.append({
+                    "memory_id": meta["id"],
+                    "content": meta["content"],
+                    "metadata": meta["metadata"],
+                    "timestamp": meta["metadata"].get("timestamp"),
+                    "source": "local_buffer",
+                    "vector_score": float(dist)
+                })
+        return candidates
+
+    # --- Job -------------------------------------------------------------
+
+    def run(self, auto_cutover: bool = True) -> Dict[str, Any]:
+        """Runs (or resumes) the migration. Blocking: call from a worker thread."""
+        self._stop.clear()
+        with self.memory._write_lock:
+            self.memory.migration = self # Under the lock so a tiering pass cannot compact past this point
+        immudb.log_operation("EMBEDDING_MIGRATION_START", {"target_model": self.target_model, "resume": self.state["buffer_cursor"] > 0})
+        try:
+            while not self._stop.is_set() and self._migrate_buffer_batch():
+                time.sleep(self.throttle_seconds)
+            self._checkpoint_shadow()
+
+            if self.memory.postgres_compatible and not self.state["pg_ready"]:
+                self._prepare_postgres()
+                while not self._stop.is_set() and self._migrate_postgres_batch():
+                    time.sleep(self.throttle_seconds)
+
+            if self._stop.is_set():
+                print(f"[MIGRATION] Paused at buffer={self.state['buffer_cursor']} pg={self.state['pg_cursor']}.")
+                return self.status()
+            if auto_cutover:
+                self.cutover()
+            return self.status()
+        finally:
+            if self.state["status"] != "running":
+                self.memory.migration = None
+                self._encoder = None
+                gc.collect()
+
+    def _migrate_buffer_batch(self) -> bool:
+        """Re-encodes the next slice of the local buffer. Returns False once caught up."""
+        generation = self.memory._generation
+        start = self.state["buffer_cursor"]
+        end = min(start + self.batch_size, generation.size)
+        if start >= end:
+            return False
+        vectors = self._encode([generation.metadata.content(p) for p in range(start, end)])
+        with self._lock:
+            if self.shadow_index is None:
+                self.shadow_index = self.memory._new_index(vectors.shape[1])
+            self.memory._train_if_needed(self.shadow_index, vectors)
+            self.shadow_index.add(vectors)
+        self.state["buffer_cursor"] = end
+        if (end // self.batch_size) % self.CHECKPOINT_EVERY == 0:
+            self._checkpoint_shadow()
+        return True
+
+    def _checkpoint_shadow(self):
+        if self.shadow_index is not None:
+            with self._lock:
+                faiss.write_index(self.shadow_index, self.shadow_index_file)
+        self._save_state()
+
+    def _prepare_postgres(self):
+        dimension = self.state["target_dimension"] or self._encode(["dimension probe"]).shape[1]
+        db = SessionLocal()
+        try:
+            db.execute(text(f"ALTER TABLE {self.TABLE} ADD COLUMN IF NOT EXISTS {self.SHADOW_COLUMN} vector({int(dimension)})"))
+            db.commit()
+        finally:
+            db.close()
+
+    def _migrate_postgres_batch(self, only_missing: bool = False, db=None) -> bool:
+        """Re-encodes the next Postgres rows into the shadow column. Returns False once caught up."""
+        own_session = db is None
+        db = db or SessionLocal()
+        try:
+            if only_missing:
+                rows = db.execute(text(
+                    f"SELECT id, content FROM {self.TABLE} WHERE {self.SHADOW_COLUMN} IS NULL ORDER BY id LIMIT :n"
+                ), {"n": self.batch_size}).fetchall()
+            else:
+                rows = db.execute(text(
+                    f"SELECT id, content FROM {self.TABLE} WHERE id > :cursor ORDER BY id LIMIT :n"
+                ), {"cursor": self.state["pg_cursor"], "n": self.batch_size}).fetchall()
+            if not rows:
+                if not only_missing:
+                    self.state["pg_ready"] = True
+                    self._save_state()
+                return False
+            vectors = self._encode([r.content for r in rows])
+            db.execute(
+                text(f"UPDATE {self.TABLE} SET {self.SHADOW_COLUMN} = CAST(:vec AS vector) WHERE id = :id"),
+                [{"id": r.id, "vec": "[" + ",".join(map(str, v.tolist())) + "]"} for r, v in zip(rows, vectors)]
+            )
+            if own_session:
+                db.commit()
+            if not only_missing:
+                self.state["pg_cursor"] = rows[-1].id
+                self._save_state()
+            return True
+        finally:
+            if own_session:
+                db.close()
+
+    def cutover(self):
+        """Atomically switches local buffer and Postgres to the new model."""
+        memory = self.memory
+        with memory._write_lock:
+            # 1. Catch up with writes that landed while the job was running
+            while self._migrate_buffer_batch():
+                pass
+            dimension = self.shadow_index.d if self.shadow_index is not None else self._encode(["dimension probe"]).shape[1]
+
+            # 2. Postgres: fill rows inserted meanwhile, then swap columns in one DDL transaction
+            if memory.postgres_compatible:
+                db = SessionLocal()
+                try:
+                    while self._migrate_postgres_batch(only_missing=True, db=db):
+                        pass
+                    db.execute(text(f"ALTER TABLE {self.TABLE} DROP COLUMN embedding"))
+                    db.execute(text(f"ALTER TABLE {self.TABLE} RENAME COLUMN {self.SHADOW_COLUMN} TO embedding"))
+                    db.commit()
+                except Exception as e:
+                    db.rollback()
+                    print(f"[MIGRATION] Postgres cutover failed, keeping old model: {e}")
+                    raise
+                finally:
+                    db.close()
+                set_embedding_dimension(dimension)
+
+            # 3. Local buffer: publish the shadow index as the new generation
+            index = self.shadow_index if self.shadow_index is not None else memory._new_index(dimension)
+            cascade = None
+            if memory._generation.cascade is not None and dimension % 8 == 0:
+                cascade = BinaryCascade(dimension, memory.cascade_candidates)
+                cascade.rebuild(index)
+            memory._generation = BufferGeneration(memory._generation.number + 1, index, cascade,
+                                                  BufferGeneration.empty_delta(dimension), memory.buffer_metadata)
+            memory.model_name = self.target_model
+            memory.native_dimension = dimension
+            memory.dimension = dimension
+            # False when the Postgres swap was skipped: the column keeps the old width
+            memory.postgres_compatible = memory.dimension == get_embedding_dimension()
+            # A reducer trained for the old encoder does not transfer
+            memory.reducer = None
+            VectorReducer.clear(memory.buffer_path)
+            memory._write_manifest()
+
+        memory._persist_buffer()
+        self.state["status"] = "complete"
+        self.state["completed_at"] = time.time()
+        self._save_state()
+        shutil.rmtree(self.shadow_path, ignore_errors=True)
+        immudb.log_operation("EMBEDDING_MIGRATION_CUTOVER", {"model": self.target_model, "dimension": dimension})
+        print(f"[MIGRATION] Cutover COMPLETE: memory now served by {self.target_model} ({dimension}-dim).")
@@ -0,0 +1,123 @@
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.schemas.session import SessionLocal
+from app.db.circuit_breaker import postgres_breaker
+from app.core.immudb_sidecar import immudb
+from app.core.memory.metadata_store import memory_type
+
+
+class RetentionJob:
+    """
+    Time-based retention for sovereign_memory_nodes, research_knowledge and the local buffer.
+    - Memories expire per type (MEMORY_RETENTION_HOURS_BY_TYPE); unlisted types are kept.
+    - Research results expire after RESEARCH_RETENTION_HOURS.
+    Both are off by default: nothing is deleted until a policy is configured.
+    Deletes run in small id batches over the created_at BRIN index so no long lock is
+    held on the vector table, and the documents catalog is decremented in the same
+    transaction as the rows it counts.
+    """
+    BATCH_SIZE = 5000
+    # Same expression the Python-side memory_type() evaluates (empty strings fall through too)
+    TYPE_EXPR = "coalesce(nullif(metadata_json->>'type', ''), nullif(metadata_json->>'source', ''), 'default')"
+
+    def __init__(self, memory=None, policy: Optional[Dict[str, int]] = None,
+                 research_hours: Optional[int] = None, batch_size: int = BATCH_SIZE):
+        self.memory = memory
+        self.policy = policy if policy is not None else settings.MEMORY_RETENTION_HOURS_BY_TYPE
+        self.research_hours = research_hours if research_hours is not None else settings.RESEARCH_RETENTION_HOURS
+        self.batch_size = batch_size
+
+    def cutoffs(self, now: Optional[datetime] = None) -> Dict[str, datetime]:
+        now = now or datetime.now(timezone.utc)
+        return {mtype: now - timedelta(hours=hours) for mtype, hours in self.policy.items() if hours and hours > 0}
+
+    def run(self) -> Dict[str, Any]:
+        """One retention pass. Blocking: call from a worker thread."""
+        cutoffs = self.cutoffs()
+        report = {"memory_nodes": {}, "research_knowledge": 0, "local_buffer": 0}
+
+        if self.memory is not None and cutoffs:
+            report["local_buffer"] = self._expire_local(cutoffs)
+
+        if postgres_breaker.allow():
+            try:
+                for mtype, cutoff in cutoffs.items():
+                    deleted = self._expire_memory_nodes(mtype, cutoff)
+                    if deleted:
+                        report["memory_nodes"][mtype] = deleted
+                if self.research_hours and self.research_hours > 0:
+                    report["research_knowledge"] = self._expire_research(
+                        datetime.now(timezone.utc) - timedelta(hours=self.research_hours)
+                    )
+                postgres_breaker.record_success()
+            except Exception as e:
+                postgres_breaker.record_failure(e)
+                print(f"[RETENTION] Postgres pass failed: {e}")
+
+        if report["local_buffer"] or report["memory_nodes"] or report["research_knowledge"]:
+            print(f"[RETENTION] Expired: {report}")
+            immudb.log_operation("MEMORY_RETENTION", report)
+        return report
+
+    def _expire_memory_nodes(self, mtype: str, cutoff: datetime) -> int:
+        total = 0
+        while True:
+            db = SessionLocal()
+            try:
+                sources = db.execute(text(f"""
+                    DELETE FROM sovereign_memory_nodes
+                    WHERE id IN (
+                        SELECT id FROM sovereign_memory_nodes
+                        WHERE created_at < :cutoff AND {self.TYPE_EXPR} = :mtype
+                        LIMIT :n
+                    )
+                    RETURNING metadata_json->>'source_file'
+                """), {"cutoff": cutoff, "mtype": mtype, "n": self.batch_size}).scalars().all()
+                counts = Counter(s for s in sources if s)
+                if counts:
+                    db.execute(
+                        text("UPDATE memory_documents SET chunk_count = chunk_count - :n WHERE source_file = :source"),
+                        [{"source": source, "n": n} for source, n in counts.items()]
+                    )
+                    db.execute(text("DELETE FROM memory_documents WHERE chunk_count <= 0"))
+                db.commit()
+            finally:
+                db.close()
+            total += len(sources)
+            if len(sources) < self.batch_size:
+                return total
+
+    def _expire_research(self, cutoff: datetime) -> int:
+        total = 0
+        while True:
+            db = SessionLocal()
+            try:
+                deleted = db.execute(text("""
+                    DELETE FROM research_knowledge
+                    WHERE id IN (SELECT id FROM research_knowledge WHERE created_at < :cutoff LIMIT :n)
+                """), {"cutoff": cutoff, "n": self.batch_size}).rowcount
+                db.commit()
+            finally:
+                db.close()
+            total += deleted
+            if deleted < self.batch_size:
+                return total
+
+    def _expire_local(self, cutoffs: Dict[str, datetime]) -> int:
+        """Drops expired rows from the hot tier (they would otherwise resurface or be re-synced)."""
+        memory = self.memory
+        if memory.migration is not None:
+            return 0 # Shadow index is aligned with buffer positions
+        generation = memory._generation
+        # Vectorized over the type/timestamp columns
+        expired = generation.metadata.expired_positions(
+            {mtype: cutoff.timestamp() for mtype, cutoff in cutoffs.items()}, generation.size
+        )
+        if len(expired):
+            memory._compact(expired.tolist())
+        return len(expired)
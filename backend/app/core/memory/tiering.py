@@ -0,0 +1,135 @@
+import os
+import json
+import time
+import threading
+from typing import List, Dict, Any, Iterable, Optional
+
+import numpy as np
+
+from app.core.memory.metadata_store import BufferMetadataStore
+
+
+class AccessStats:
+    """
+    Per-memory access counters for hot/cold tiering.
+    Keys are local buffer ids (uuid) or 'pg:<id>' for rows that only live in Postgres.
+    Also keeps hit counters per tier so the dashboard can show where recalls are served from.
+    """
+    STATS_FILE = "access_stats.json"
+    TIERS = ("hot", "cold")
+
+    def __init__(self, directory: str):
+        self.path = os.path.join(directory, self.STATS_FILE)
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, float]] = {}
+        self.tier_hits = {tier: 0 for tier in self.TIERS}
+        self._dirty = False
+        self._load()
+
+    def record_hits(self, results: List[Dict[str, Any]]):
+        """Called by recall() with the final results: one hit per returned memory."""
+        now = time.time()
+        with self._lock:
+            for r in results:
+                key = r.get("memory_id")
+                if not key:
+                    continue
+                entry = self.entries.setdefault(key, {"hits": 0, "last_hit": 0.0})
+                entry["hits"] += 1
+                entry["last_hit"] = now
+                self.tier_hits["hot" if r.get("source") == "local_buffer" else "cold"] += 1
+            self._dirty = True
+
+    def get(self, key: str) -> Optional[Dict[str, float]]:
+        return self.entries.get(key)
+
+    def prune(self, max_idle_seconds: float):
+        """Forgets keys that have not been hit for a long time (keeps the file bounded)."""
+        cutoff = time.time() - max_idle_seconds
+        with self._lock:
+            stale = [k for k, v in self.entries.items() if v["last_hit"] < cutoff]
+            for key in stale:
+                del self.entries[key]
+            self._dirty = self._dirty or bool(stale)
+
+    def summary(self) -> Dict[str, Any]:
+        total = sum(self.tier_hits.values())
+        return {
+            "hits": dict(self.tier_hits),
+            "hit_ratio": {tier: round(count / total, 4) if total else 0.0 for tier, count in self.tier_hits.items()},
+            "tracked_memories": len(self.entries)
+        }
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"entries": dict(self.entries), "tier_hits": dict(self.tier_hits)}
+            self._dirty = False
+        try:
+            with open(self.path, "w") as f:
+                json.dump(data, f)
+        except Exception as e:
+            print(f"[TIERING] Stats persistence failed: {e}")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            self.entries = data.get("entries", {})
+            self.tier_hits.update(data.get("tier_hits", {}))
+        except Exception as e:
+            print(f"[TIERING] Stats load failed: {e}")
+
+
+class TieringPolicy:
+    """
+    Decides which memories live in the RAM-resident FAISS buffer (hot) and which
+    are served from Postgres on demand (cold).
+    - Demote: synced rows idle longer than demote_after_hours, plus the coldest
+      synced rows whenever the buffer exceeds hot_capacity.
+    - Promote: Postgres rows recalled at least promote_min_hits times and hit within
+      the demote window (anything older would be demoted again on the next pass),
+      while capacity allows. Rows demoted in the same pass are never promoted back.
+    Unsynced rows are never demoted: the local buffer is their only copy.
+    """
+    def __init__(self, hot_capacity: int, demote_after_hours: float, promote_min_hits: int):
+        self.hot_capacity = hot_capacity
+        self.demote_after_seconds = demote_after_hours * 3600
+        self.promote_min_hits = promote_min_hits
+
+    def select_demotions(self, store: BufferMetadataStore, size: int, stats: AccessStats) -> List[int]:
+        """Returns buffer positions to evict (vectorized over the metadata columns)."""
+        now = time.time()
+        # Last use = last recall hit, else write time (unparseable timestamps count as oldest)
+        last_used = np.nan_to_num(store.timestamps[:size], nan=0.0)
+        for key, position in store.positions_of(list(stats.entries.keys()), size).items():
+            last_used[position] = stats.entries[key]["last_hit"]
+
+        candidates = np.flatnonzero(store.synced[:size])
+        order = candidates[np.argsort(last_used[candidates], kind="stable")]
+        idle = order[now - last_used[order] > self.demote_after_seconds]
+        overflow = size - len(idle) - self.hot_capacity
+        extra = order[~np.isin(order, idle)][:max(overflow, 0)]
+        return sorted(np.concatenate([idle, extra]).tolist())
+
+    def select_promotions(self, stats: AccessStats, store: BufferMetadataStore, size: int, free_slots: int,
+                          exclude: Iterable[str] = ()) -> List[int]:
+        """Returns Postgres row ids worth pulling into the hot tier, hottest first (`exclude`: ids just demoted)."""
+        if free_slots <= 0:
+            return []
+        recent = time.time() - self.demote_after_seconds
+        excluded = set(exclude)
+        keys = [
+            key for key, entry in stats.entries.items()
+            if key.startswith("pg:") and entry["hits"] >= self.promote_min_hits
+            and entry["last_hit"] >= recent and key not in excluded
+        ]
+        if not keys:
+            return []
+        local = store.contains_ids(keys, size)
+        hot = [(stats.entries[key]["hits"], int(key[3:])) for key, is_local in zip(keys, local) if not is_local]
+        hot.sort(reverse=True)
+        return [pg_id for _, pg_id in hot[:free_slots]]
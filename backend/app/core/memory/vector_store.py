@@ -1,18 +1,30 @@
 import os
 import json
 import uuid
+import asyncio
 import numpy as np
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from sentence_transformers import SentenceTransformer, CrossEncoder
+from sqlalchemy import select, text
 from sqlalchemy.orm import Session
-from app.db.schemas.session import SessionLocal
-from app.db.schemas.models import SovereignMemoryNode
+from app.db.schemas.session import SessionLocal, AsyncSessionLocal
+from app.db.circuit_breaker import postgres_breaker
+from app.db.schemas.models import SovereignMemoryNode, get_embedding_dimension, set_embedding_dimension
 
 import faiss
 import gc
+import threading
 from contextlib import contextmanager
 from app.core.immudb_sidecar import immudb
+from app.core.ledger.file_lock import FileLock
+from app.core.memory.dimensionality import VectorReducer
+from app.core.memory.cascade import BinaryCascade
+from app.core.memory.buffer_generation import BufferGeneration
+from app.core.memory.document_catalog import DocumentCatalog
+from app.core.memory.metadata_store import BufferMetadataStore
+from app.core.memory.tiering import AccessStats, TieringPolicy
+from app.core.config import settings
 
 # Optimization: Limit FAISS to 4 cores to leave room for visual dev/Ollama
 os.environ["OMP_NUM_THREADS"] = "4"
@@ -29,13 +41,53 @@ class SovereignMemory:
     Hybrid Backend: 
     1. Local Buffer (FAISS + JSON) - Always available, Docker-independent.
     2. Primary Store (Postgres pgvector) - Source of truth for long-term scale.
+
+    Concurrency: recall() reads an immutable BufferGeneration and never blocks.
+    Writers serialize on a write lock, append to a small delta and publish a new
+    generation; the delta is folded into the main index in the background.
+    There is one instance per buffer directory in a process (constructing another for the
+    same directory returns it), and the buffer files are loaded and persisted under a
+    cross-process file lock.
     """
+    SEARCH_MODES = ("exact", "cascade", "auto")
+    # 'auto' switches to the binary cascade once the local buffer is this large
+    CASCADE_MIN_ENTRIES = 50_000
+    # Recent writes stay in an exact fp32 delta until it reaches this many rows
+    DELTA_MERGE_THRESHOLD = 512
+    LOCK_FILE = "buffer.lock"
+    _instances: Dict[str, "SovereignMemory"] = {}
+    _instances_lock = threading.Lock()
+
+    @staticmethod
+    def _default_buffer_path() -> str:
+        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+        return os.path.join(base_dir, "local_memory_buffer_faiss")
+
+    def __new__(cls, *args, **kwargs):
+        # Instances sharing a buffer directory would overwrite each other's index and metadata
+        storage_dir = kwargs.get("storage_dir", args[1] if len(args) > 1 else None)
+        key = os.path.realpath(storage_dir or cls._default_buffer_path())
+        with cls._instances_lock:
+            instance = cls._instances.get(key)
+            if instance is None:
+                instance = super(SovereignMemory, cls).__new__(cls)
+                instance._initialized = False
+                cls._instances[key] = instance
+        return instance
+
     def __init__(self, 
                  model_name: str = "all-MiniLM-L6-v2", 
-                 storage_dir: Optional[str] = None):
+                 storage_dir: Optional[str] = None,
+                 reduced_dim: Optional[int] = None,
+                 reduction: str = "pca",
+                 search_mode: str = "auto",
+                 cascade_candidates: int = 256):
+        if self._initialized:
+            return # Shared instance for this buffer directory
         self.model_name = model_name
         self.encoder_model = None
         self.reranker_model = None
+        self.migration = None # Active EmbeddingMigration (dual-read while it runs)
         
         # Hardware Detection: Check for Intel XPU (IPEX)
         self.device = "cpu"
@@ -53,49 +105,415 @@ class SovereignMemory:
                     self.device = "cuda"
             except: pass
         
-        # 1. Initialize dimensions 
+        # 1. Locate the Local Buffer; its manifest pins the model the stored vectors belong to
+        self.buffer_path = storage_dir or self._default_buffer_path()
+        os.makedirs(self.buffer_path, exist_ok=True)
+        self._buffer_lock = FileLock(os.path.join(self.buffer_path, self.LOCK_FILE))
+        self.manifest_file = os.path.join(self.buffer_path, "manifest.json")
+        manifest = self._read_manifest()
+        if manifest.get("model_name") and manifest["model_name"] != model_name:
+            print(f"[MEMORY] Warning: Buffer was embedded with {manifest['model_name']}, not {model_name}. "
+                  f"Keeping {manifest['model_name']}; use EmbeddingMigration to switch models.")
+            model_name = self.model_name = manifest["model_name"]
+        if manifest.get("postgres_dimension"):
+            set_embedding_dimension(manifest["postgres_dimension"])
+
+        # 2. Initialize dimensions 
         print(f"[MEMORY] Initializing Sovereign Recall (Model: {model_name})")
         
         # We know MiniLM-L6 is 384. For others, we might need to load.
-        if "MiniLM-L6" in model_name:
-            self.dimension = 384
+        if manifest.get("native_dimension"):
+            self.native_dimension = manifest["native_dimension"]
+        elif "MiniLM-L6" in model_name:
+            self.native_dimension = 384
         else:
             # Temporary load to get dimension (wrapped to avoid crashes in some envs)
             try:
                 temp_model = SentenceTransformer(model_name)
-                self.dimension = temp_model.get_sentence_embedding_dimension()
+                self.native_dimension = temp_model.get_sentence_embedding_dimension()
                 del temp_model
                 gc.collect()
             except Exception as e:
                 print(f"[MEMORY] Warning: Could not auto-detect dimension, using default 384. Error: {e}")
-                self.dimension = 384
+                self.native_dimension = 384
 
-        # 2. Initialize Local FAISS Buffer
-        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-        self.buffer_path = os.path.join(base_dir, "local_memory_buffer_faiss")
-        os.makedirs(self.buffer_path, exist_ok=True)
-        
+        # 3. Initialize Local FAISS Buffer
         self.index_file = os.path.join(self.buffer_path, "index.faiss")
-        self.metadata_file = os.path.join(self.buffer_path, "metadata.json")
+        self.delta_file = os.path.join(self.buffer_path, "delta.npy")
+        self._write_lock = threading.RLock()
+        self._persist_lock = threading.Lock()
+        self._merge_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+        # 4. Dimensionality Reduction (PCA / Matryoshka), persisted with the index
+        self.reducer = VectorReducer.load(self.buffer_path)
+        if self.reducer is None and reduced_dim:
+            self.reducer = VectorReducer(self.native_dimension, reduced_dim, reduction)
+            self.reducer.save(self.buffer_path)
+        elif self.reducer is not None and reduced_dim and reduced_dim != self.reducer.output_dim:
+            print(f"[MEMORY] Warning: Buffer already stores {self.reducer.output_dim}-dim vectors; ignoring reduced_dim={reduced_dim}.")
+        if self.reducer is not None and not self.reducer.is_trained:
+            print(f"[MEMORY] PCA reducer pending training. Storing native vectors until fit_reducer() runs.")
+        self.dimension = self._stored_dimension()
         
-        # Load or create index
-        if os.path.exists(self.index_file):
-            self.index = faiss.read_index(self.index_file)
-            with open(self.metadata_file, "r") as f:
-                self.buffer_metadata = json.load(f)
-        else:
-            # OPTIMIZATION: Use Scalar Quantizer (QT_8bit) to reduce vector RAM usage by 75%
-            # IndexFlatL2 uses 4 bytes/dim. IndexScalarQuantizer with QT_8bit uses 1 byte/dim.
-            self.index = faiss.IndexScalarQuantizer(self.dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_L2)
-            self.buffer_metadata = [] # List of {id, content, metadata}
+        # Load or create index (under the buffer lock: another process may be persisting)
+        with self._buffer_lock:
+            # Columnar row metadata (migrates a legacy metadata.json on first start)
+            self.buffer_metadata = BufferMetadataStore.load(self.buffer_path)
+            if os.path.exists(self.index_file):
+                index = faiss.read_index(self.index_file)
+                if index.d != self.dimension:
+                    print(f"[MEMORY] Warning: Stored index is {index.d}-dim but encoder pipeline yields {self.dimension}-dim vectors. Run fit_reducer() to re-project.")
+            else:
+                index = self._new_index(self.dimension)
+            delta = np.load(self.delta_file) if os.path.exists(self.delta_file) else BufferGeneration.empty_delta(index.d)
+            index, delta = self._reconcile_sizes(index, delta, self.buffer_metadata)
+            self._index_stamp = self._file_stamp(self.index_file)
+
+        # 5. Binary prefilter (sign-bit Hamming codes) for very large buffers
+        if search_mode not in self.SEARCH_MODES:
+            raise ValueError(f"Unknown search_mode '{search_mode}'. Expected one of {self.SEARCH_MODES}.")
+        self.search_mode = search_mode
+        self.cascade_candidates = cascade_candidates
+        cascade = None
+        if search_mode != "exact" and index.d % 8 == 0:
+            cascade = BinaryCascade.load(self.buffer_path, index, cascade_candidates)
+
+        # 6. Publish the first generation (readers only ever see whole generations)
+        self._generation = BufferGeneration(0, index, cascade, delta, self.buffer_metadata)
+        self._persisted_index = index
+
+        # 7. Hot/cold tiering: access statistics drive promotion/demotion
+        self.access_stats = AccessStats(self.buffer_path)
+        self.tiering = TieringPolicy(
+            hot_capacity=settings.MEMORY_HOT_TIER_MAX_ENTRIES,
+            demote_after_hours=settings.MEMORY_DEMOTE_AFTER_HOURS,
+            promote_min_hits=settings.MEMORY_PROMOTE_MIN_HITS
+        )
+
+        # pgvector column width is fixed at schema creation; only talk to Postgres when it matches.
+        self.postgres_compatible = self.dimension == get_embedding_dimension()
+        if not self.postgres_compatible:
+            print(f"[MEMORY] Warning: pgvector column is {get_embedding_dimension()}-dim, buffer is {self.dimension}-dim. "
+                  f"Postgres tier disabled until MEMORY_VECTOR_DIM matches.")
+        if not manifest:
+            self._write_manifest()
             
-        print(f"[MEMORY] Local FAISS (Quantized) Buffer initialized at {self.buffer_path} ({len(self.buffer_metadata)} entries)")
+        print(f"[MEMORY] Local FAISS (Quantized) Buffer initialized at {self.buffer_path} ({len(self.buffer_metadata)} entries, {self.dimension}-dim)")
+        self._initialized = True
+
+    def _stored_dimension(self) -> int:
+        """Dimension of the vectors actually written to FAISS and pgvector."""
+        if self.reducer is not None and self.reducer.is_trained:
+            return self.reducer.output_dim
+        return self.native_dimension
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        if not os.path.exists(self.manifest_file):
+            return {}
+        with open(self.manifest_file, "r") as f:
+            return json.load(f)
+
+    def _write_manifest(self):
+        """Records which encoder/dimensions the stored vectors (FAISS + pgvector) belong to."""
+        manifest = {
+            "model_name": self.model_name,
+            "native_dimension": self.native_dimension,
+            "dimension": self.dimension,
+            "postgres_dimension": get_embedding_dimension(),
+            "updated_at": datetime.utcnow().isoformat()
+        }
+        with open(self.manifest_file, "w") as f:
+            json.dump(manifest, f, indent=2)
+
+    @property
+    def index(self):
+        """Main FAISS index of the current generation (excludes the unmerged delta)."""
+        return self._generation.index
+
+    @property
+    def buffer_size(self) -> int:
+        return self._generation.size
+
+    @staticmethod
+    def _new_index(dimension: int):
+        # OPTIMIZATION: Use Scalar Quantizer (QT_8bit) to reduce vector RAM usage by 75%
+        # IndexFlatL2 uses 4 bytes/dim. IndexScalarQuantizer with QT_8bit uses 1 byte/dim.
+        return faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_L2)
+
+    @staticmethod
+    def _train_if_needed(index, vectors: np.ndarray):
+        """SQ8 needs per-dim ranges before the first add; pad with +/- bounds so later vectors are not clipped."""
+        if index.is_trained:
+            return
+        bound = max(1.0, float(np.abs(vectors).max()))
+        corners = np.vstack([np.full((1, index.d), -bound), np.full((1, index.d), bound)]).astype('float32')
+        index.train(np.vstack([vectors, corners]))
+
+    def _encode(self, encoder, texts: List[str]) -> np.ndarray:
+        """Encodes texts and projects them into the stored dimension."""
+        # Move compute to detected hardware (XPU/CUDA/CPU)
+        vectors = encoder.encode(texts, device=self.device).astype('float32')
+        if self.reducer is not None and self.reducer.is_trained:
+            vectors = self.reducer.apply(vectors)
+        return vectors
+
+    def fit_reducer(self, sample_texts: Optional[List[str]] = None, allow_postgres_mismatch: bool = False):
+        """
+        Trains the PCA reducer (on sample_texts or the buffer contents) and rebuilds
+        the local index in the reduced space. Matryoshka truncation needs no fit.
+
+        Only the local buffer is re-projected: pgvector rows keep their width. A fit that
+        changes the stored dimension is therefore refused while sovereign_memory_nodes
+        holds rows of another width (or cannot be checked); an empty table has its column
+        re-typed instead. To reduce an existing Postgres corpus, re-embed it with
+        EmbeddingMigration. `allow_postgres_mismatch` fits anyway and leaves the
+        Postgres tier disabled.
+        """
+        if self.reducer is None:
+            print("[MEMORY] No reducer configured. Pass reduced_dim to SovereignMemory first.")
+            return
+        if self.migration is not None:
+            print("[MEMORY] Re-embedding migration in progress. Refit the reducer after cutover.")
+            return
+        target = self.reducer.output_dim
+        if target != self.dimension and not allow_postgres_mismatch and not self._retype_postgres_column(target):
+            return
+        # Writers wait for the rebuild; readers keep searching the previous generation.
+        with self._write_lock:
+            contents = self.buffer_metadata.contents(self._generation.size)
+            with self._get_models() as (encoder, _):
+                if not self.reducer.is_trained:
+                    samples = encoder.encode(sample_texts or contents, device=self.device).astype('float32')
+                    self.reducer.train(samples)
+                    self.reducer.save(self.buffer_path)
+                self.dimension = self._stored_dimension()
+                rebuilt = self._new_index(self.dimension)
+                if contents:
+                    vectors = self._encode(encoder, contents)
+                    self._train_if_needed(rebuilt, vectors)
+                    rebuilt.add(vectors)
+            cascade = None
+            if self._generation.cascade is not None and self.dimension % 8 == 0:
+                cascade = BinaryCascade(self.dimension, self.cascade_candidates)
+                cascade.rebuild(rebuilt)
+            self._generation = BufferGeneration(self._generation.number + 1, rebuilt, cascade,
+                                                BufferGeneration.empty_delta(self.dimension), self.buffer_metadata)
+            self.postgres_compatible = self.dimension == get_embedding_dimension()
+            self._write_manifest()
+        self._persist_buffer()
+        print(f"[MEMORY] Buffer re-projected to {self.dimension} dims ({len(contents)} entries).")
+
+    def _retype_postgres_column(self, dimension: int) -> bool:
+        """
+        Makes the pgvector column `dimension` wide if that cannot orphan stored vectors:
+        True when it already is, or when the table was empty and got re-typed.
+        """
+        if dimension == get_embedding_dimension():
+            return True
+        if not postgres_breaker.allow():
+            print(f"[MEMORY] Refusing to fit reducer: cannot check Postgres for {get_embedding_dimension()}-dim rows (circuit open).")
+            return False
+        db: Session = SessionLocal()
+        try:
+            if db.query(SovereignMemoryNode.id).limit(1).first() is not None:
+                print(f"[MEMORY] Refusing to fit reducer: Postgres holds {get_embedding_dimension()}-dim embeddings and "
+                      f"fit_reducer() only re-projects the local buffer. Re-embed with EmbeddingMigration instead.")
+                return False
+            db.execute(text(f"ALTER TABLE {SovereignMemoryNode.__tablename__} ALTER COLUMN embedding TYPE vector({int(dimension)})"))
+            db.commit()
+            postgres_breaker.record_success()
+            set_embedding_dimension(dimension)
+            print(f"[MEMORY] Empty pgvector column re-typed to vector({dimension}).")
+            return True
+        except Exception as e:
+            db.rollback()
+            postgres_breaker.record_failure(e)
+            print(f"[MEMORY] Refusing to fit reducer: Postgres dimension check failed: {e}")
+            return False
+        finally:
+            db.close()
+
+    def _use_cascade(self, generation: BufferGeneration) -> bool:
+        if generation.cascade is None:
+            return False
+        if self.search_mode == "cascade":
+            return True
+        return generation.index.ntotal >= self.CASCADE_MIN_ENTRIES
+
+    def _search_local(self, generation: BufferGeneration, query_vec: np.ndarray, k: int):
+        """Searches a buffer generation exactly or through the binary cascade (same result format)."""
+        return generation.search(query_vec, k, use_cascade=self._use_cascade(generation))
+
+    def _append_to_buffer(self, embeddings: np.ndarray, rows: List[Dict[str, Any]]) -> int:
+        """Appends rows under the write lock and publishes a new generation. Returns the first position."""
+        with self._write_lock:
+            start = len(self.buffer_metadata)
+            # Metadata first: a published generation must never point past the row store
+            self.buffer_metadata.extend(rows)
+            self._generation = self._generation.with_delta(embeddings)
+            pending = len(self._generation.delta)
+        if pending >= self.DELTA_MERGE_THRESHOLD and not self._merge_lock.locked():
+            threading.Thread(target=self._merge_delta, daemon=True).start()
+        return start
+
+    def _merge_delta(self):
+        """Folds the delta into a new main index off the write path, then publishes it."""
+        with self._merge_lock:
+            base = self._generation
+            if not len(base.delta):
+                return
+            merged = base.merged(self._train_if_needed)
+            with self._write_lock:
+                current = self._generation
+                if current.index is not base.index:
+                    return # Buffer was rebuilt meanwhile; the merge is stale
+                self._generation = BufferGeneration(current.number + 1, merged.index, merged.cascade,
+                                                    current.delta[len(base.delta):], current.metadata)
+        print(f"[MEMORY] Delta merged: {len(base.delta)} rows folded into main index (generation {self._generation.number}).")
+        self._persist_buffer()
+
+    def _compact(self, drop_positions: List[int]):
+        """
+        Publishes a generation without `drop_positions` (surviving rows keep their order).
+        Vectors are copied out of the snapshot; readers keep the old generation until they finish.
+        """
+        with self._write_lock:
+            generation = self._generation
+            dropped = set(drop_positions)
+            keep_positions = [p for p in range(generation.size) if p not in dropped]
+            index = faiss.clone_index(generation.index)
+            index.reset() # keeps SQ8 training ranges
+            rows = generation.metadata.take(keep_positions)
+            if keep_positions:
+                index.add(np.vstack([generation.reconstruct(p) for p in keep_positions]).astype('float32'))
+            cascade = None
+            if generation.cascade is not None:
+                cascade = BinaryCascade(index.d, self.cascade_candidates)
+                cascade.rebuild(index)
+            self.buffer_metadata = rows
+            self._generation = BufferGeneration(generation.number + 1, index, cascade,
+                                                BufferGeneration.empty_delta(index.d), rows)
+        self._persist_buffer()
+
+    def rebalance_tiers(self) -> Dict[str, Any]:
+        """
+        Background tiering pass: demotes cold synced memories out of RAM and promotes
+        frequently recalled Postgres-only memories into the local buffer.
+        """
+        with self._write_lock:
+            # Held from the check through compaction: a migration starting meanwhile waits for it
+            if self.migration is not None:
+                # Shadow index is aligned with buffer positions; compaction would break it
+                return {"demoted": 0, "promoted": 0, "hot_entries": self.buffer_size, "skipped": "migration"}
+            generation = self._generation
+            demoted = self.tiering.select_demotions(generation.metadata, generation.size, self.access_stats) if self.postgres_compatible else []
+            demoted_ids = [generation.metadata.id(position) for position in demoted]
+            if demoted:
+                self._compact(demoted)
+
+        promoted = 0
+        free_slots = self.tiering.hot_capacity - self.buffer_size
+        generation = self._generation
+        pg_ids = self.tiering.select_promotions(self.access_stats, generation.metadata, generation.size, free_slots,
+                                                exclude=demoted_ids)
+        if pg_ids and self._postgres_available():
+            promoted = self._promote_from_postgres(pg_ids)
+
+        self.access_stats.prune(max_idle_seconds=30 * 24 * 3600)
+        self.access_stats.save()
+        report = {"demoted": len(demoted), "promoted": promoted, "hot_entries": self.buffer_size}
+        if demoted or promoted:
+            print(f"[MEMORY] Tiering pass: {report}")
+            immudb.log_operation("MEMORY_TIERING", report)
+        return report
+
+    def _promote_from_postgres(self, pg_ids: List[int]) -> int:
+        """Copies Postgres rows (already synced by definition) into the hot tier."""
+        db: Session = SessionLocal()
+        try:
+            nodes = db.query(SovereignMemoryNode).filter(SovereignMemoryNode.id.in_(pg_ids)).all()
+            if not nodes:
+                return 0
+            rows = [{
+                "id": f"pg:{node.id}",
+                "content": node.content,
+                "metadata": {**(node.metadata_json or {}), "timestamp": node.created_at.isoformat()},
+                "synced": True
+            } for node in nodes]
+            embeddings = np.array([list(node.embedding) for node in nodes], dtype='float32')
+            postgres_breaker.record_success()
+            self._append_to_buffer(embeddings, rows)
+            self._persist_buffer()
+            return len(rows)
+        except Exception as e:
+            postgres_breaker.record_failure(e)
+            print(f"[MEMORY] Promotion from Postgres failed: {e}")
+            return 0
+        finally:
+            db.close()
+
+    def _postgres_available(self) -> bool:
+        """Schema matches and the circuit is closed (open circuit = skip instantly, no connect timeout)."""
+        return self.postgres_compatible and postgres_breaker.allow()
+
+    def tier_stats(self) -> Dict[str, Any]:
+        """Hit ratios per tier plus hot-tier occupancy."""
+        return {
+            **self.access_stats.summary(),
+            "hot_entries": self.buffer_size,
+            "hot_capacity": self.tiering.hot_capacity
+        }
+
+    @staticmethod
+    def _reconcile_sizes(index, delta: np.ndarray, metadata: BufferMetadataStore):
+        """
+        Vectors (index + delta) and metadata rows are written one file after another; after a
+        crash in between their counts can disagree. Truncates both to the shorter one, so
+        every position has a vector and a row.
+        """
+        vectors, rows = index.ntotal + len(delta), len(metadata)
+        if vectors == rows:
+            return index, delta
+        print(f"[MEMORY] Warning: Buffer has {vectors} vectors but {rows} metadata rows (interrupted write). "
+              f"Truncating to {min(vectors, rows)}.")
+        if rows < vectors:
+            if rows >= index.ntotal:
+                delta = delta[:rows - index.ntotal]
+            else:
+                index.remove_ids(faiss.IDSelectorRange(rows, index.ntotal))
+                delta = BufferGeneration.empty_delta(index.d)
+        else:
+            metadata.truncate(vectors)
+        return index, delta
+
+    @staticmethod
+    def _file_stamp(path: str):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
 
     def _persist_buffer(self):
-        """Saves FAISS index and metadata to disk."""
-        faiss.write_index(self.index, self.index_file)
-        with open(self.metadata_file, "w") as f:
-            json.dump(self.buffer_metadata, f, indent=2)
+        """Saves FAISS index and metadata to disk (under the cross-process buffer lock)."""
+        with self._persist_lock, self._buffer_lock:
+            generation = self._generation
+            # The main index only changes on merge/rebuild; recent writes live in delta.npy.
+            # Also rewritten when another process replaced the file since our last write.
+            if generation.index is not self._persisted_index or self._file_stamp(self.index_file) != self._index_stamp:
+                # Temp file + rename: a crash never leaves a torn index behind
+                faiss.write_index(generation.index, self.index_file + ".tmp")
+                os.replace(self.index_file + ".tmp", self.index_file)
+                if generation.cascade is not None:
+                    generation.cascade.save(self.buffer_path)
+                self._persisted_index = generation.index
+                self._index_stamp = self._file_stamp(self.index_file)
+            with open(self.delta_file + ".tmp", "wb") as f:
+                np.save(f, generation.delta)
+            os.replace(self.delta_file + ".tmp", self.delta_file)
+            # Appends new rows / synced flags to metadata.log; full snapshot only now and then
+            generation.metadata.save(self.buffer_path, generation.size)
         gc.collect()
 
     @contextmanager
@@ -119,29 +537,24 @@ class SovereignMemory:
             self.reranker_model = None
             gc.collect()
 
-    def commit_to_memory(self, content: str, metadata: Dict[str, Any]):
-        """
-        Dual-Commit strategy:
-        1. Always writes to Local FAISS (Guaranteed persistence).
-        2. Attempts to write to Postgres (pgvector).
-        """
+    def _commit_local(self, content: str, metadata: Dict[str, Any]):
+        """Chunks + encodes content and appends it to the Local FAISS buffer (the failsafe)."""
         chunks = self._chunk_content(content)
         timestamp = datetime.utcnow().isoformat()
         
         with self._get_models() as (encoder, _):
-            # Move compute to detected hardware (XPU/CUDA/CPU)
-            embeddings = encoder.encode(chunks, device=self.device).astype('float32')
+            embeddings = self._encode(encoder, chunks)
 
         # A. Commit to Local FAISS (The Failsafe)
+        rows = []
         try:
-            self.index.add(embeddings)
-            for i, chunk in enumerate(chunks):
-                self.buffer_metadata.append({
-                    "id": str(uuid.uuid4()),
-                    "content": chunk,
-                    "metadata": {**metadata, "timestamp": timestamp},
-                    "synced": False
-                })
+            rows = [{
+                "id": str(uuid.uuid4()),
+                "content": chunk,
+                "metadata": {**metadata, "timestamp": timestamp},
+                "synced": False
+            } for chunk in chunks]
+            self._append_to_buffer(embeddings, rows)
             self._persist_buffer()
             print(f"[MEMORY] Local Buffer SUCCESS: {len(chunks)} chunks recorded.")
             
@@ -152,32 +565,83 @@ class SovereignMemory:
             )
         except Exception as e:
             print(f"[MEMORY] Local Buffer FAILED: {e}")
+            rows = []
+        return chunks, embeddings, rows, timestamp
+
+    @staticmethod
+    def _memory_nodes(chunks: List[str], embeddings: np.ndarray, metadata: Dict[str, Any], timestamp: str) -> List[SovereignMemoryNode]:
+        return [
+            SovereignMemoryNode(
+                content=chunk,
+                metadata_json={**metadata, "timestamp": timestamp},
+                embedding=embeddings[i].tolist()
+            ) for i, chunk in enumerate(chunks)
+        ]
+
+    @staticmethod
+    def _update_catalog(db: Session, metadatas: List[Dict[str, Any]]):
+        """Keeps memory_documents in step with the chunks of the same transaction."""
+        catalog = DocumentCatalog.upsert_statement(metadatas)
+        if catalog is not None:
+            db.execute(catalog)
+
+    def _mark_synced(self, rows: List[Dict[str, Any]]):
+        """Update 'synced' flag ONLY after successful commit (by id, so it survives compaction)."""
+        if rows:
+            with self._write_lock:
+                self.buffer_metadata.mark_synced([row["id"] for row in rows])
+            self._persist_buffer()
+
+    def commit_to_memory(self, content: str, metadata: Dict[str, Any]):
+        """
+        Dual-Commit strategy:
+        1. Always writes to Local FAISS (Guaranteed persistence).
+        2. Attempts to write to Postgres (pgvector).
+        """
+        chunks, embeddings, rows, timestamp = self._commit_local(content, metadata)
 
         # B. Commit to Postgres (If available)
+        if not self._postgres_available():
+            return
         db: Session = SessionLocal()
         try:
-            for i, chunk in enumerate(chunks):
-                node = SovereignMemoryNode(
-                    content=chunk,
-                    metadata_json={**metadata, "timestamp": timestamp},
-                    embedding=embeddings[i].tolist()
-                )
-                db.add(node)
-            
+            db.add_all(self._memory_nodes(chunks, embeddings, metadata, timestamp))
+            self._update_catalog(db, [metadata] * len(chunks))
             db.commit()
-            
-            # Update 'synced' flag ONLY after successful commit
-            for i in range(len(chunks)):
-                self.buffer_metadata[-(len(chunks)-i)]["synced"] = True
-            
-            self._persist_buffer()
+            postgres_breaker.record_success()
+            self._mark_synced(rows)
             print(f"[MEMORY] Postgres Commit SUCCESS: Brain synchronized.")
         except Exception as e:
+            postgres_breaker.record_failure(e)
             print(f"[MEMORY] Postgres Commit FAILED (Docker likely offline): {e}")
             db.rollback()
         finally:
             db.close()
 
+    async def acommit_to_memory(self, content: str, metadata: Dict[str, Any]):
+        """
+        Async Dual-Commit for coroutines: encoding runs in a worker thread and the
+        Postgres insert goes through the pooled asyncpg engine.
+        """
+        chunks, embeddings, rows, timestamp = await asyncio.to_thread(self._commit_local, content, metadata)
+
+        if not self._postgres_available():
+            return
+        async with AsyncSessionLocal() as db:
+            try:
+                db.add_all(self._memory_nodes(chunks, embeddings, metadata, timestamp))
+                catalog = DocumentCatalog.upsert_statement([metadata] * len(chunks))
+                if catalog is not None:
+                    await db.execute(catalog)
+                await db.commit()
+                postgres_breaker.record_success()
+                await asyncio.to_thread(self._mark_synced, rows)
+                print(f"[MEMORY] Postgres Commit SUCCESS: Brain synchronized.")
+            except Exception as e:
+                postgres_breaker.record_failure(e)
+                print(f"[MEMORY] Postgres Commit FAILED (Docker likely offline): {e}")
+                await db.rollback()
+
     def _chunk_content(self, text: str, max_length: int = 1500) -> List[str]:
         if len(text) <= max_length:
             return [text]
@@ -195,24 +659,24 @@ class SovereignMemory:
         if current_chunk: chunks.append(current_chunk.strip())
         return chunks
 
-    def recall(self, query: str, top_k: int = 5, rerank: bool = True) -> List[Dict[str, Any]]:
-        """
-        Hybrid Retrieval: Merges Local Buffer + Postgres results.
-        """
+    def _recall_local(self, query: str, top_k: int):
+        """Encodes the query and collects Local Buffer (+ shadow) candidates."""
         candidates = []
         query_vec = None
         
         with self._get_models() as (encoder, reranker):
-            query_vec = encoder.encode([query], device=self.device).astype('float32')
+            query_vec = self._encode(encoder, [query])
 
-            # 1. Pull from Local FAISS
+            # 1. Pull from Local FAISS (lock-free: one immutable generation per query)
             try:
-                if self.index.ntotal > 0:
-                    distances, indices = self.index.search(query_vec, min(top_k * 4, self.index.ntotal))
+                generation = self._generation
+                if generation.size > 0:
+                    distances, indices = self._search_local(generation, query_vec, top_k * 4)
                     for dist, idx in zip(distances[0], indices[0]):
-                        if idx < len(self.buffer_metadata):
-                            meta = self.buffer_metadata[idx]
+                        if 0 <= idx < min(generation.size, len(generation.metadata)):
+                            meta = generation.metadata[int(idx)]
                             candidates.append({
+                                "memory_id": meta["id"],
                                 "content": meta["content"],
                                 "metadata": meta["metadata"],
                                 "timestamp": meta["metadata"].get("timestamp"),
@@ -222,28 +686,32 @@ class SovereignMemory:
             except Exception as e:
                 print(f"[MEMORY] Local Recall failed: {e}")
 
-        # 2. Pull from Postgres (If available)
-        db: Session = SessionLocal()
-        try:
-            if query_vec is not None:
-                pg_results = db.query(
-                    SovereignMemoryNode, 
-                    SovereignMemoryNode.embedding.l2_distance(query_vec[0].tolist()).label("distance")
-                ).order_by("distance").limit(top_k * 2).all()
-                
-                for node, distance in pg_results:
-                    candidates.append({
-                        "content": node.content,
-                        "metadata": node.metadata_json,
-                        "timestamp": str(node.created_at),
-                        "source": "postgres",
-                        "vector_score": float(distance)
-                    })
-        except Exception as e:
-            print(f"[MEMORY] Postgres Recall unavailable.")
-        finally:
-            db.close()
+        # 1b. Dual-read while an online re-embedding is running (reranker unifies both spaces)
+        migration = self.migration
+        if migration is not None:
+            try:
+                candidates.extend(migration.search_shadow(query, top_k * 2))
+            except Exception as e:
+                print(f"[MEMORY] Shadow Recall failed: {e}")
+        return query_vec, candidates
+
+    @staticmethod
+    def _postgres_recall_statement(query_vec: np.ndarray, top_k: int):
+        distance = SovereignMemoryNode.embedding.l2_distance(query_vec[0].tolist()).label("distance")
+        return select(SovereignMemoryNode, distance).order_by(distance).limit(top_k * 2)
 
+    @staticmethod
+    def _postgres_candidates(pg_results) -> List[Dict[str, Any]]:
+        return [{
+            "memory_id": f"pg:{node.id}",
+            "content": node.content,
+            "metadata": node.metadata_json,
+            "timestamp": str(node.created_at),
+            "source": "postgres",
+            "vector_score": float(distance)
+        } for node, distance in pg_results]
+
+    def _finalize_recall(self, query: str, candidates: List[Dict[str, Any]], top_k: int, rerank: bool) -> List[Dict[str, Any]]:
         if not candidates:
             return []
 
@@ -267,26 +735,79 @@ class SovereignMemory:
             for c in unique_candidates:
                 c["score"] = 1.0 - (c["vector_score"] / 100) # Rough normalization
 
-        return unique_candidates[:top_k]
+        results = unique_candidates[:top_k]
+        self.access_stats.record_hits(results)
+        return results
+
+    def recall(self, query: str, top_k: int = 5, rerank: bool = True) -> List[Dict[str, Any]]:
+        """
+        Hybrid Retrieval: Merges Local Buffer + Postgres results.
+        """
+        query_vec, candidates = self._recall_local(query, top_k)
+
+        # 2. Pull from Postgres (If available)
+        if query_vec is not None and self._postgres_available():
+            db: Session = SessionLocal()
+            try:
+                pg_results = db.execute(self._postgres_recall_statement(query_vec, top_k)).all()
+                postgres_breaker.record_success()
+                candidates.extend(self._postgres_candidates(pg_results))
+            except Exception as e:
+                postgres_breaker.record_failure(e)
+                print(f"[MEMORY] Postgres Recall unavailable.")
+            finally:
+                db.close()
+
+        return self._finalize_recall(query, candidates, top_k, rerank)
+
+    async def arecall(self, query: str, top_k: int = 5, rerank: bool = True) -> List[Dict[str, Any]]:
+        """
+        Async Hybrid Retrieval: CPU work (encode/FAISS/rerank) runs in worker threads,
+        the Postgres ANN query goes through the pooled asyncpg engine.
+        """
+        query_vec, candidates = await asyncio.to_thread(self._recall_local, query, top_k)
+
+        # 2. Pull from Postgres (If available)
+        if query_vec is not None and self._postgres_available():
+            try:
+                async with AsyncSessionLocal() as db:
+                    pg_results = (await db.execute(self._postgres_recall_statement(query_vec, top_k))).all()
+                postgres_breaker.record_success()
+                candidates.extend(self._postgres_candidates(pg_results))
+            except Exception as e:
+                postgres_breaker.record_failure(e)
+                print(f"[MEMORY] Postgres Recall unavailable.")
+
+        return await asyncio.to_thread(self._finalize_recall, query, candidates, top_k, rerank)
 
     def sync_with_postgres(self):
         """
         Drains the Local Buffer into Postgres.
         """
-        unsynced_items = [(i, meta) for i, meta in enumerate(self.buffer_metadata) if not meta.get("synced", False)]
-        if not unsynced_items:
+        # One drain at a time (periodic loop and breaker recovery may fire together)
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            self._drain_buffer()
+        finally:
+            self._sync_lock.release()
+
+    def _drain_buffer(self):
+        generation = self._generation
+        positions = generation.metadata.unsynced_positions(generation.size)
+        if not len(positions) or not self._postgres_available():
             # print("[MEMORY] No unsynced memories in local buffer.")
             return
+        unsynced_items = list(zip(positions, generation.metadata.rows(positions)))
 
         print(f"[MEMORY] Synchronizing {len(unsynced_items)} memories to Postgres...")
         db: Session = SessionLocal()
-        success_count = 0
+        synced = []
         try:
             for idx, meta in unsynced_items:
                 try:
-                    # Reconstruction from FAISS can be tricky depending on index type
-                    # Using IndexFlatL2 should be fine.
-                    embedding = self.index.reconstruct(idx).tolist()
+                    # Reconstruct from the snapshot (main SQ8 index or exact delta)
+                    embedding = generation.reconstruct(idx).tolist()
 
                     node = SovereignMemoryNode(
                         content=meta["content"],
@@ -294,19 +815,24 @@ class SovereignMemory:
                         embedding=embedding
                     )
                     db.add(node)
-                    meta["synced"] = True
-                    success_count += 1
+                    synced.append(meta)
                 except Exception as inner_e:
                     print(f"[MEMORY] Failed to sync item {idx}: {inner_e}")
                     continue
             
+            success_count = len(synced)
             if success_count > 0:
+                self._update_catalog(db, [meta["metadata"] for meta in synced])
                 db.commit()
+                postgres_breaker.record_success()
+                with self._write_lock:
+                    self.buffer_metadata.mark_synced([meta["id"] for meta in synced])
                 self._persist_buffer()
                 print(f"[MEMORY] Synchronization COMPLETE: {success_count} entries migrated.")
             else:
                 db.rollback()
         except Exception as e:
+            postgres_breaker.record_failure(e)
             print(f"[MEMORY] Global Sync failed: {e}")
             db.rollback()
         finally:
@@ -1,8 +1,17 @@
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from collections import deque
+from itertools import islice
+from typing import List, Dict, Any, Iterable, Optional
+import threading
+import asyncio
+import atexit
+import queue
+import time
 import json
 import os
 
+from app.core.config import settings
+
 class Finding:
     def __init__(self, agent_id: str, content: str, related_mission_id: str = "general"):
         self.agent_id = agent_id
@@ -10,21 +19,127 @@ class Finding:
         self.related_mission_id = related_mission_id
         self.timestamp = datetime.utcnow().isoformat()
 
+class Subscription:
+    """
+    Async iterator over new Blackboard posts matching `types` / `mission_id`.
+    Posts are pushed into a bounded per-subscriber inbox as they happen (from any
+    thread), so each one is delivered exactly once and nothing is polled. `cursor`
+    is the seq of the last delivered post: persist it and pass it back as `since`
+    to resume after a restart. A subscriber lagging more than `capacity` posts
+    behind loses the oldest ones (counted in `dropped`, their seqs in `dropped_seqs`).
+    """
+    def __init__(self, blackboard: "Blackboard", types: Optional[Iterable[str]], mission_id: Optional[str],
+                 cursor: int, capacity: int):
+        self.blackboard = blackboard
+        self.types = set(types) if types else None
+        self.mission_id = mission_id
+        self.cursor = cursor
+        self.dropped = 0
+        self.dropped_seqs: deque = deque(maxlen=capacity)
+        self.closed = False
+        self._inbox: deque = deque()
+        self._capacity = capacity
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._waiting = False
+
+    def matches(self, item: Dict[str, Any]) -> bool:
+        if self.types is not None and item.get("type") not in self.types:
+            return False
+        return self.mission_id is None or item.get("related_mission_id") == self.mission_id
+
+    def _push(self, item: Dict[str, Any]):
+        """Called with the blackboard lock held."""
+        if len(self._inbox) >= self._capacity:
+            self.dropped_seqs.append(self._inbox.popleft()["seq"])
+            self.dropped += 1
+        self._inbox.append(item)
+        if self._waiting:
+            self._waiting = False
+            try:
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                self.closed = True # The consumer's event loop is gone
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+        while True:
+            with self.blackboard._lock:
+                if self.closed:
+                    raise StopAsyncIteration
+                if self._inbox:
+                    item = self._inbox.popleft()
+                    self.cursor = item["seq"]
+                    return item
+                self._wakeup.clear()
+                self._waiting = True
+            await self._wakeup.wait()
+
+    def close(self):
+        """Unsubscribes; a consumer blocked in `async for` stops."""
+        self.blackboard._unsubscribe(self)
+        with self.blackboard._lock:
+            self.closed = True
+            if self._waiting:
+                self._waiting = False
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+
 class Blackboard:
     """
     A shared communication space for agents to post findings, insights, and telemetry.
+
+    Findings and insights live in fixed-capacity ring buffers, so memory stays flat
+    however long the research loops run. Every post is appended to memory_blackboard.jsonl
+    by a background writer that coalesces bursts into one write; the file is compacted
+    down to the ring contents once it holds COMPACT_FACTOR times the capacity.
+    Consumers react to posts through subscribe() instead of polling the rings.
     """
     _instance = None
+    COMPACT_FACTOR = 4
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(Blackboard, cls).__new__(cls)
-            cls._instance.findings = []
-            cls._instance.insights = []
-            base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-            cls._instance.storage_path = os.path.join(base_dir, "memory_blackboard.json")
+            cls._instance._setup()
         return cls._instance
 
+    def _setup(self):
+        self.findings: deque = deque(maxlen=settings.BLACKBOARD_FINDINGS_CAPACITY)
+        self.insights: deque = deque(maxlen=settings.BLACKBOARD_INSIGHTS_CAPACITY)
+        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+        self.storage_path = os.path.join(base_dir, "memory_blackboard.jsonl")
+        self.legacy_storage_path = os.path.join(base_dir, "memory_blackboard.json")
+        self.flush_interval = settings.BLACKBOARD_FLUSH_INTERVAL_SECONDS
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._log_lines = 0
+        self._written_seq = 0 # Highest seq in the JSONL log
+        self._subscribers: List[Subscription] = []
+        self._load()
+
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="blackboard-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _post(self, item: Dict[str, Any]):
+        with self._lock:
+            # Under one lock so seq order, ring order and write order agree
+            self._seq += 1
+            item["seq"] = self._seq
+            (self.insights if item["type"] == "insight" else self.findings).append(item)
+            self._queue.put(item)
+            for subscription in self._subscribers:
+                if subscription.matches(item):
+                    subscription._push(item)
+            if any(subscription.closed for subscription in self._subscribers):
+                self._subscribers = [subscription for subscription in self._subscribers if not subscription.closed]
+
     def post_finding(self, agent_id: str, content: str, related_mission_id: str = "general"):
         """Post a raw discovery or data point."""
         finding = {
@@ -34,9 +149,8 @@ class Blackboard:
             "timestamp": datetime.utcnow().isoformat(),
             "type": "finding"
         }
-        self.findings.append(finding)
+        self._post(finding)
         print(f"[BLACKBOARD] Finding posted by {agent_id}: {content[:100]}...")
-        self._persist()
 
     def post_insight(self, agent_id: str, summary: str):
         """Post a high-level semantic insight (used by Scout/Researcher)."""
@@ -46,24 +160,138 @@ class Blackboard:
             "timestamp": datetime.utcnow().isoformat(),
             "type": "insight"
         }
-        self.insights.append(insight)
+        self._post(insight)
         print(f"[BLACKBOARD] Insight posted by {agent_id}: {summary[:100]}...")
-        self._persist()
+
+    def _recent(self, ring: deque, limit: int) -> List[Dict[str, Any]]:
+        if limit <= 0:
+            return []
+        with self._lock:
+            return list(islice(reversed(ring), limit))[::-1]
 
     def get_recent_findings(self, limit: int = 10) -> List[Dict[str, Any]]:
-        return self.findings[-limit:]
+        return self._recent(self.findings, limit)
 
     def get_recent_insights(self, limit: int = 5) -> List[Dict[str, Any]]:
-        return self.insights[-limit:]
+        return self._recent(self.insights, limit)
+
+    def latest_seq(self) -> int:
+        """Seq of the newest post (0 when nothing was ever posted)."""
+        with self._lock:
+            return self._seq
+
+    def subscribe(self, types: Optional[Iterable[str]] = None, mission_id: Optional[str] = None,
+                  since: Optional[int] = None, capacity: Optional[int] = None) -> Subscription:
+        """
+        Async iterator of posts ("finding" / "insight" types, optionally one mission) from now on,
+        or every post still in the rings after seq `since`. `capacity` bounds the undelivered
+        backlog (default: the ring capacity):
+
+            async for finding in blackboard.subscribe(types=["finding"], mission_id="m1"):
+                ...
+        """
+        with self._lock:
+            if since is not None and since > self._seq:
+                since = 0 # The log was reset since that cursor was saved
+            subscription = Subscription(self, types, mission_id, self._seq if since is None else since,
+                                        capacity or self.findings.maxlen + self.insights.maxlen)
+            if since is not None:
+                backlog = [item for item in list(self.findings) + list(self.insights)
+                           if item.get("seq", 0) > since and subscription.matches(item)]
+                for item in sorted(backlog, key=lambda item: item["seq"]):
+                    subscription._push(item)
+            self._subscribers.append(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    # --- Persistence -----------------------------------------------------
 
-    def _persist(self):
-        """Save blackboard state to disk for cross-process observation (optional but helpful)."""
+    def _load(self):
+        """Refills the rings from the JSONL log (or the pre-JSONL snapshot, once)."""
         try:
-            data = {
-                "findings": self.findings[-100:], # Cap for now
-                "insights": self.insights[-50:]
-            }
-            with open(self.storage_path, "w") as f:
-                json.dump(data, f, indent=2)
+            if os.path.exists(self.storage_path):
+                with open(self.storage_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            item = json.loads(line)
+                        except ValueError:
+                            continue # Torn last line after a crash
+                        self._restore(item)
+                        self._log_lines += 1
+                self._written_seq = self._seq
+            elif os.path.exists(self.legacy_storage_path):
+                with open(self.legacy_storage_path, "r") as f:
+                    data = json.load(f)
+                for item in sorted(data.get("findings", []) + data.get("insights", []), key=lambda i: i.get("timestamp", "")):
+                    item["seq"] = self._seq + 1
+                    self._restore(item)
+                self._written_seq = self._seq
+                self._compact()
+                print(f"[BLACKBOARD] Migrated {self.legacy_storage_path} to {self.storage_path}")
         except Exception as e:
-            print(f"[BLACKBOARD] Persistence failed: {e}")
+            print(f"[BLACKBOARD] Could not restore persisted posts: {e}")
+
+    def _restore(self, item: Dict[str, Any]):
+        (self.insights if item.get("type") == "insight" else self.findings).append(item)
+        self._seq = max(self._seq, item.get("seq", 0))
+
+    def _write_loop(self):
+        """Writer thread: appends everything posted within flush_interval of the first pending post in one write."""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while batch[-1] is not None:
+                timeout = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            items = [item for item in batch if item is not None]
+            try:
+                if items:
+                    self._append(items)
+            except Exception as e:
+                print(f"[BLACKBOARD] Persistence failed: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if batch[-1] is None:
+                return
+
+    def _append(self, items: List[Dict[str, Any]]):
+        with open(self.storage_path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(item) + "\n" for item in items))
+        self._log_lines += len(items)
+        self._written_seq = items[-1]["seq"]
+        if self._log_lines > self.COMPACT_FACTOR * (self.findings.maxlen + self.insights.maxlen):
+            self._compact()
+
+    def _compact(self):
+        """Rewrites the log as just the current ring contents (posts that already fell out are dropped)."""
+        with self._lock:
+            items = list(self.findings) + list(self.insights)
+        # Posts still queued are appended by the writer afterwards
+        items = sorted((item for item in items if item.get("seq", 0) <= self._written_seq), key=lambda item: item.get("seq", 0))
+        tmp_path = self.storage_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("".join(json.dumps(item) + "\n" for item in items))
+        os.replace(tmp_path, self.storage_path)
+        self._log_lines = len(items)
+
+    def flush(self):
+        """Blocks until every post so far is in the JSONL log."""
+        if self._writer.is_alive():
+            self._queue.join()
+
+    def close(self):
+        """Writes out pending posts and stops the writer (registered with atexit)."""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
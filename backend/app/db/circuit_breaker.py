@@ -0,0 +1,129 @@
+import time
+import asyncio
+import threading
+from typing import Callable, List, Dict, Any, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError, InterfaceError, DisconnectionError
+
+from app.core.config import settings
+from app.db.schemas.session import engine
+
+
+class CircuitBreaker:
+    """
+    Health-tracked circuit breaker shared by every Postgres caller.
+    - closed: calls go through; consecutive outage errors are counted.
+    - open: calls are skipped instantly (no session, no connect timeout) while a
+      background probe retries with exponential backoff.
+    - On a successful probe the circuit closes and on_recover callbacks run
+      (e.g. draining the local FAISS buffer into Postgres).
+    Only connectivity errors trip the breaker; query errors are the caller's business.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    OUTAGE_ERRORS = (OperationalError, InterfaceError, DisconnectionError, OSError, TimeoutError, asyncio.TimeoutError)
+
+    def __init__(self, name: str, probe: Callable[[], None], failure_threshold: int = 2,
+                 base_backoff: float = 2.0, max_backoff: float = 300.0):
+        self.name = name
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.skipped_calls = 0
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self._probe_thread: Optional[threading.Thread] = None
+
+    def allow(self) -> bool:
+        """True if the caller may touch the database right now."""
+        if self.state == self.CLOSED:
+            return True
+        self.skipped_calls += 1
+        return False
+
+    def record_success(self):
+        if self.failures:
+            with self._lock:
+                self.failures = 0
+
+    def record_failure(self, error: Exception):
+        """Counts an error against the circuit; returns True if it was an outage error."""
+        if not self.is_outage(error):
+            return False
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error).splitlines()[0] if str(error) else type(error).__name__
+            if self.state == self.CLOSED and self.failures >= self.failure_threshold:
+                self._open()
+        return True
+
+    def on_recover(self, callback: Callable[[], None]):
+        self._callbacks.append(callback)
+
+    @classmethod
+    def is_outage(cls, error: Exception) -> bool:
+        return isinstance(error, cls.OUTAGE_ERRORS) or getattr(error, "connection_invalidated", False)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "state": self.state,
+            "failures": self.failures,
+            "open_for_seconds": round(time.time() - self.opened_at, 1) if self.opened_at else 0.0,
+            "skipped_calls": self.skipped_calls,
+            "last_error": self.last_error
+        }
+
+    def _open(self):
+        # Caller holds self._lock
+        self.state = self.OPEN
+        self.opened_at = time.time()
+        print(f"[BREAKER] {self.name} circuit OPEN after {self.failures} failures ({self.last_error}). Running local-only.")
+        if self._probe_thread is None or not self._probe_thread.is_alive():
+            self._probe_thread = threading.Thread(target=self._probe_loop, name=f"{self.name}-probe", daemon=True)
+            self._probe_thread.start()
+
+    def _probe_loop(self):
+        delay = self.base_backoff
+        while True:
+            time.sleep(delay)
+            try:
+                self.probe()
+            except Exception as e:
+                self.last_error = str(e).splitlines()[0] if str(e) else type(e).__name__
+                delay = min(delay * 2, self.max_backoff)
+                continue
+            break
+
+        with self._lock:
+            downtime = time.time() - self.opened_at
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened_at = None
+        print(f"[BREAKER] {self.name} circuit CLOSED after {downtime:.0f}s. Backend recovered.")
+        for callback in self._callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"[BREAKER] Recovery callback failed: {e}")
+
+
+def _probe_postgres():
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+# Global Instance
+postgres_breaker = CircuitBreaker(
+    "postgres",
+    _probe_postgres,
+    failure_threshold=settings.DB_BREAKER_FAILURE_THRESHOLD,
+    max_backoff=settings.DB_BREAKER_MAX_BACKOFF_SECONDS
+)
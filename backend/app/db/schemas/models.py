@@ -1,6 +1,10 @@
-from sqlalchemy import Column, Integer, String, JSON, DateTime, func
+from sqlalchemy import Column, Integer, String, JSON, DateTime, Index, func
 from pgvector.sqlalchemy import Vector
 from .session import Base
+from app.core.config import settings
+
+# Stored embedding width (384 for native MiniLM, smaller when a PCA/Matryoshka reducer is active)
+EMBEDDING_DIMENSION = settings.MEMORY_VECTOR_DIM
 
 class SovereignMemoryNode(Base):
     __tablename__ = "sovereign_memory_nodes"
@@ -8,15 +12,41 @@ class SovereignMemoryNode(Base):
     id = Column(Integer, primary_key=True, index=True)
     content = Column(String, nullable=False)
     metadata_json = Column(JSON, default={})
-    # SentenceTransformers 'all-MiniLM-L6-v2' has 384 dimensions
-    embedding = Column(Vector(384))
+    # SentenceTransformers 'all-MiniLM-L6-v2' has 384 dimensions (see MEMORY_VECTOR_DIM)
+    embedding = Column(Vector(EMBEDDING_DIMENSION))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Rows are appended in time order, so a tiny BRIN index serves retention range scans;
+    # md5(content) lets corpus imports skip rows that are already stored
+    __table_args__ = (Index("ix_sovereign_memory_nodes_created_brin", "created_at", postgresql_using="brin"),
+                      Index("ix_sovereign_memory_nodes_content_md5", func.md5(content)))
+
+def get_embedding_dimension() -> int:
+    """Current width of the pgvector embedding column as bound in SQLAlchemy."""
+    return SovereignMemoryNode.__table__.c.embedding.type.dim
+
+def set_embedding_dimension(dimension: int):
+    """Re-binds the pgvector column width at runtime (after an online re-embedding cutover)."""
+    SovereignMemoryNode.__table__.c.embedding.type.dim = dimension
+
+class MemoryDocument(Base):
+    """Documents catalog: one row per ingested source file, maintained on commit/sync."""
+    __tablename__ = "memory_documents"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source_file = Column(String, nullable=False, unique=True)
+    file_type = Column(String)
+    chunk_count = Column(Integer, nullable=False, default=0)
+    first_seen_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_ingested_at = Column(DateTime(timezone=True), server_default=func.now())
+
 class ResearchKnowledge(Base):
     __tablename__ = "research_knowledge"
 
     id = Column(Integer, primary_key=True, index=True)
     query = Column(String, index=True)
+    # md5 of the normalized query (see query_cache.normalize_query)
+    query_hash = Column(String)
     title = Column(String)
     url = Column(String)
     url_hash = Column(String, index=True)
@@ -25,3 +55,11 @@ class ResearchKnowledge(Base):
     query_type = Column(String) # code, news, research, etc.
     score = Column(String) # Store as string for flexibility
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Cache lookups filter by hash and freshness (TTL) in one index range scan;
+    # a URL is stored once per query, so several queries can share it
+    __table_args__ = (
+        Index("ix_research_knowledge_query_hash_created", "query_hash", "created_at"),
+        Index("ix_research_knowledge_query_url", "query_hash", "url_hash", unique=True),
+        Index("ix_research_knowledge_created_brin", "created_at", postgresql_using="brin"),
+    )
@@ -2,6 +2,8 @@ import asyncio
 from sqlalchemy import text
 from app.db.schemas.session import engine, SessionLocal
 from app.db.schemas.models import Base
+from app.core.memory.document_catalog import DocumentCatalog
+from app.core.agents.researcher.query_cache import hash_query
 
 def init_db():
     print("Creating vector extension...")
@@ -17,6 +19,103 @@ def init_db():
 
     print("Creating tables...")
     Base.metadata.create_all(bind=engine)
+
+    print("Backfilling normalized query hashes...")
+    db = SessionLocal()
+    try:
+        db.execute(text("ALTER TABLE research_knowledge ADD COLUMN IF NOT EXISTS query_hash VARCHAR"))
+        db.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_research_knowledge_query_hash_created "
+            "ON research_knowledge (query_hash, created_at)"
+        ))
+        rows = db.execute(text("SELECT DISTINCT query FROM research_knowledge WHERE query_hash IS NULL")).fetchall()
+        if rows:
+            db.execute(
+                text("UPDATE research_knowledge SET query_hash = :hash WHERE query = :query AND query_hash IS NULL"),
+                [{"query": r.query, "hash": hash_query(r.query)} for r in rows]
+            )
+        db.commit()
+        print(f"Hashed {len(rows)} distinct queries.")
+    except Exception as e:
+        print(f"Error backfilling query hashes: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+    print("Enforcing unique research URLs per query...")
+    db = SessionLocal()
+    try:
+        # A URL may belong to several queries: uniqueness is per (query_hash, url_hash), which
+        # ResearchRepository relies on for INSERT ... ON CONFLICT (query_hash, url_hash) DO UPDATE.
+        # Older databases made url_hash globally unique. Each step only runs when still needed.
+        def index_unique(name):
+            """True / False for a unique / plain index, None when it does not exist."""
+            return db.execute(text(
+                "SELECT i.indisunique FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"
+            ), {"name": name}).scalar()
+        if index_unique("ix_research_knowledge_url_hash"):
+            db.execute(text("DROP INDEX ix_research_knowledge_url_hash"))
+        db.execute(text("CREATE INDEX IF NOT EXISTS ix_research_knowledge_url_hash ON research_knowledge (url_hash)"))
+        if index_unique("ix_research_knowledge_query_url") is None:
+            # Only same-query duplicates are dropped
+            db.execute(text("""
+                DELETE FROM research_knowledge a USING research_knowledge b
+                WHERE a.query_hash = b.query_hash AND a.url_hash = b.url_hash AND a.id > b.id
+            """))
+            db.execute(text(
+                "CREATE UNIQUE INDEX ix_research_knowledge_query_url "
+                "ON research_knowledge (query_hash, url_hash)"
+            ))
+        db.commit()
+    except Exception as e:
+        print(f"Error enforcing unique URLs: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+    print("Creating retention indexes...")
+    db = SessionLocal()
+    try:
+        # BRIN on created_at: a few pages per table, enough to range-scan expired rows
+        db.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_sovereign_memory_nodes_created_brin "
+            "ON sovereign_memory_nodes USING brin (created_at)"
+        ))
+        db.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_research_knowledge_created_brin "
+            "ON research_knowledge USING brin (created_at)"
+        ))
+        db.commit()
+    except Exception as e:
+        print(f"Error creating retention indexes: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+    print("Creating corpus import index...")
+    db = SessionLocal()
+    try:
+        # CorpusImporter skips records whose md5(content) is already stored
+        db.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_sovereign_memory_nodes_content_md5 "
+            "ON sovereign_memory_nodes (md5(content))"
+        ))
+        db.commit()
+    except Exception as e:
+        print(f"Error creating corpus import index: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+    print("Backfilling documents catalog...")
+    db = SessionLocal()
+    try:
+        print(f"Catalog holds {DocumentCatalog.rebuild(db)} documents.")
+    except Exception as e:
+        print(f"Error backfilling catalog: {e}")
+        db.rollback()
+    finally:
+        db.close()
     print("Database initialization complete.")
 
 if __name__ == "__main__":
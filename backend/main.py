@@ -1,9 +1,11 @@
 from fastapi import FastAPI, Depends, HTTPException, UploadFile, File
 import shutil
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import uvicorn
+import io
 import os
+import json
 import subprocess
 import asyncio
 from dotenv import load_dotenv
@@ -12,6 +14,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from contextlib import asynccontextmanager
 
 # App imports
@@ -20,11 +23,18 @@ from app.core.skills.base import SkillRegistry
 from app.core.skills.precision.deep_research import DeepResearchSkill
 from app.core.skills.precision.cloud_researcher import CloudResearcherSkill
 from app.core.memory.vector_store import SovereignMemory
+from app.core.memory.reembedding import EmbeddingMigration
+from app.core.memory.document_catalog import DocumentCatalog
+from app.core.memory.retention import RetentionJob
+from app.core.memory.corpus_io import CorpusExporter, CorpusImporter
 from app.core.agents.scout.agent import ScoutAgent
 from app.core.knowledge_graph import KnowledgeGraph
 from app.core.telemetry import Blackboard
 from app.core.agents.researcher.mission_control import MissionControl
-from app.db.schemas.session import SessionLocal
+from sqlalchemy import select
+from app.db.schemas.session import AsyncSessionLocal
+from app.db.circuit_breaker import postgres_breaker
+from app.core.agents.researcher.query_cache import query_cache
 from app.db.schemas.models import SovereignMemoryNode
 from app.core.memory.dropzone_watcher import start_watcher
 from app.core.hardware import optimizer
@@ -41,6 +51,31 @@ blackboard = Blackboard()
 
 # Global reference to keep watcher alive
 dropzone_observer = None
+# Running re-embedding job (the event loop only keeps weak references to tasks)
+migration_task: Optional[asyncio.Task] = None
+
+def launch_migration(job: EmbeddingMigration) -> asyncio.Task:
+    """
+    Runs `job` in a worker thread. It becomes memory.migration before this returns,
+    so a concurrent start request sees it; failures are logged when the task ends.
+    """
+    global migration_task
+    memory.migration = job
+
+    def finished(task: asyncio.Task):
+        global migration_task
+        if migration_task is task:
+            migration_task = None
+        if task.cancelled() or task.exception() is None:
+            return
+        print(f"[MIGRATION ERROR] Re-embedding to {job.target_model} failed: {task.exception()}")
+        if memory.migration is job:
+            # Progress stays checkpointed; starting the same model again resumes it
+            memory.migration = None
+
+    migration_task = asyncio.create_task(asyncio.to_thread(job.run))
+    migration_task.add_done_callback(finished)
+    return migration_task
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -63,8 +98,7 @@ async def lifespan(app: FastAPI):
         print("[SENTINEL] Activating 24/7 Perpetual Ingestion Loop...")
         while True:
             try:
-                await kg.update_from_blackboard()
-                await asyncio.sleep(60) # Sync every minute
+                await kg.follow_blackboard() # Wakes on each new finding; no polling
             except Exception as e:
                 print(f"[SENTINEL ERROR] Perpetual sync failed: {e}")
                 await asyncio.sleep(10)
@@ -117,12 +151,52 @@ async def lifespan(app: FastAPI):
                 await asyncio.sleep(60)
 
     memory_sync_task = asyncio.create_task(perpetual_memory_sync())
+    # 5.1 Drain the buffer as soon as the Postgres circuit closes again (runs in the probe thread)
+    postgres_breaker.on_recover(memory.sync_with_postgres)
+
+    # 6. Start Hot/Cold Memory Tiering Loop (RAM budget enforcement)
+    async def perpetual_tiering():
+        print("[SENTINEL] Activating Hot/Cold Memory Tiering Loop...")
+        while True:
+            try:
+                await asyncio.sleep(600)
+                # Rebuilding the hot tier is CPU work; keep it off the event loop
+                await asyncio.to_thread(memory.rebalance_tiers)
+            except Exception as e:
+                print(f"[SENTINEL ERROR] Memory tiering failed: {e}")
+                await asyncio.sleep(60)
+
+    tiering_task = asyncio.create_task(perpetual_tiering())
+
+    # 6.1 Retention: expire memories per type and stale research results (hourly)
+    async def perpetual_retention():
+        print("[SENTINEL] Activating Memory Retention Loop...")
+        retention = RetentionJob(memory)
+        while True:
+            try:
+                await asyncio.sleep(3600)
+                await asyncio.to_thread(retention.run)
+            except Exception as e:
+                print(f"[SENTINEL ERROR] Memory retention failed: {e}")
+                await asyncio.sleep(60)
+
+    retention_task = asyncio.create_task(perpetual_retention())
+
+    # 7. Resume an interrupted online re-embedding (throttled, runs in a worker thread)
+    pending_model = EmbeddingMigration.pending(memory)
+    if pending_model:
+        print(f"[BOOT] Resuming re-embedding migration to {pending_model}")
+        launch_migration(EmbeddingMigration(memory, pending_model))
 
     yield
     print("[SHUTDOWN] Stopping Sentinel Systems")
     sync_task.cancel()
     research_task.cancel()
     memory_sync_task.cancel()
+    tiering_task.cancel()
+    retention_task.cancel()
+    memory.access_stats.save()
+    query_cache.save()
     if dropzone_observer:
         dropzone_observer.stop()
         dropzone_observer.join()
@@ -211,11 +285,29 @@ def get_telemetry():
         "insights": blackboard.get_recent_insights(limit=10)
     }
 
+@app.get("/api/dashboard/telemetry/stream")
+async def stream_telemetry(mission_id: Optional[str] = None, since: Optional[int] = None):
+    """
+    Live NDJSON feed of Blackboard posts, one line per post as it is made.
+    Pass the last seen `seq` as `since` to resume without gaps after a reconnect.
+    """
+    subscription = blackboard.subscribe(mission_id=mission_id, since=since)
+
+    async def feed():
+        try:
+            async for item in subscription:
+                yield json.dumps(item) + "\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(feed(), media_type="application/x-ndjson")
+
 @app.get("/api/dashboard/memory")
-def get_memory():
-    db = SessionLocal()
-    try:
-        nodes = db.query(SovereignMemoryNode).order_by(SovereignMemoryNode.created_at.desc()).limit(10).all()
+async def get_memory():
+    async with AsyncSessionLocal() as db:
+        nodes = (await db.execute(
+            select(SovereignMemoryNode).order_by(SovereignMemoryNode.created_at.desc()).limit(10)
+        )).scalars().all()
         return [
             {
                 "content": n.content,
@@ -223,45 +315,87 @@ def get_memory():
                 "created_at": n.created_at.isoformat()
             } for n in nodes
         ]
-    finally:
-        db.close()
 
-@app.get("/api/documents")
-async def list_documents():
+@app.get("/api/dashboard/memory/tiers")
+def get_memory_tiers():
+    return memory.tier_stats()
+
+@app.get("/api/dashboard/db/health")
+def get_db_health():
+    return postgres_breaker.status()
+
+@app.get("/api/dashboard/research/cache")
+def get_research_cache():
+    """Search cache hit rates per tier (exact / normalized / semantic / miss)."""
+    return query_cache.stats()
+
+class MigrationRequest(BaseModel):
+    model_name: str
+    batch_size: int = 64
+    throttle_seconds: float = 0.5
+
+@app.post("/api/memory/migrate")
+async def start_migration(request: MigrationRequest):
+    """
+    Starts an online re-embedding of the whole memory with a new encoder.
+    Recall keeps working (dual-read) and cuts over atomically when the job finishes.
     """
-    Returns a list of unique documents processed by the Hybrid Memory system.
+    if memory.migration is not None:
+        raise HTTPException(status_code=409, detail=f"Migration to {memory.migration.target_model} already running")
+    # No await between the check and launch_migration(): a second request cannot slip in
+    job = EmbeddingMigration(memory, request.model_name, request.batch_size, request.throttle_seconds)
+    launch_migration(job)
+    return job.status()
+
+@app.get("/api/memory/migrate")
+def migration_status():
+    if memory.migration is None:
+        return {"status": "idle", "model_name": memory.model_name, "dimension": memory.dimension}
+    return memory.migration.status()
+
+@app.get("/api/memory/export")
+async def export_memory(include_local: bool = True):
     """
-    # 1. Get from Local Buffer
-    docs_map = {}
-    for idx, meta in enumerate(memory.buffer_metadata):
-        source = meta["metadata"].get("source_file", "unknown")
-        if source not in docs_map:
-            docs_map[source] = {
-                "id": hash(source),
-                "title": source,
-                "file_type": source.split(".")[-1] if "." in source else "unknown",
-                "created_at": meta["metadata"].get("timestamp", "N/A")
-            }
-
-    # 2. Get from Postgres (to ensure we see everything)
-    db = SessionLocal()
+    Streams every memory (content, metadata, embedding) as NDJSON.
+    Postgres is read through a server-side cursor, so the response is constant-memory.
+    """
+    exporter = CorpusExporter(memory, include_local=include_local)
+    return StreamingResponse(
+        exporter.aiter_lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=sovereign_memory.ndjson"}
+    )
+
+@app.post("/api/memory/import")
+async def import_memory(file: UploadFile = File(...)):
+    """
+    Bulk-imports an NDJSON export (same format as /api/memory/export), streamed line by line.
+    """
+    lines = io.TextIOWrapper(file.file, encoding="utf-8")
     try:
-        nodes = db.query(SovereignMemoryNode).all()
-        for node in nodes:
-            source = node.metadata_json.get("source_file", "unknown")
-            if source not in docs_map:
-                docs_map[source] = {
-                    "id": node.id,
-                    "title": source,
-                    "file_type": source.split(".")[-1] if "." in source else "unknown",
-                    "created_at": node.created_at.isoformat()
-                }
-    except Exception as e:
-        print(f"[API ERROR] DB list failed: {e}")
-    finally:
-        db.close()
+        return await asyncio.to_thread(CorpusImporter(memory).run, lines)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/documents")
+async def list_documents(cursor: Optional[int] = None, limit: int = DocumentCatalog.DEFAULT_PAGE_SIZE):
+    """
+    Returns a page of unique documents processed by the Hybrid Memory system.
+    Pages over the memory_documents catalog (newest first); pass `next_cursor` back as `cursor`.
+    """
+    if postgres_breaker.allow():
+        try:
+            async with AsyncSessionLocal() as db:
+                documents = (await db.execute(DocumentCatalog.page_statement(cursor, limit))).scalars().all()
+            postgres_breaker.record_success()
+            return DocumentCatalog.to_page(documents, limit)
+        except Exception as e:
+            postgres_breaker.record_failure(e)
+            print(f"[API ERROR] DB list failed: {e}")
 
-    return list(docs_map.values())
+    # Postgres offline: list what the local buffer knows about
+    generation = memory._generation
+    return DocumentCatalog.local_page(generation.metadata.document_stats(generation.size), limit, cursor)
 
 @app.post("/api/documents/upload")
 async def upload_document(file: UploadFile = File(...)):
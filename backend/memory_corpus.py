@@ -0,0 +1,58 @@
+import os
+import sys
+import time
+import argparse
+from contextlib import redirect_stdout
+
+# Ensure we can import app
+sys.path.append(os.getcwd())
+
+from app.core.memory.vector_store import SovereignMemory
+from app.core.memory.corpus_io import CorpusExporter, CorpusImporter
+
+def export_corpus(path: str, include_local: bool):
+    out = sys.stdout if path == "-" else open(path, "w", encoding="utf-8")
+    # Logs go to stderr so `export -` produces a clean NDJSON stream
+    with redirect_stdout(sys.stderr):
+        print(f"--- SOVEREIGN MEMORY EXPORT -> {path} ---")
+        memory = SovereignMemory()
+        start = time.time()
+        records = -1 # header line
+        try:
+            for line in CorpusExporter(memory, include_local=include_local).iter_lines():
+                out.write(line)
+                records += 1
+        finally:
+            if out is not sys.__stdout__:
+                out.close()
+        print(f"SUCCESS: {records} memories exported in {time.time() - start:.1f}s.")
+
+def import_corpus(path: str, batch_size: int):
+    print(f"--- SOVEREIGN MEMORY IMPORT <- {path} ---")
+    memory = SovereignMemory()
+    start = time.time()
+    source = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        report = CorpusImporter(memory, batch_size=batch_size).run(source)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    print(f"SUCCESS: {report['imported']} memories imported in {time.time() - start:.1f}s "
+          f"(postgres={report['postgres']}, local_buffer={report['local_buffer']}, skipped={report['skipped']}, "
+          f"duplicates={report['duplicates']}).")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream the memory corpus to/from NDJSON (constant memory).")
+    sub = parser.add_subparsers(dest="command", required=True)
+    exp = sub.add_parser("export", help="Write every memory as NDJSON")
+    exp.add_argument("path", nargs="?", default="-", help="Output file ('-' for stdout)")
+    exp.add_argument("--no-local", action="store_true", help="Skip local buffer rows not yet synced to Postgres")
+    imp = sub.add_parser("import", help="Load an NDJSON export")
+    imp.add_argument("path", nargs="?", default="-", help="Input file ('-' for stdin)")
+    imp.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_corpus(args.path, include_local=not args.no_local)
+    else:
+        import_corpus(args.path, args.batch_size)
@@ -0,0 +1,47 @@
+import os
+import sys
+import argparse
+
+# Ensure we can import app
+sys.path.append(os.getcwd())
+
+from app.core.memory.vector_store import SovereignMemory
+from app.core.memory.dimensionality import VectorReducer, evaluate_reduction
+
+def evaluate_memory_reduction(target_dim: int, method: str, top_k: int):
+    print(f"--- DIMENSIONALITY REDUCTION EVALUATION ({method.upper()} -> {target_dim}) ---")
+
+    # 1. Re-encode the current memory at native dimension (ground truth space)
+    memory = SovereignMemory()
+    contents = memory.buffer_metadata.contents()
+    if len(contents) < target_dim:
+        print(f"FAILED: Need at least {target_dim} memories to evaluate, found {len(contents)}.")
+        return
+
+    print(f"\n[STEP 1] Encoding {len(contents)} memories with {memory.model_name}")
+    with memory._get_models() as (encoder, _):
+        vectors = encoder.encode(contents, device=memory.device).astype('float32')
+
+    # 2. Fit the candidate transform on the same corpus
+    print(f"\n[STEP 2] Fitting {method} reducer ({vectors.shape[1]} -> {target_dim})")
+    reducer = VectorReducer(vectors.shape[1], target_dim, method)
+    reducer.train(vectors)
+
+    # 3. Compare recall@k and per-query latency
+    print(f"\n[STEP 3] Measuring recall@{top_k} and latency")
+    report = evaluate_reduction(vectors, reducer, top_k=top_k)
+    for key, value in report.items():
+        print(f"  {key}: {value}")
+
+    if report["recall_loss"] <= 0.05:
+        print("\nSUCCESS: Reduced vectors keep recall within 5 points of native.")
+    else:
+        print("\nWARNING: Recall loss above 5 points. Consider a larger target dimension.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate reduced-dimension embeddings against the live memory.")
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--method", choices=VectorReducer.METHODS, default="pca")
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+    evaluate_memory_reduction(args.dim, args.method, args.top_k)
@@ -32,10 +32,17 @@ def test_knowledge_api():
     try:
         res = requests.get(f"{BASE_URL}/documents")
         print(f"[VERIFY] List Response: {res.status_code}")
-        docs = res.json()
+        docs = []
+        cursor = None
+        while True:
+            page = requests.get(f"{BASE_URL}/documents", params={"cursor": cursor} if cursor else {}).json()
+            docs.extend(page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
         print(f"[VERIFY] Documents found: {len(docs)}")
         for doc in docs:
-            print(f" - {doc['title']} ({doc['file_type']})")
+            print(f" - {doc['title']} ({doc['file_type']}, {doc['chunk_count']} chunks)")
         
         # Check if our test file is there
         titles = [d['title'] for d in docs]
@@ -1,55 +1,50 @@
 import os
-import json
-import hashlib
 import sys
+import argparse
 
 # Add backend to path
-sys.path.append(os.path.join(os.getcwd(), "backend"))
-
-def verify_audit_chain():
-    # Audit log is in the current directory's governance folder if running from backend
-    audit_log = os.path.join(os.getcwd(), "governance", "sovereign_audit.log")
-    
-    if not os.path.exists(audit_log):
-        print(f"[VERIFIER] Error: Audit log not found at {audit_log}")
-        return False
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.ledger.verifier import LedgerVerifier
+
+LEDGER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "governance", "ledger")
+SEGMENTS_DIR = os.path.join(LEDGER_DIR, "segments")
+WATERMARK_PATH = os.path.join(LEDGER_DIR, "verified.json")
 
+def verify_audit_chain(workers=None, chunk_mb=8, full=False):
     print(f"=== Sovereign Audit Chain Verification ===")
-    
-    expected_previous_hash = "0" * 64
-    entry_count = 0
-    
-    with open(audit_log, "r") as f:
-        for idx, line in enumerate(f):
-            try:
-                entry = json.loads(line.strip())
-                recorded_current_hash = entry.pop("current_hash")
-                recorded_previous_hash = entry.get("previous_hash")
-                
-                # Check link to previous
-                if recorded_previous_hash != expected_previous_hash:
-                    print(f"[!] BROKEN CHAIN at entry {idx}: Expected prev {expected_previous_hash[:8]}, found {recorded_previous_hash[:8]}")
-                    return False
-                
-                # Re-calculate hash
-                entry_str = json.dumps(entry, sort_keys=True)
-                calculated_hash = hashlib.sha256(entry_str.encode()).hexdigest()
-                
-                if calculated_hash != recorded_current_hash:
-                    print(f"[!] TAMPER DETECTED at entry {idx}: Calculated {calculated_hash[:8]}, found {recorded_current_hash[:8]}")
-                    return False
-                
-                expected_previous_hash = calculated_hash
-                entry_count += 1
-            except Exception as e:
-                print(f"[!] Error parsing entry {idx}: {e}")
-                return False
-
-    print(f"COMPLETE: Verified {entry_count} entries. Chain is mathematically valid and untampered.")
+
+    if not os.path.isdir(SEGMENTS_DIR):
+        print(f"[VERIFIER] Error: Ledger segments not found at {SEGMENTS_DIR}")
+        return False
+
+    # Every link and every entry hash, segments verified in parallel (from the watermark unless --full)
+    verifier = LedgerVerifier(SEGMENTS_DIR, workers=workers, chunk_bytes=int(chunk_mb * 1024 * 1024),
+                              watermark_path=WATERMARK_PATH)
+    report = verifier.run(full=full)
+    if report["incremental"]:
+        print(f"[INFO] Resuming from verified watermark at entry {report['start_index']}")
+
+    for gap in report["archived_gaps"]:
+        print(f"[INFO] Archived segments before segment {gap['before_segment']}: resumed at entry {gap['resumes_at']}")
+    print(f"Throughput: {report['entries_per_second']:.0f} entries/s, {report['mb_per_second']:.1f} MB/s "
+          f"({report['segments']} segments in {report['elapsed_seconds']}s)")
+
+    if not report["ok"]:
+        print(f"[!] CHAIN BROKEN at entry {report['first_broken_index']}: {report['error']}")
+        return False
+
+    print(f"COMPLETE: Verified {report['entries']} entries ({report['chain_length']} total). Chain is mathematically valid and untampered.")
     return True
 
 if __name__ == "__main__":
-    if verify_audit_chain():
+    parser = argparse.ArgumentParser(description="Verify the audit ledger (links + entry hashes).")
+    parser.add_argument("--workers", type=int, default=None, help="Verifier processes (default: CPU count)")
+    parser.add_argument("--full", action="store_true", help="Ignore the verified watermark and re-check the whole ledger")
+    parser.add_argument("--chunk-mb", type=float, default=8, help="Byte range per task for uncompressed segments")
+    args = parser.parse_args()
+
+    if verify_audit_chain(args.workers, args.chunk_mb, args.full):
         sys.exit(0)
     else:
         sys.exit(1)
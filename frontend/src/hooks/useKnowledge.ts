@@ -2,22 +2,33 @@ import { useState, useEffect } from "react";
 import api from "@/lib/api";
 
 export interface Document {
-    id: number;
+    id: number | null;
     title: string;
     file_type: string;
+    chunk_count: number;
     created_at: string;
+    last_ingested_at: string;
+}
+
+export interface DocumentPage {
+    items: Document[];
+    next_cursor: number | null;
 }
 
 export function useKnowledge() {
     const [documents, setDocuments] = useState<Document[]>([]);
     const [loading, setLoading] = useState(false);
     const [uploading, setUploading] = useState(false);
+    const [nextCursor, setNextCursor] = useState<number | null>(null);
 
-    const fetchDocuments = async () => {
+    const fetchDocuments = async (cursor: number | null = null) => {
         setLoading(true);
         try {
-            const { data } = await api.get<Document[]>("/documents");
-            setDocuments(data);
+            const { data } = await api.get<DocumentPage>("/documents", {
+                params: cursor !== null ? { cursor } : {},
+            });
+            setDocuments((prev) => (cursor !== null ? [...prev, ...data.items] : data.items));
+            setNextCursor(data.next_cursor);
         } catch (error) {
             console.error("Failed to fetch docs", error);
         } finally {
@@ -25,6 +36,12 @@ export function useKnowledge() {
         }
     };
 
+    const loadMore = async () => {
+        if (nextCursor !== null) {
+            await fetchDocuments(nextCursor);
+        }
+    };
+
     const uploadDocument = async (file: File) => {
         setUploading(true);
         const formData = new FormData();
@@ -47,5 +64,13 @@ export function useKnowledge() {
         fetchDocuments();
     }, []);
 
-    return { documents, loading, uploading, uploadDocument, refresh: fetchDocuments };
+    return {
+        documents,
+        loading,
+        uploading,
+        uploadDocument,
+        refresh: () => fetchDocuments(),
+        loadMore,
+        hasMore: nextCursor !== null,
+    };
 }
@@ -26,21 +26,19 @@ async def run_swarm_stress_test(agent_count=50):
 
     # 2. Forensic Load
     print("\n--- Generating Forensic Load ---")
-    start_logs = 0
-    if os.path.exists(immudb.audit_log_path):
-        with open(immudb.audit_log_path, "r") as f:
-            start_logs = len(f.readlines())
+    start_logs = immudb.entry_count
 
     for i in range(10):
         immudb.log_operation("SWARM_HEARTBEAT", {"swarm_size": len(swarm), "cycle": i})
+    immudb.flush() # Entries are group-committed in the background
     
     # 3. Verify Integrity
-    if os.path.exists(immudb.audit_log_path):
-        with open(immudb.audit_log_path, "r") as f:
-            total_logs = len(f.readlines())
-        
-        is_consistent = immudb.consistency_proof(start_logs, total_logs - 1)
-        print(f"Forensic Consistency: {'[SUCCESS]' if is_consistent else '[FAIL]'}")
+    total_logs = immudb.entry_count
+    is_consistent = immudb.consistency_proof(start_logs, total_logs - 1)
+    print(f"Forensic Consistency: {'[SUCCESS]' if is_consistent else '[FAIL]'}")
+    chain = immudb.verify() # Only the entries appended since the last verified watermark
+    print(f"Chain Verification: {'[SUCCESS]' if chain['ok'] else '[FAIL]'} "
+          f"({chain['entries']} new entries, {chain['chain_length']} total)")
 
     # 4. Cleanup
     swarm.clear()
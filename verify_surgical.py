@@ -18,13 +18,8 @@ async def run_surgical_verification():
     immudb.log_operation("OP1", {"v": 1})
     immudb.log_operation("OP2", {"v": 2})
     
-    # Verify chain
-    logs = immudb._logs if hasattr(immudb, "_logs") and immudb._logs else []
-    if not logs:
-        import os
-        if os.path.exists(immudb.audit_log_path):
-            with open(immudb.audit_log_path, "r") as f:
-                logs = [json.loads(l) for l in f.readlines()]
+    # Verify chain (get_logs returns the tail, most recent first)
+    logs = immudb.get_logs(limit=2)[::-1]
     
     if len(logs) >= 2:
         prev, curr = logs[-2], logs[-1]